@@ -0,0 +1,11 @@
+"""arledge benchmarks.
+
+The hot-path suite lives in arledge.bench and runs as ``arledge bench`` (or
+``python -m benchmarks`` from a checkout): it generates ledgers of
+increasing size and times the CLI and MCP paths, reporting latency
+percentiles, throughput and peak RSS as JSON for comparison between commits.
+
+The scripts next to this file are focused micro-benchmarks, each comparing
+one optimization against the code it replaced. Run them directly, e.g.
+``python benchmarks/scanner_bench.py``.
+"""
@@ -0,0 +1,6 @@
+"""``python -m benchmarks [options]``: same as ``arledge bench [options]``."""
+import sys
+
+from arledge.cli import cli
+
+cli.main(args=["bench", *sys.argv[1:]], prog_name="python -m benchmarks")
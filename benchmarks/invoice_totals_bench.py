@@ -0,0 +1,101 @@
+"""Benchmark: validating an invoice with many lines (metered billing).
+
+Compares a copy of the previous models (per-line Decimal constants and
+pydantic attribute assignment in compute_totals) with arledge.models,
+asserts the amounts are identical and prints timings.
+
+    python benchmarks/invoice_totals_bench.py [--lines N] [--repeat N]
+"""
+from __future__ import annotations
+import argparse
+import random
+import time
+import timeit
+from decimal import Decimal, ROUND_HALF_UP
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from arledge import models
+
+
+class LegacyLine(BaseModel):
+    description: str
+    quantity: Decimal = Decimal("1")
+    unit_price: Decimal
+    vat_rate: Decimal = Decimal("0")
+    net: Optional[Decimal] = None
+    vat: Optional[Decimal] = None
+    line_total: Optional[Decimal] = None
+
+    @field_validator("quantity", "unit_price", "vat_rate", mode="before")
+    def _coerce_decimal(cls, v):
+        if isinstance(v, str):
+            return Decimal(v)
+        if isinstance(v, float):
+            return Decimal(str(v))
+        return v
+
+    @model_validator(mode="after")
+    def compute_totals(self):
+        net = (Decimal(self.quantity) * Decimal(self.unit_price)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        vat = (net * (Decimal(self.vat_rate) / Decimal("100"))).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        self.net = net
+        self.vat = vat
+        self.line_total = (net + vat).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        return self
+
+
+class LegacyInvoice(BaseModel):
+    customer_id: int
+    lines: List[LegacyLine] = Field(default_factory=list)
+    subtotal: Optional[Decimal] = None
+    total_vat: Optional[Decimal] = None
+    total: Optional[Decimal] = None
+
+    @model_validator(mode="after")
+    def compute_totals(self):
+        subtotal = Decimal("0")
+        total_vat = Decimal("0")
+        for l in self.lines:
+            subtotal += Decimal(l.net)
+            total_vat += Decimal(l.vat)
+        self.subtotal = subtotal.quantize(Decimal("0.01"))
+        self.total_vat = total_vat.quantize(Decimal("0.01"))
+        self.total = (self.subtotal + self.total_vat).quantize(Decimal("0.01"))
+        return self
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--lines", type=int, default=20000)
+    ap.add_argument("--repeat", type=int, default=10)
+    args = ap.parse_args(argv)
+
+    rnd = random.Random(1)
+    lines = [
+        {
+            "description": f"usage {i}",
+            "quantity": str(Decimal(rnd.randint(1, 100000)) / 1000),
+            "unit_price": str(Decimal(rnd.randint(1, 99999)) / 10000),
+            "vat_rate": rnd.choice(["25", "12", "6", "0"]),
+        }
+        for i in range(args.lines)
+    ]
+    old = LegacyInvoice(customer_id=1, lines=lines)
+    new = models.Invoice(customer_id=1, lines=lines)
+    assert [(l.net, l.vat, l.line_total) for l in old.lines] == [(l.net, l.vat, l.line_total) for l in new.lines]
+    assert (old.subtotal, old.total_vat, old.total) == (new.subtotal, new.total_vat, new.total)
+    print(f"identical amounts: yes (total {new.total})")
+
+    cases = {
+        "legacy models": lambda: LegacyInvoice(customer_id=1, lines=lines),
+        "arledge.models": lambda: models.Invoice(customer_id=1, lines=lines),
+    }
+    for name, fn in cases.items():
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat, timer=time.process_time))
+        print(f"{name:20s} {best * 1000:8.1f} ms  ({best / args.lines * 1e6:.2f} us/line)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark: `customer list` / `invoice list` latency per beancount load profile.
+
+Builds a ledger with ``--customers`` customers and ``--invoices`` invoices
+in ``--basedir`` (a temporary directory unless given; an existing ledger
+there is reused), then runs each listing as a fresh ``arledge`` process per
+profile (see arledge.loading), checks that every profile prints the same
+JSON (apart from load-time ``created_at`` values) and reports the best wall
+time of ``--repeat`` runs.
+
+beancount's pickle cache is disabled so every run really loads the ledger.
+
+    python benchmarks/load_profiles_bench.py [--customers N] [--invoices N] [--repeat N] [--basedir DIR]
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ["BEANCOUNT_DISABLE_LOAD_CACHE"] = "1"
+os.environ["ARLEDGE_NO_DAEMON"] = "1"
+
+from arledge import beancount_write, loading, models
+
+
+def build(base: Path, customers: int, invoices: int) -> None:
+    os.environ["ARLEDGE_BASEDIR"] = str(base)
+    if (base / "ledger.beancount").exists():
+        return
+    chunk = 5000
+    for start in range(0, customers, chunk):
+        n = min(chunk, customers - start)
+        beancount_write.create_customers(
+            [models.Customer(name=f"Customer {start + i}", email=f"c{start + i}@example.com") for i in range(n)]
+        )
+    line = {"description": "Konsulttjänst", "quantity": "3", "unit_price": "1250.00", "vat_rate": "25"}
+    for start in range(0, invoices, chunk):
+        n = min(chunk, invoices - start)
+        beancount_write.create_invoices(
+            [models.Invoice(customer_id=1 + (start + i) % max(customers, 1), lines=[line]) for i in range(n)]
+        )
+
+
+def run(argv, profile: str) -> tuple[float, str]:
+    env = {**os.environ, "ARLEDGE_LOAD_PROFILE": profile}
+    code = "import sys; from arledge.client import main; main(sys.argv[1:])"
+    t = time.perf_counter()
+    r = subprocess.run([sys.executable, "-c", code, *argv], env=env, capture_output=True, text=True, check=True)
+    return time.perf_counter() - t, r.stdout
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--customers", type=int, default=20000)
+    ap.add_argument("--invoices", type=int, default=20000)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--basedir")
+    args = ap.parse_args(argv)
+
+    base = Path(args.basedir or tempfile.mkdtemp(prefix="arledge-profiles-"))
+    build(base, args.customers, args.invoices)
+    print(f"ledger: {base}")
+    for cmd in (["customer", "list"], ["invoice", "list"]):
+        print(" ".join(cmd))
+        outputs = {}
+        for profile in loading.PROFILES:
+            best, out = min(run(cmd, profile) for _ in range(args.repeat))
+            # invoice listings report the load time as created_at
+            outputs[profile] = [{k: v for k, v in d.items() if k != "created_at"} for d in json.loads(out)]
+            print(f"  {profile:8s} {best * 1000:8.0f} ms")
+        assert all(o == outputs["full"] for o in outputs.values()), f"{cmd}: profiles print different JSON"
+
+
+if __name__ == "__main__":
+    main()
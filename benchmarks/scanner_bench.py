@@ -0,0 +1,80 @@
+"""Benchmark: arledge.scanner against the beancount parser on large ledger files.
+
+Builds a ledger with ``--customers`` customers and ``--invoices`` invoices
+in ``--basedir`` (a temporary directory unless given; an existing ledger
+there is reused), then parses the customers file, the largest invoice file
+and the whole ledger (includes followed) with beancount and with the
+scanner. Each result is checked to be identical (entries, errors, included
+files, display context) and the best time of ``--repeat`` runs is reported.
+
+    python benchmarks/scanner_bench.py [--customers N] [--invoices N] [--repeat N] [--basedir DIR]
+"""
+from __future__ import annotations
+import argparse
+import gc
+import os
+import tempfile
+import time
+from pathlib import Path
+
+os.environ["BEANCOUNT_DISABLE_LOAD_CACHE"] = "1"
+
+from beancount import loader
+from beancount.parser import parser
+
+from arledge import scanner
+from load_profiles_bench import build  # same generated ledger as the profile benchmark
+
+
+def best(fn, repeat: int):
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        t = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t)
+    return min(times), result
+
+
+def same(a, b) -> bool:
+    return (
+        a[0] == b[0]
+        and [e.message for e in a[1]] == [e.message for e in b[1]]
+        and a[2]["include"] == b[2]["include"]
+        and str(a[2]["dcontext"]) == str(b[2]["dcontext"])
+    )
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--customers", type=int, default=50000)
+    ap.add_argument("--invoices", type=int, default=50000)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--basedir")
+    args = ap.parse_args(argv)
+
+    base = Path(args.basedir or tempfile.mkdtemp(prefix="arledge-scanner-"))
+    build(base, args.customers, args.invoices)
+    ledger = base / "ledger.beancount"
+    invoice_file = max((base / "includes" / "invoices").glob("*.beancount"), key=lambda p: p.stat().st_size)
+    cases = [
+        (f"{p.name} ({p.stat().st_size // 1024} KiB)", (lambda p=p: parser.parse_file(str(p))), (lambda p=p: scanner.parse_file(str(p))))
+        for p in (base / "includes" / "customers.beancount", invoice_file)
+    ]
+    cases.append(
+        (
+            "whole ledger",
+            lambda: loader._parse_recursive([(str(ledger.resolve()), True)], None, None),
+            lambda: scanner.parse_recursive(ledger),
+        )
+    )
+    print(f"ledger: {base}")
+    for name, ref, fast in cases:
+        t_ref, r_ref = best(ref, args.repeat)
+        t_fast, r_fast = best(fast, args.repeat)
+        assert same(r_ref, r_fast), f"{name}: scanner and beancount disagree"
+        print(f"  {name:32s} beancount {t_ref * 1000:7.0f} ms   scanner {t_fast * 1000:7.0f} ms   x{t_ref / t_fast:.1f}")
+
+
+if __name__ == "__main__":
+    main()
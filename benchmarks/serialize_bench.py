@@ -0,0 +1,63 @@
+"""Benchmark: CLI JSON serialization of invoice listings.
+
+Compares the legacy pipeline (model_dump() + config._serialize_value walk +
+json.dumps) with arledge.serialize, asserts the output is byte-identical and
+prints timings.
+
+    python benchmarks/serialize_bench.py [--invoices N] [--lines N] [--repeat N]
+"""
+from __future__ import annotations
+import argparse
+import json
+import timeit
+from datetime import datetime
+from decimal import Decimal
+
+from arledge import config, models, serialize
+
+
+def legacy_dumps(items) -> str:
+    def walk(x):
+        if isinstance(x, Decimal):
+            return format(x, "f")
+        if isinstance(x, datetime):
+            return config.dt_to_iso_utc(x)
+        if isinstance(x, dict):
+            return {k: walk(y) for k, y in x.items()}
+        if isinstance(x, (list, tuple)):
+            return [walk(y) for y in x]
+        return x
+
+    return json.dumps([walk(m.model_dump()) for m in items], ensure_ascii=False)
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--invoices", type=int, default=3000)
+    ap.add_argument("--lines", type=int, default=10)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    line = {"description": "Konsulttjänst", "quantity": "3", "unit_price": "1250.00", "vat_rate": "25"}
+    invs = [
+        models.Invoice(id=i, customer_id=1, description=f"Invoice {i}", lines=[line] * args.lines)
+        for i in range(1, args.invoices + 1)
+    ]
+    old = legacy_dumps(invs)
+    new = serialize.dumps(invs)
+    assert old == new, "serialize.dumps output differs from the legacy pipeline"
+    print(f"byte-identical: yes ({len(new.encode('utf-8'))} bytes)")
+
+    cases = {
+        "legacy (model_dump + walk + json.dumps)": lambda: legacy_dumps(invs),
+        "serialize.dumps (stdlib json)": lambda: serialize.dumps(invs),
+    }
+    if serialize._orjson() is not None:
+        cases["serialize.to_builtins + orjson (compact)"] = lambda: serialize._orjson().dumps(serialize.to_builtins(invs))
+    for name, fn in cases.items():
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        print(f"{name:45s} {best * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
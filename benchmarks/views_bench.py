@@ -0,0 +1,104 @@
+"""Benchmark: listing customers and invoices as pydantic models vs arledge.views.
+
+Builds a ledger with ``--customers`` customers and ``--invoices`` invoices
+(100k entities by default) in ``--basedir`` (a temporary directory unless
+given; an existing ledger there is reused), checks that views serialize
+exactly like the models and reports, per listing, the wall time, the number
+of objects tracked by the garbage collector and the memory held by the
+result.
+
+    python benchmarks/views_bench.py [--customers N] [--invoices N] [--lines N] [--basedir DIR]
+"""
+from __future__ import annotations
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# beancount's pickle cache does not notice files added to a glob include
+# after it was written (such as the invoice month file created after the
+# customers), which would hide the invoices here.
+os.environ.setdefault("BEANCOUNT_DISABLE_LOAD_CACHE", "1")
+
+from arledge import beancount_store, beancount_write, config, models, serialize, snapshot
+
+
+def build(base: Path, customers: int, invoices: int, lines: int) -> None:
+    os.environ["ARLEDGE_BASEDIR"] = str(base)
+    if (base / "ledger.beancount").exists():
+        return
+    chunk = 5000
+    for start in range(0, customers, chunk):
+        n = min(chunk, customers - start)
+        beancount_write.create_customers(
+            [models.Customer(name=f"Customer {start + i}", email=f"c{start + i}@example.com") for i in range(n)]
+        )
+    line = {"description": "Konsulttjänst", "quantity": "3", "unit_price": "1250.00", "vat_rate": "25"}
+    for start in range(0, invoices, chunk):
+        n = min(chunk, invoices - start)
+        beancount_write.create_invoices(
+            [models.Invoice(customer_id=1 + (start + i) % max(customers, 1), lines=[line] * lines) for i in range(n)]
+        )
+
+
+def measure(fn, repeat: int = 3):
+    """Return ``(result, best wall time, gc objects added, bytes held by the result)``."""
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        t = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - t
+        best = elapsed if best is None else min(best, elapsed)
+    # objects and memory from a separate run: tracemalloc slows allocation
+    gc.collect()
+    before = len(gc.get_objects())
+    tracemalloc.start()
+    res = fn()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.collect()
+    return res, best, len(gc.get_objects()) - before, held
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--customers", type=int, default=60000)
+    ap.add_argument("--invoices", type=int, default=40000)
+    ap.add_argument("--lines", type=int, default=3)
+    ap.add_argument("--basedir")
+    args = ap.parse_args(argv)
+
+    base = Path(args.basedir or tempfile.mkdtemp(prefix="arledge-views-"))
+    t = time.perf_counter()
+    build(base, args.customers, args.invoices, args.lines)
+    print(f"ledger: {base} (ready in {time.perf_counter() - t:.1f} s)")
+    # keep the parsed ledger and all decoded sidecars resident (as the MCP
+    # server does, with a larger sidecar cache) so mapping is what is timed
+    config.SIDECAR_CACHE_SIZE = max(config.SIDECAR_CACHE_SIZE, args.invoices)
+    snapshot.enable()
+    list(beancount_store.iter_invoices())
+
+    cases = [
+        ("customers", lambda view: list(beancount_store.iter_customers(view=view))),
+        ("invoices", lambda view: list(beancount_store.iter_invoices(view=view))),
+    ]
+    for kind, fn in cases:
+        models_res, *m = measure(lambda: fn(False))
+        views_res, *v = measure(lambda: fn(True))
+        a, b = serialize.to_builtins(models_res), serialize.to_builtins(views_res)
+        if kind == "invoices":
+            for d in a + b:
+                d.pop("created_at")
+        assert a == b, f"{kind}: views serialize differently from models"
+        print(f"{kind} ({len(views_res)})")
+        for name, (elapsed, objects, held) in (("models", m), ("views", v)):
+            print(f"  {name:7s} {elapsed * 1000:8.1f} ms  {objects:9d} gc objects  {held / 2**20:8.1f} MiB")
+        del models_res, views_res, a, b
+
+
+if __name__ == "__main__":
+    main()
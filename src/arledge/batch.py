@@ -0,0 +1,114 @@
+"""Run a JSONL script of arledge commands in one process (`arledge batch`).
+
+Each non-blank line of the script is one operation, a JSON object that
+mirrors a CLI invocation, either as the full argument list::
+
+    {"argv": ["invoice", "view", "3"]}
+
+or as a command with optional arguments and an inline model (passed as
+``--model``)::
+
+    {"command": "customer create", "model": {"name": "ACME"}}
+    {"command": "invoice list", "args": ["--limit", "10"], "id": "page-1"}
+
+Operations run in order through arledge.runner against the resident ledger
+snapshot (arledge.snapshot), so a read after a write sees the write without
+re-parsing the ledger and interpreter start-up is paid once. Each operation
+yields one result object::
+
+    {"op": 1, "exit_code": 0, "result": {...}}
+
+``op`` is the 1-based line number and ``id`` is echoed when the operation
+has one. ``result`` is the command's stdout parsed as JSON (``stdout`` holds
+the text instead when it is not a single JSON document) and ``stderr`` is
+present when the command wrote to stderr.
+"""
+from __future__ import annotations
+import json
+import shlex
+from typing import Any, Iterable, Iterator, List
+
+# commands that block, read the terminal or would nest batches
+EXCLUDED_COMMANDS = {"batch", "mcp", "serve", "watch"}
+
+
+def parse_op(op: Any) -> List[str]:
+    """Return the CLI argv of one decoded operation; raises ValueError if malformed."""
+    if not isinstance(op, dict):
+        raise ValueError("operation must be a JSON object")
+    if "argv" in op:
+        argv = op["argv"]
+        if not isinstance(argv, list) or not all(isinstance(a, (str, int)) for a in argv):
+            raise ValueError("argv must be a list of strings")
+        argv = [str(a) for a in argv]
+    elif isinstance(op.get("command"), str):
+        args = op.get("args", [])
+        if not isinstance(args, list) or not all(isinstance(a, (str, int)) for a in args):
+            raise ValueError("args must be a list of strings")
+        argv = shlex.split(op["command"]) + [str(a) for a in args]
+        if "model" in op:
+            argv += ["--model", json.dumps(op["model"], ensure_ascii=False)]
+    else:
+        raise ValueError('operation needs "argv" or "command"')
+    if not argv:
+        raise ValueError("empty command")
+    from .daemon import command_name
+
+    # root options such as --timings may precede the command name
+    name = command_name(argv)
+    if name is None:
+        raise ValueError(f"no command in {shlex.join(argv)!r}")
+    if name in EXCLUDED_COMMANDS:
+        raise ValueError(f"{name!r} cannot run inside a batch")
+    return argv
+
+
+def _result(n: int, op: Any, exit_code: int, stdout: str, stderr: str) -> dict:
+    res: dict = {"op": n}
+    if isinstance(op, dict) and "id" in op:
+        res["id"] = op["id"]
+    res["exit_code"] = exit_code
+    if stdout.strip():
+        try:
+            res["result"] = json.loads(stdout)
+        except ValueError:
+            res["stdout"] = stdout
+    else:
+        res["result"] = None
+    if stderr:
+        res["stderr"] = stderr
+    return res
+
+
+def run(lines: Iterable[str], stop_on_error: bool = False) -> Iterator[dict]:
+    """Execute the operations in ``lines`` in order, yielding one result per operation.
+
+    Malformed lines yield a result with exit code 2 without running
+    anything. With ``stop_on_error`` nothing after the first failing
+    operation is run. The resident snapshot is enabled for the duration of
+    the batch.
+    """
+    from . import runner, snapshot
+
+    was_enabled = snapshot.is_enabled()
+    snapshot.enable()
+    try:
+        for n, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            op = None
+            try:
+                op = json.loads(line)
+                argv = parse_op(op)
+            except ValueError as e:
+                yield _result(n, op, 2, "", f"Invalid operation: {e}\n")
+                if stop_on_error:
+                    return
+                continue
+            r = runner.run_cli(argv)
+            yield _result(n, op, r.exit_code, r.stdout, r.stderr)
+            if stop_on_error and r.exit_code:
+                return
+    finally:
+        if not was_enabled:
+            snapshot.enable(False)
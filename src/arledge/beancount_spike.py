@@ -8,13 +8,13 @@ This is intentionally small and dependency-light; its purpose is to capture the
 parsing/mapping approach for the BEANCOUNT replacement plan.
 """
 from __future__ import annotations
-import json
 from decimal import Decimal
 from pathlib import Path
 from typing import Any, Dict, List, Tuple
 
 from . import models
 from . import config
+from . import sidecar
 
 
 def extract_custom_entries_from_loader_entries(entries: List[Any]) -> List[Any]:
@@ -37,6 +37,26 @@ def entry_meta_map(entry: Any) -> Dict[str, Any]:
     return getattr(entry, "meta", {}) or {}
 
 
+_TITLE_ATTRS = ("payee", "what", "name", "label", "narration", "description")
+_title_attrs_cache: Dict[type, Tuple[str, ...]] = {}
+
+
+def _title_attrs(cls: type) -> Tuple[str, ...]:
+    """The title attribute candidates ``cls`` can have.
+
+    Beancount entries are namedtuples, so candidates outside ``_fields`` are
+    skipped without a failing attribute lookup.
+    """
+    try:
+        return _title_attrs_cache[cls]
+    except KeyError:
+        pass
+    fields = getattr(cls, "_fields", None)
+    attrs = _TITLE_ATTRS if fields is None else tuple(a for a in _TITLE_ATTRS if a in fields)
+    _title_attrs_cache[cls] = attrs
+    return attrs
+
+
 def detect_entry_title(entry: Any) -> str | None:
     """Attempt to find a human-readable title/name for a Custom entry.
 
@@ -45,7 +65,7 @@ def detect_entry_title(entry: Any) -> str | None:
     common attribute names and fall back to scanning string attributes.
     """
     # Common attribute candidates
-    for attr in ("payee", "what", "name", "label", "narration", "description"):
+    for attr in _title_attrs(type(entry)):
         val = getattr(entry, attr, None)
         if isinstance(val, str) and val.strip():
             return val.strip()
@@ -269,11 +289,15 @@ def map_transaction_to_invoice(
     created_at = coerce_date_to_dt(getattr(entry, "date", None))
     due_at = coerce_date_to_dt(meta.get("due_at"))
 
-    # Determine currency from the first posting
+    # Determine currency from the first posting with explicit units (an
+    # elided amount is only filled in by booking, which the default load
+    # profile skips; see arledge.loading)
     currency = "SEK"
-    postings = getattr(entry, "postings", []) or []
-    if postings and postings[0].units:
-        currency = postings[0].units.currency
+    for p in getattr(entry, "postings", []) or []:
+        cur = getattr(p.units, "currency", None)
+        if isinstance(cur, str):
+            currency = cur
+            break
 
     # Load invoice lines from JSON sidecar
     lines: List[Dict[str, Any]] = []
@@ -283,9 +307,7 @@ def map_transaction_to_invoice(
         if sidecar_dir is not None:
             path = sidecar_dir / path
         if path.exists():
-            with open(path) as f:
-                sidecar = json.load(f)
-            lines = sidecar.get("lines", [])
+            lines = sidecar.read(path).get("lines", [])
 
     narration = getattr(entry, "narration", None) or ""
 
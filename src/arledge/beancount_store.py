@@ -3,116 +3,416 @@
 Provides functions mirroring the legacy DB read APIs but sourcing data from
 beancount files and sidecar JSON files.
 
-This module is intentionally read-only and uses beancount.loader.load_file to
-parse ledger.beancount (which should include the includes/ files). It reuses
+This module is intentionally read-only and parses ledger.beancount (which
+should include the includes/ files) with the configured load profile (see
+arledge.loading; by default parse only, without booking or plugins). It reuses
 mapping helpers in src/arledge/beancount_spike.py to build Pydantic models.
 """
 from __future__ import annotations
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional
 import json
+import os
+from datetime import datetime, timezone
+from decimal import Decimal
 from pathlib import Path
 
 from . import config
+from . import loading
 from . import models
+from . import sidecar
+from . import snapshot
+from . import totals
+from . import views
 from .beancount_spike import (
     extract_custom_entries_from_loader_entries,
     map_custom_to_customer,
     map_custom_to_creditor,
     map_custom_to_payment_account,
     coerce_int,
+    coerce_date_to_dt,
+    detect_entry_title,
 )
 
 
+def _load_file(ledger_file: Path, profile: Optional[str] = None) -> tuple[List[object], list, dict]:
+    try:
+        return loading.load(ledger_file, profile)
+    except Exception:
+        # Surface loader errors up to the caller via returned errors when possible
+        # but avoid raising here; return empty and an error indicator
+        return [], ["failed to load beancount ledger"], {}
+
+
+def _snapshot() -> Optional[snapshot.LedgerSnapshot]:
+    """Return the current ledger snapshot, or None if there is no ledger.beancount.
+
+    Long-lived processes enable arledge.snapshot so repeated reads are served
+    from memory; otherwise every call parses the ledger. With the parse-only
+    ``arledge`` profile, appends by other processes are merged into the
+    resident snapshot without re-reading the rest of the ledger.
+    """
+    base = config.get_basedir()
+    ledger_file = base / "ledger.beancount"
+    if not ledger_file.exists():
+        return None
+    profile = loading.current_profile()
+    return snapshot.load(
+        ledger_file, lambda f: _load_file(f, profile), variant=profile, incremental=profile == "arledge"
+    )
+
+
 def _load_ledger_entries() -> tuple[List[object], list, dict]:
     """Load the top-level ledger.beancount and return (entries, errors, options).
 
     The ledger file is resolved relative to config.get_basedir(). If there is no
     ledger.beancount file, return ([], [], {}).
     """
-    base = config.get_basedir()
-    ledger_file = base / "ledger.beancount"
-    if not ledger_file.exists():
+    snap = _snapshot()
+    if snap is None:
         return [], [], {}
-    try:
-        from beancount.loader import load_file
+    return snap.entries, snap.errors, snap.options
 
-        entries, errors, options = load_file(str(ledger_file))
-        return entries, errors, options
-    except Exception:
-        # Surface loader errors up to the caller via returned errors when possible
-        # but avoid raising here; return empty and an error indicator
-        return [], ["failed to load beancount ledger"], {}
 
+def current_snapshot() -> Optional[snapshot.LedgerSnapshot]:
+    """The ledger snapshot reads are served from now (None without a ledger).
 
-def _entries_for_custom_type(custom_type: str) -> List[object]:
-    entries, errors, opts = _load_ledger_entries()
-    customs = extract_custom_entries_from_loader_entries(entries)
-    # beancount Custom entries usually have a `type` attribute indicating the kind
-    return [e for e in customs if getattr(e, "type", None) == custom_type]
+    Pass it to ``ledger_digest`` and the ``page_*`` functions so both see
+    the same ledger state with one load.
+    """
+    return _snapshot()
 
 
-# Customers
+def _entries_for_custom_type(custom_type: str, snap: Optional[snapshot.LedgerSnapshot] = None) -> List[object]:
+    if snap is None:
+        snap = _snapshot()
+    if snap is None:
+        return []
 
-def list_customers() -> List[models.Customer]:
-    """Return the latest mapping for each customer id.
+    def select(entries):
+        customs = extract_custom_entries_from_loader_entries(entries)
+        # beancount Custom entries usually have a `type` attribute indicating the kind
+        return [e for e in customs if getattr(e, "type", None) == custom_type]
 
-    If multiple custom entries for the same customer_id exist, prefer the
-    entry with the most recent date so that updates appended to the include
-    file are reflected.
+    def extend(es, added):
+        new = select(added)
+        return es + new if new else es
+
+    return snap.memo(("custom", custom_type), lambda: select(snap.entries), extend)
+
+
+def _invoice_transactions(snap: Optional[snapshot.LedgerSnapshot] = None) -> dict[int, object]:
+    """Return invoice transactions indexed by invoice_id (first occurrence wins)."""
+    if snap is None:
+        snap = _snapshot()
+    if snap is None:
+        return {}
+
+    def index(idx, entries):
+        for e in entries:
+            if e.__class__.__name__ == "Transaction":
+                meta = getattr(e, "meta", {}) or {}
+                inv_id = coerce_int(meta.get("invoice_id"))
+                if inv_id is not None and inv_id not in idx:
+                    idx[inv_id] = e
+        return idx
+
+    return snap.memo("invoice_transactions", lambda: index({}, snap.entries), lambda idx, added: index(dict(idx), added))
+
+
+_WRITE_ID_FIELDS = {"customer": "customer_id", "creditor": "creditor_id", "payment_account": "account_id"}
+
+
+def write_index() -> dict:
+    """Return the ids and accounts that writes are checked against.
+
+    ``{"customer", "creditor", "payment_account", "invoice"}`` map to sets of
+    ids in use and ``{"opens", "closes"}`` map account -> date of its first
+    open / last close directive. Memoized per snapshot and extended on
+    appends; use ``copy_write_index`` before adding to it.
     """
-    es = _entries_for_custom_type("customer")
+    snap = _snapshot()
+    if snap is None:
+        return index_written(empty_write_index(), [])
+    return snap.memo(
+        "write_index",
+        lambda: index_written(empty_write_index(), snap.entries),
+        lambda idx, added: index_written(copy_write_index(idx), added),
+    )
+
+
+def empty_write_index() -> dict:
+    return {"customer": set(), "creditor": set(), "payment_account": set(), "invoice": set(), "opens": {}, "closes": {}}
+
+
+def copy_write_index(idx: dict) -> dict:
+    return {k: v.copy() for k, v in idx.items()}
+
+
+def index_written(idx: dict, entries: Iterable[object]) -> dict:
+    """Add the ids and accounts of ``entries`` to ``idx`` in place and return it."""
+    for e in entries:
+        name = e.__class__.__name__
+        if name == "Custom":
+            field = _WRITE_ID_FIELDS.get(getattr(e, "type", None))
+            if field is not None:
+                ident = coerce_int((e.meta or {}).get(field))
+                if ident is not None:
+                    idx[e.type].add(ident)
+        elif name == "Transaction":
+            inv_id = coerce_int((e.meta or {}).get("invoice_id"))
+            if inv_id is not None:
+                idx["invoice"].add(inv_id)
+        elif name == "Open":
+            opened = idx["opens"].get(e.account)
+            if opened is None or e.date < opened:
+                idx["opens"][e.account] = e.date
+        elif name == "Close":
+            closed = idx["closes"].get(e.account)
+            if closed is None or e.date > closed:
+                idx["closes"][e.account] = e.date
+    return idx
+
+
+def _latest_custom_entries(
+    custom_type: str, id_field: str, snap: Optional[snapshot.LedgerSnapshot] = None
+) -> dict[int, object]:
+    """Map id -> newest custom entry of ``custom_type`` (by date; later entry wins ties)."""
+    es = _entries_for_custom_type(custom_type, snap)
     latest: dict[int, object] = {}
     for e in es:
         try:
             meta = getattr(e, "meta", {}) or {}
-            cid = coerce_int(meta.get("customer_id"))
+            cid = coerce_int(meta.get(id_field))
             if cid is None:
+                # skip entries without id
                 continue
             existing = latest.get(cid)
             if existing is None:
                 latest[cid] = e
                 continue
+            # prefer entry with later date; if dates equal prefer newer entry (e)
             d_new = getattr(e, "date", None)
             d_old = getattr(existing, "date", None)
             if d_new is None:
+                # keep existing
                 continue
             if d_old is None or d_new >= d_old:
                 latest[cid] = e
         except Exception:
             continue
-    res: List[models.Customer] = []
-    for e in latest.values():
-        try:
-            res.append(map_custom_to_customer(e))
-        except Exception:
-            continue
-    res.sort(key=lambda x: x.id or 0)
+    return latest
+
+
+def _map_or_none(mapper, e):
+    try:
+        return mapper(e)
+    except Exception:
+        return None
+
+
+def _plain_strs(meta: dict, keys) -> Optional[dict]:
+    """``meta`` values for ``keys`` if each is a str or missing (None), else None."""
+    res = {}
+    for k in keys:
+        v = meta.get(k)
+        if v is not None and type(v) is not str:
+            return None
+        res[k] = v
     return res
 
 
+def _customer_view(e) -> Optional[views.CustomerView]:
+    """Build the view of a customer entry (None for entries the model rejects).
+
+    Entries with unusual metadata types go through map_custom_to_customer so
+    the view holds exactly what validation would produce.
+    """
+    meta = getattr(e, "meta", {}) or {}
+    name = detect_entry_title(e)
+    strs = _plain_strs(meta, ("email", "address"))
+    if name and strs is not None:
+        return views.CustomerView(
+            model_version=models.__version__, id=coerce_int(meta.get("customer_id")), name=name, **strs
+        )
+    m = _map_or_none(map_custom_to_customer, e)
+    return views.CustomerView.from_model(m) if m is not None else None
+
+
+_CREDITOR_STR_FIELDS = ("address", "email", "phone", "tax_id", "payment_instructions", "default_currency")
+
+
+def _creditor_view(e) -> Optional[views.CreditorView]:
+    """Build the view of a creditor entry; see _customer_view."""
+    meta = getattr(e, "meta", {}) or {}
+    name = detect_entry_title(e)
+    strs = _plain_strs(meta, _CREDITOR_STR_FIELDS)
+    created = coerce_date_to_dt(getattr(e, "date", None) or meta.get("created_at"))
+    if name and strs is not None:
+        return views.CreditorView(
+            model_version=models.__version__,
+            id=coerce_int(meta.get("creditor_id")),
+            name=name,
+            **{**strs, "default_currency": strs["default_currency"] or "SEK"},
+            beancount_account=None,
+            created_at=created or datetime.now(timezone.utc),
+        )
+    m = _map_or_none(map_custom_to_creditor, e)
+    return views.CreditorView.from_model(m) if m is not None else None
+
+
+def ledger_digest(snap: Optional[snapshot.LedgerSnapshot] = None) -> str:
+    """Digest of the current ledger state, or of ``snap`` (see snapshot.LedgerSnapshot.digest)."""
+    if snap is None:
+        snap = _snapshot()
+    return snap.digest() if snap is not None else ""
+
+
+def _iter_mapped(ids: Iterable[int], hydrate) -> Iterator:
+    for i in ids:
+        item = hydrate(i)
+        if item is not None:
+            yield item
+
+
+def _page(ids: List[int], after: Optional[int], descending: bool, limit: Optional[int], hydrate) -> tuple[list, bool]:
+    """Keyset page over sorted ``ids``: hydrate items after ``after`` until ``limit`` are found.
+
+    Items whose hydration returns None are skipped. Returns ``(items, has_more)``.
+    """
+    if after is not None:
+        ids = [i for i in ids if (i < after if descending else i > after)]
+    res: list = []
+    for i in ids:
+        if limit is not None and len(res) >= limit:
+            return res, True
+        item = hydrate(i)
+        if item is not None:
+            res.append(item)
+    return res, False
+
+
+# Customers
+
+def list_customers() -> List[models.Customer]:
+    """Return the latest mapping for each customer id.
+
+    If multiple custom entries for the same customer_id exist, prefer the
+    entry with the most recent date so that updates appended to the include
+    file are reflected.
+    """
+    return list(iter_customers())
+
+
+def iter_customers(view: bool = False) -> Iterator[models.Customer]:
+    """Yield customers in id order, mapping each model only when it is consumed.
+
+    With ``view=True`` read-only views.CustomerView objects are yielded instead.
+    """
+    latest = _latest_custom_entries("customer", "customer_id")
+    return _iter_mapped(sorted(latest), _customer_mapper(latest, view))
+
+
+def _customer_mapper(latest: dict, view: bool):
+    if view:
+        return lambda i: _customer_view(latest[i])
+    return lambda i: _map_or_none(map_custom_to_customer, latest[i])
+
+
 def get_invoice_sidecar_path(invoice_id: int) -> Optional[Path]:
     """Return the resolved filesystem Path to the invoice sidecar JSON for the given invoice_id, or None if not found."""
+    e = _invoice_transactions().get(invoice_id)
+    if e is None:
+        return None
+    meta = getattr(e, "meta", {}) or {}
+    inv_data = meta.get("invoice_data")
+    if not inv_data:
+        return None
+    p = Path(inv_data)
+    if not p.is_absolute():
+        p = config.get_basedir() / inv_data
+    return p
+
+
+def list_invoice_sidecars() -> List[tuple[int, object, Path]]:
+    """Return ``(invoice_id, date, path)`` for every invoice transaction that references a sidecar.
+
+    Paths are resolved against the base directory; entries are returned in
+    ledger order.
+    """
     entries, errors, opts = _load_ledger_entries()
+    base = config.get_basedir()
+    res: List[tuple[int, object, Path]] = []
     for e in entries:
-        if e.__class__.__name__ == "Transaction":
+        if e.__class__.__name__ != "Transaction":
+            continue
+        meta = getattr(e, "meta", {}) or {}
+        inv_id = coerce_int(meta.get("invoice_id"))
+        inv_data = meta.get("invoice_data")
+        if inv_id is None or not inv_data or not isinstance(inv_data, str):
+            continue
+        p = Path(inv_data)
+        if not p.is_absolute():
+            p = base / inv_data
+        res.append((inv_id, getattr(e, "date", None), p))
+    return res
+
+
+def invoice_sidecar_index() -> dict[str, int]:
+    """Map each sidecar path (normalized, absolute) referenced by an invoice transaction to its invoice id.
+
+    Kept per snapshot and extended on appends, so callers can check sidecar
+    files without resolving every invoice again.
+    """
+    snap = _snapshot()
+    if snap is None:
+        return {}
+    base = str(config.get_basedir())
+
+    def index(idx, entries):
+        for e in entries:
+            if e.__class__.__name__ != "Transaction":
+                continue
             meta = getattr(e, "meta", {}) or {}
             inv_id = coerce_int(meta.get("invoice_id"))
-            if inv_id == invoice_id:
-                inv_data = meta.get("invoice_data")
-                if not inv_data:
-                    return None
-                p = Path(inv_data)
-                if not p.is_absolute():
-                    p = config.get_basedir() / inv_data
-                return p
-    return None
+            inv_data = meta.get("invoice_data")
+            if inv_id is not None and inv_data and isinstance(inv_data, str):
+                idx.setdefault(os.path.normpath(os.path.join(base, inv_data)), inv_id)
+        return idx
+
+    return snap.memo("invoice_sidecars", lambda: index({}, snap.entries), lambda idx, added: index(dict(idx), added))
 
 
 def get_customer(customer_id: int) -> Optional[models.Customer]:
-    for c in list_customers():
-        if c.id == customer_id:
-            return c
-    return None
+    return get_customers([customer_id]).get(customer_id)
+
+
+def page_customers(
+    limit: Optional[int] = None,
+    after: Optional[int] = None,
+    view: bool = False,
+    snap: Optional[snapshot.LedgerSnapshot] = None,
+) -> tuple[List[models.Customer], bool]:
+    """Return up to ``limit`` customers with id > ``after`` (ascending) and whether more follow.
+
+    Only the returned page is mapped to models (or views, with ``view=True``).
+    ``snap`` (from ``current_snapshot``) pins the ledger state read.
+    """
+    latest = _latest_custom_entries("customer", "customer_id", snap)
+    return _page(sorted(latest), after, False, limit, _customer_mapper(latest, view))
+
+
+def get_customers(customer_ids: Iterable[int]) -> dict[int, models.Customer]:
+    """Resolve several customers with a single listing; missing ids are absent.
+
+    Only the requested customers are mapped to models.
+    """
+    latest = _latest_custom_entries("customer", "customer_id")
+    res = {}
+    for i in customer_ids:
+        c = _map_or_none(map_custom_to_customer, latest[i]) if i in latest else None
+        if c is not None:
+            res[i] = c
+    return res
 
 
 # Creditors
@@ -124,47 +424,38 @@ def list_creditors() -> List[models.Creditor]:
     entry with the most recent date (or the later one in the ledger) so that
     updates appended to the include file are reflected.
     """
-    es = _entries_for_custom_type("creditor")
-    # Build mapping creditor_id -> entry (choose newest by date)
-    latest: dict[int, object] = {}
-    for e in es:
-        try:
-            meta = getattr(e, "meta", {}) or {}
-            cid = coerce_int(meta.get("creditor_id"))
-            if cid is None:
-                # skip entries without id
-                continue
-            existing = latest.get(cid)
-            if existing is None:
-                latest[cid] = e
-                continue
-            # compare dates if available
-            d_new = getattr(e, "date", None)
-            d_old = getattr(existing, "date", None)
-            # prefer entry with later date; if dates equal or missing prefer newer entry (e)
-            if d_new is None:
-                # keep existing
-                continue
-            if d_old is None or d_new >= d_old:
-                latest[cid] = e
-        except Exception:
-            continue
-    res: List[models.Creditor] = []
-    for e in latest.values():
-        try:
-            res.append(map_custom_to_creditor(e))
-        except Exception:
-            continue
-    # Sort by id ascending for determinism
-    res.sort(key=lambda x: x.id or 0)
-    return res
+    return list(iter_creditors())
+
+
+def iter_creditors(view: bool = False) -> Iterator[models.Creditor]:
+    """Yield creditors in id order (ascending, for determinism), mapping lazily.
+
+    With ``view=True`` read-only views.CreditorView objects are yielded instead.
+    """
+    latest = _latest_custom_entries("creditor", "creditor_id")
+    return _iter_mapped(sorted(latest), _creditor_mapper(latest, view))
+
+
+def _creditor_mapper(latest: dict, view: bool):
+    if view:
+        return lambda i: _creditor_view(latest[i])
+    return lambda i: _map_or_none(map_custom_to_creditor, latest[i])
+
+
+def page_creditors(
+    limit: Optional[int] = None,
+    after: Optional[int] = None,
+    view: bool = False,
+    snap: Optional[snapshot.LedgerSnapshot] = None,
+) -> tuple[List[models.Creditor], bool]:
+    """Return up to ``limit`` creditors with id > ``after`` (ascending) and whether more follow."""
+    latest = _latest_custom_entries("creditor", "creditor_id", snap)
+    return _page(sorted(latest), after, False, limit, _creditor_mapper(latest, view))
 
 
 def get_creditor(creditor_id: int) -> Optional[models.Creditor]:
-    for c in list_creditors():
-        if c.id == creditor_id:
-            return c
-    return None
+    e = _latest_custom_entries("creditor", "creditor_id").get(creditor_id)
+    return _map_or_none(map_custom_to_creditor, e) if e is not None else None
 
 
 # Payment accounts
@@ -185,16 +476,135 @@ def list_payment_accounts(creditor_id: Optional[int] = None) -> List[models.Paym
 
 # Invoices
 
-def _load_invoice_sidecar(path_str: str) -> dict | None:
+def _read_invoice_sidecar(path_str: str) -> tuple[object, str] | None:
+    """Return ``(data, checksum)`` for a sidecar path from transaction metadata."""
     base = config.get_basedir()
     p = Path(path_str)
     if not p.is_absolute():
         p = base / path_str
     try:
-        with open(p, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return snapshot.read_sidecar(p, sidecar.read_verified)
+    except Exception:
+        return None
+
+
+def _load_invoice_sidecar(path_str: str) -> dict | None:
+    res = _read_invoice_sidecar(path_str)
+    return res[0] if res else None
+
+
+# fields_set of models produced by validation, mirrored by the trusted path
+_LINE_FIELDS_SET = frozenset(models.InvoiceLine.model_fields) - {"model_version"}
+_INVOICE_FIELDS_SET = frozenset(models.Invoice.model_fields) - {"model_version"}
+
+
+def _invoice_header(inv_data: dict) -> Optional[dict]:
+    """Invoice field values (all but lines and totals) as validation would produce them.
+
+    Returns None when the data needs coercion (or rejection) by validation.
+    """
+    if inv_data["due_at"] is not None or not all(
+        isinstance(inv_data[k], str) for k in ("status", "currency")
+    ) or not isinstance(inv_data["description"], (str, type(None))):
+        return None
+    return {
+        "model_version": models.__version__,
+        "id": inv_data["id"],
+        "customer_id": inv_data["customer_id"],
+        "status": inv_data["status"],
+        "created_at": datetime.now(timezone.utc),
+        "due_at": None,
+        "description": inv_data["description"],
+        "creditor_id": inv_data["creditor_id"],
+        "currency": inv_data["currency"],
+    }
+
+
+def _trusted_invoice(inv_data: dict, sc: dict, view: bool = False):
+    """Build an Invoice (or InvoiceView) from a checksum-verified sidecar without validation.
+
+    The sidecar was written from a validated model, so its line amounts and
+    totals are used as-is instead of re-running InvoiceLine/Invoice
+    compute_totals. Returns None when the data is not in the expected shape
+    (the caller then validates normally).
+    """
+    values = _invoice_header(inv_data)
+    if values is None:
+        return None
+    try:
+        line_values = [
+            {
+                "model_version": d["model_version"],
+                "description": d["description"],
+                "quantity": Decimal(d["quantity"]),
+                "unit_price": Decimal(d["unit_price"]),
+                "vat_rate": Decimal(d["vat_rate"]),
+                "net": Decimal(d["net"]),
+                "vat": Decimal(d["vat"]),
+                "line_total": Decimal(d["line_total"]),
+            }
+            for d in sc["lines"]
+        ]
+        values["subtotal"] = Decimal(sc["subtotal"])
+        values["total_vat"] = Decimal(sc["total_vat"])
+        values["total"] = Decimal(sc["total"])
+    except Exception:
+        return None
+    if view:
+        values["lines"] = [views.InvoiceLineView(**v) for v in line_values]
+        return views.InvoiceView(**values)
+    values["lines"] = [
+        models.construct_trusted(models.InvoiceLine, v, set(_LINE_FIELDS_SET)) for v in line_values
+    ]
+    return models.construct_trusted(models.Invoice, values, set(_INVOICE_FIELDS_SET))
+
+
+def _map_invoice_transaction(e, with_lines: bool = True, view: bool = False):
+    """Build an Invoice from an invoice transaction and its sidecar (None if invalid).
+
+    With ``with_lines=False`` the sidecar is not read: lines are empty and the
+    totals are zero. With ``view=True`` a views.InvoiceView is returned.
+    """
+    meta = getattr(e, "meta", {}) or {}
+    inv_id = coerce_int(meta.get("invoice_id"))
+    if inv_id is None:
+        return None
+    # build a minimal invoice mapping
+    inv_data = {
+        "id": inv_id,
+        "customer_id": coerce_int(meta.get("customer_id")) or 0,
+        "status": meta.get("status") or "draft",
+        "created_at": None,
+        "due_at": meta.get("due_at"),
+        "description": getattr(e, "narration", None) or getattr(e, "description", None),
+        "creditor_id": coerce_int(meta.get("creditor_id")),
+        "currency": meta.get("currency") or "SEK",
+        "lines": [],
+    }
+    # Load sidecar if present
+    side = meta.get("invoice_data")
+    if side and with_lines:
+        res = _read_invoice_sidecar(side)
+        if res and isinstance(res[0], dict):
+            sc, digest = res
+            # Sidecars written by arledge carry their checksum in the
+            # transaction; a match means the stored data can be trusted.
+            # Updated, tampered or legacy sidecars are validated in full.
+            if meta.get("invoice_checksum") == digest:
+                inv = _trusted_invoice(inv_data, sc, view)
+                if inv is not None:
+                    return inv
+            inv_data["lines"] = sc.get("lines", [])
+    if view and not inv_data["lines"]:
+        values = _invoice_header(inv_data)
+        if values is not None:
+            values["subtotal"], values["total_vat"], values["total"] = totals.invoice_amounts(())
+            return views.InvoiceView(lines=[], **values)
+    try:
+        inv = models.Invoice.model_validate(inv_data)
     except Exception:
         return None
+    return views.InvoiceView.from_model(inv) if view else inv
 
 
 def list_invoices() -> List[models.Invoice]:
@@ -203,43 +613,63 @@ def list_invoices() -> List[models.Invoice]:
     result: List[models.Invoice] = []
     for e in entries:
         if e.__class__.__name__ == "Transaction":
-            meta = getattr(e, "meta", {}) or {}
-            inv_id = coerce_int(meta.get("invoice_id"))
-            if inv_id is None:
-                continue
-            # build a minimal invoice mapping
-            inv_data = {
-                "id": inv_id,
-                "customer_id": coerce_int(meta.get("customer_id")) or 0,
-                "status": meta.get("status") or "draft",
-                "created_at": None,
-                "due_at": meta.get("due_at"),
-                "description": getattr(e, "narration", None) or getattr(e, "description", None),
-                "creditor_id": coerce_int(meta.get("creditor_id")),
-                "currency": meta.get("currency") or "SEK",
-                "lines": [],
-            }
-            # Load sidecar if present
-            side = meta.get("invoice_data")
-            if side:
-                sc = _load_invoice_sidecar(side)
-                if sc and isinstance(sc, dict):
-                    inv_data["lines"] = sc.get("lines", [])
-            try:
-                inv = models.Invoice.model_validate(inv_data)
+            inv = _map_invoice_transaction(e)
+            if inv is not None:
                 result.append(inv)
-            except Exception:
-                continue
     # Sort by id descending to mimic DB ordering
     result.sort(key=lambda x: x.id or 0, reverse=True)
     return result
 
 
+def page_invoices(
+    limit: Optional[int] = None,
+    after: Optional[int] = None,
+    with_lines: bool = True,
+    view: bool = False,
+    snap: Optional[snapshot.LedgerSnapshot] = None,
+) -> tuple[List[models.Invoice], bool]:
+    """Return up to ``limit`` invoices with id < ``after`` (descending, like list_invoices).
+
+    Invoices past the page boundary are not hydrated, and with
+    ``with_lines=False`` no sidecar is read. Each invoice id is listed once.
+    """
+    txs = _invoice_transactions(snap)
+    return _page(
+        sorted(txs, reverse=True), after, True, limit, lambda i: _map_invoice_transaction(txs[i], with_lines, view)
+    )
+
+
+def iter_invoices(with_lines: bool = True, view: bool = False) -> Iterator[models.Invoice]:
+    """Yield invoices newest id first, reading each sidecar only when the invoice is consumed.
+
+    Unlike list_invoices each invoice id is yielded once (first transaction
+    wins) and memory use does not grow with the number of invoices. With
+    ``view=True`` read-only views.InvoiceView objects are yielded instead.
+    """
+    txs = _invoice_transactions()
+    return _iter_mapped(sorted(txs, reverse=True), lambda i: _map_invoice_transaction(txs[i], with_lines, view))
+
+
+def get_invoices(invoice_ids: Iterable[int]) -> dict[int, models.Invoice]:
+    """Resolve several invoices against one ledger snapshot.
+
+    Only the requested invoices are hydrated (their sidecars read); ids that
+    do not exist are absent from the returned mapping.
+    """
+    txs = _invoice_transactions()
+    res: dict[int, models.Invoice] = {}
+    for inv_id in invoice_ids:
+        e = txs.get(inv_id)
+        if e is None or inv_id in res:
+            continue
+        inv = _map_invoice_transaction(e)
+        if inv is not None:
+            res[inv_id] = inv
+    return res
+
+
 def get_invoice(invoice_id: int) -> Optional[models.Invoice]:
-    for inv in list_invoices():
-        if inv.id == invoice_id:
-            return inv
-    return None
+    return get_invoices([invoice_id]).get(invoice_id)
 
 
 def format_invoice_number(invoice_id: int) -> str:
@@ -1,23 +1,22 @@
 """Beancount write helpers: compose snippets, validate them, and append atomically.
 
 This module provides create_* functions used by the CLI to persist entities to
-beancount include files using the temp-file -> validate -> append pattern.
+beancount include files using the compose -> validate -> append pattern.
 
 Notes:
 - Single-user assumptions: no file locking is implemented.
-- Validation is snippet-only by default (parser.parse_string). Use
-  `ledger validate` for full-ledger validation.
+- Snippets are parsed on their own and checked against the ledger's write
+  index (ids in use, opened accounts; see beancount_store.write_index), not
+  against a full load. Use `arledge validate` for full-ledger validation.
 """
 from __future__ import annotations
 from pathlib import Path
-import tempfile
 import uuid
 import os
-import json
 from datetime import date, datetime
-from typing import Optional, List
+from typing import Optional, List, Union
 
-from . import config, models, beancount_store
+from . import config, models, beancount_store, sidecar, snapshot
 
 
 def _write_and_fsync(f, data: str):
@@ -30,61 +29,78 @@ def _atomic_append(target: Path, snippet: str) -> None:
     # Append snippet to target with a single append+fsync. Target must exist.
     # Ensure newline separation
     mode = "a"
+    text = snippet + "\n"
     with open(target, mode, encoding="utf-8") as f:
         if f.tell() != 0:
             # ensure previous file ends with newline
             f.seek(0, os.SEEK_END)
-            f.write("\n")
-        _write_and_fsync(f, snippet + "\n")
+            text = "\n" + text
+        _write_and_fsync(f, text)
+    # Keep a resident snapshot (MCP server / daemon) current without a re-parse
+    snapshot.note_dir(target.parent)
+    snapshot.note_append(target, text, len(text.encode("utf-8")))
 
 
-def _validate_snippet(snippet: str) -> List[str]:
-    # Use beancount.parser.parser.parse_string for snippet-only validation
-    from beancount.parser import parser
+def _validate_snippet(snippet: str, index: Optional[dict] = None, update: bool = False) -> List[str]:
+    """Return the errors of ``snippet``: syntax errors, else referential ones.
 
-    res = parser.parse_string(snippet)
-    # parser may return (entries, errors, ...) across versions
-    errors = res[1] if len(res) > 1 else []
-    return list(errors)
+    With ``index`` (see beancount_store.write_index) the parsed entries are
+    also checked against the ledger: custom entries must not reuse an id
+    (``update``: must name an existing one), an invoice must use a new id and
+    an existing customer and, once the ledger opens any account, postings
+    must use accounts open on their date.
+    """
+    from . import scanner
+
+    entries, errors, _ = scanner.parse_string(snippet, "<snippet>")
+    if errors or index is None:
+        return list(errors)
+    return _reference_errors(entries, index, update)
+
+
+def _reference_errors(entries: List[object], index: dict, update: bool) -> List[str]:
+    from .beancount_spike import coerce_int
+
+    errs: List[str] = []
+    for e in entries:
+        meta = e.meta or {}
+        name = e.__class__.__name__
+        if name == "Custom" and e.type in _ID_FIELDS:
+            field = _ID_FIELDS[e.type]
+            ident = coerce_int(meta.get(field))
+            if update and ident not in index[e.type]:
+                errs.append(f"unknown {e.type} {field} {ident}")
+            elif not update and ident in index[e.type]:
+                errs.append(f"duplicate {e.type} {field} {ident}")
+        elif name == "Transaction":
+            inv_id = coerce_int(meta.get("invoice_id"))
+            if inv_id is not None and inv_id in index["invoice"]:
+                errs.append(f"duplicate invoice invoice_id {inv_id}")
+            customer = coerce_int(meta.get("customer_id"))
+            if "customer_id" in meta and customer not in index["customer"]:
+                errs.append(f"unknown customer customer_id {customer}")
+            # ledgers that never open accounts accept any account (as before)
+            if index["opens"]:
+                for p in e.postings:
+                    opened = index["opens"].get(p.account)
+                    closed = index["closes"].get(p.account)
+                    if opened is None:
+                        errs.append(f"unknown account {p.account}")
+                    elif e.date < opened or (closed is not None and e.date > closed):
+                        errs.append(f"inactive account {p.account} on {e.date}")
+    return errs
 
 
-def _temp_validate_snippet(snippet: str, dirpath: Path) -> List[str]:
-    # Write snippet to a temp file on same filesystem (dirpath) and validate
-    fname = dirpath / f".tmp-{uuid.uuid4().hex}.beancount"
-    with open(fname, "w", encoding="utf-8") as f:
-        _write_and_fsync(f, snippet)
-    try:
-        errs = _validate_snippet(snippet)
-        return errs
-    finally:
-        try:
-            fname.unlink()
-        except Exception:
-            pass
+# ID allocation helpers
 
+_ID_FIELDS = {"customer": "customer_id", "creditor": "creditor_id", "payment_account": "account_id"}
 
-# ID allocation helpers
 
-def _next_custom_id_for(kind: str, id_field: str) -> int:
-    # Use beancount_store listing to find current max id and increment
-    if kind == "customer":
-        items = beancount_store.list_customers()
-    elif kind == "creditor":
-        items = beancount_store.list_creditors()
-    elif kind == "payment_account":
-        items = beancount_store.list_payment_accounts()
-    else:
-        items = []
-    max_id = 0
-    for it in items:
-        if getattr(it, "id", None) is not None:
-            try:
-                v = int(it.id)
-                if v > max_id:
-                    max_id = v
-            except Exception:
-                continue
-    return max_id + 1
+def _next_custom_id_for(kind: str, id_field: str, index: Optional[dict] = None) -> int:
+    # One past the largest id in use, including entries that no longer map to a model
+    if index is None:
+        index = beancount_store.write_index()
+    return max(index.get(kind, ()), default=0) + 1
 
 
 # Invoice seq
@@ -111,32 +127,36 @@ def allocate_invoice_id() -> int:
     write-to-temp + os.replace. If the seq file is missing or corrupt, recover
     by scanning existing invoices for the max id.
     """
+    return allocate_invoice_ids(1)[0]
+
+
+def allocate_invoice_ids(count: int, index: Optional[dict] = None) -> List[int]:
+    """Allocate ``count`` consecutive invoice ids with a single sequence update.
+
+    ``index`` (see beancount_store.write_index) is only needed, and only
+    loaded, to recover a missing or corrupt sequence file.
+    """
     seq = _invoice_seq_path()
-    # Determine recovery max id
-    invs = beancount_store.list_invoices()
-    max_id = 0
-    for inv in invs:
-        try:
-            if inv.id and int(inv.id) > max_id:
-                max_id = int(inv.id)
-        except Exception:
-            continue
+
+    def recovered() -> int:
+        ids = (index or beancount_store.write_index())["invoice"]
+        return max(ids, default=0) + 1
 
     if not seq.exists():
-        next_val = max_id + 1
+        next_val = recovered()
     else:
         try:
             next_val = int(seq.read_text(encoding="utf-8").strip())
         except Exception:
             # corrupt: recover from invoices
-            next_val = max_id + 1
-    # allocate current and persist next
-    cur = next_val
+            next_val = recovered()
+    # allocate current range and persist next
+    cur = list(range(next_val, next_val + count))
     try:
-        _atomic_write(seq, f"{next_val+1}\n")
+        _atomic_write(seq, f"{next_val+count}\n")
     except Exception:
         # Best-effort fallback: non-atomic write
-        seq.write_text(f"{next_val+1}\n", encoding="utf-8")
+        seq.write_text(f"{next_val+count}\n", encoding="utf-8")
     return cur
 
 
@@ -147,33 +167,41 @@ def _next_invoice_id() -> int:
 
 # Create functions
 
-def create_customer(c: models.Customer) -> models.Customer:
-    base = config.get_basedir()
-    includes = base / "includes"
-    includes.mkdir(parents=True, exist_ok=True)
-    # Ensure top-level ledger.beancount includes the includes/ files so loader can resolve
+def _ensure_ledger_file(base: Path) -> None:
     ledger_file = base / "ledger.beancount"
     if not ledger_file.exists():
         ledger_file.write_text(
             '; Top-level ledger file generated by beancount_write\ninclude "includes/customers.beancount"\ninclude "includes/creditors.beancount"\ninclude "includes/payment_accounts.beancount"\ninclude "includes/invoices/*.beancount"\n',
             encoding="utf-8",
         )
-    target = includes / "customers.beancount"
-    # allocate id if missing
-    if c.id is None:
-        c.id = _next_custom_id_for("customer", "customer_id")
-    # Compose snippet
-    today = date.today().isoformat()
-    lines = [f"{today} custom \"customer\" \"{c.name}\""]
+
+
+def _customer_snippet(c: models.Customer, created: Optional[date] = None) -> str:
+    day = (created or date.today()).isoformat()
+    lines = [f"{day} custom \"customer\" \"{c.name}\""]
     if c.id is not None:
         lines.append(f"  customer_id: {c.id}")
     if c.email:
         lines.append(f"  email: \"{c.email}\"")
     if c.address:
         lines.append(f"  address: \"{c.address}\"")
-    snippet = "\n".join(lines) + "\n"
-    # Validate snippet via temp file in includes dir
-    errs = _temp_validate_snippet(snippet, includes)
+    return "\n".join(lines) + "\n"
+
+
+def create_customer(c: models.Customer) -> models.Customer:
+    base = config.get_basedir()
+    includes = base / "includes"
+    includes.mkdir(parents=True, exist_ok=True)
+    # Ensure top-level ledger.beancount includes the includes/ files so loader can resolve
+    _ensure_ledger_file(base)
+    target = includes / "customers.beancount"
+    index = beancount_store.write_index()
+    # allocate id if missing
+    if c.id is None:
+        c.id = _next_custom_id_for("customer", "customer_id", index)
+    snippet = _customer_snippet(c)
+    # Validate snippet against the ledger's ids (no full load)
+    errs = _validate_snippet(snippet, index)
     if errs:
         raise ValueError(f"Snippet validation failed: {errs}")
     # Append
@@ -193,22 +221,10 @@ def update_customer(c: models.Customer) -> models.Customer:
     base = config.get_basedir()
     includes = base / "includes"
     includes.mkdir(parents=True, exist_ok=True)
-    ledger_file = base / "ledger.beancount"
-    if not ledger_file.exists():
-        ledger_file.write_text(
-            '; Top-level ledger file generated by beancount_write\ninclude "includes/customers.beancount"\ninclude "includes/creditors.beancount"\ninclude "includes/payment_accounts.beancount"\ninclude "includes/invoices/*.beancount"\n',
-            encoding="utf-8",
-        )
+    _ensure_ledger_file(base)
     target = includes / "customers.beancount"
-    today = date.today().isoformat()
-    lines = [f"{today} custom \"customer\" \"{c.name}\""]
-    lines.append(f"  customer_id: {c.id}")
-    if c.email:
-        lines.append(f"  email: \"{c.email}\"")
-    if c.address:
-        lines.append(f"  address: \"{c.address}\"")
-    snippet = "\n".join(lines) + "\n"
-    errs = _temp_validate_snippet(snippet, includes)
+    snippet = _customer_snippet(c)
+    errs = _validate_snippet(snippet, beancount_store.write_index(), update=True)
     if errs:
         raise ValueError(f"Snippet validation failed: {errs}")
     if not target.exists():
@@ -217,29 +233,28 @@ def update_customer(c: models.Customer) -> models.Customer:
     return c
 
 
+def _creditor_snippet(cred: models.Creditor) -> str:
+    lines = [f"{date.today().isoformat()} custom \"creditor\" \"{cred.name}\""]
+    if cred.id is not None:
+        lines.append(f"  creditor_id: {cred.id}")
+    for field in ("email", "address", "phone", "tax_id", "payment_instructions", "default_currency"):
+        value = getattr(cred, field)
+        if value:
+            lines.append(f"  {field}: \"{value}\"")
+    return "\n".join(lines) + "\n"
+
+
 def create_creditor(cred: models.Creditor) -> models.Creditor:
     base = config.get_basedir()
     includes = base / "includes"
     includes.mkdir(parents=True, exist_ok=True)
-    ledger_file = base / "ledger.beancount"
-    if not ledger_file.exists():
-        ledger_file.write_text(
-            '; Top-level ledger file generated by beancount_write\ninclude "includes/customers.beancount"\ninclude "includes/creditors.beancount"\ninclude "includes/payment_accounts.beancount"\ninclude "includes/invoices/*.beancount"\n',
-            encoding="utf-8",
-        )
+    _ensure_ledger_file(base)
     target = includes / "creditors.beancount"
+    index = beancount_store.write_index()
     if cred.id is None:
-        cred.id = _next_custom_id_for("creditor", "creditor_id")
-    today = date.today().isoformat()
-    lines = [f"{today} custom \"creditor\" \"{cred.name}\""]
-    if cred.id is not None:
-        lines.append(f"  creditor_id: {cred.id}")
-    if cred.email:
-        lines.append(f"  email: \"{cred.email}\"")
-    if cred.address:
-        lines.append(f"  address: \"{cred.address}\"")
-    snippet = "\n".join(lines) + "\n"
-    errs = _temp_validate_snippet(snippet, includes)
+        cred.id = _next_custom_id_for("creditor", "creditor_id", index)
+    snippet = _creditor_snippet(cred)
+    errs = _validate_snippet(snippet, index)
     if errs:
         raise ValueError(f"Snippet validation failed: {errs}")
     if not target.exists():
@@ -262,30 +277,10 @@ def update_creditor(cred: models.Creditor) -> models.Creditor:
     base = config.get_basedir()
     includes = base / "includes"
     includes.mkdir(parents=True, exist_ok=True)
-    ledger_file = base / "ledger.beancount"
-    if not ledger_file.exists():
-        ledger_file.write_text(
-            '; Top-level ledger file generated by beancount_write\ninclude "includes/customers.beancount"\ninclude "includes/creditors.beancount"\ninclude "includes/payment_accounts.beancount"\ninclude "includes/invoices/*.beancount"\n',
-            encoding="utf-8",
-        )
+    _ensure_ledger_file(base)
     target = includes / "creditors.beancount"
-    today = date.today().isoformat()
-    lines = [f"{today} custom \"creditor\" \"{cred.name}\""]
-    lines.append(f"  creditor_id: {cred.id}")
-    if cred.email:
-        lines.append(f"  email: \"{cred.email}\"")
-    if cred.address:
-        lines.append(f"  address: \"{cred.address}\"")
-    if getattr(cred, 'phone', None):
-        lines.append(f"  phone: \"{cred.phone}\"")
-    if getattr(cred, 'tax_id', None):
-        lines.append(f"  tax_id: \"{cred.tax_id}\"")
-    if getattr(cred, 'payment_instructions', None):
-        lines.append(f"  payment_instructions: \"{cred.payment_instructions}\"")
-    if getattr(cred, 'default_currency', None):
-        lines.append(f"  default_currency: \"{cred.default_currency}\"")
-    snippet = "\n".join(lines) + "\n"
-    errs = _temp_validate_snippet(snippet, includes)
+    snippet = _creditor_snippet(cred)
+    errs = _validate_snippet(snippet, beancount_store.write_index(), update=True)
     if errs:
         raise ValueError(f"Snippet validation failed: {errs}")
     if not target.exists():
@@ -298,16 +293,12 @@ def create_payment_account(pa: models.PaymentAccount) -> models.PaymentAccount:
     base = config.get_basedir()
     includes = base / "includes"
     includes.mkdir(parents=True, exist_ok=True)
-    ledger_file = base / "ledger.beancount"
-    if not ledger_file.exists():
-        ledger_file.write_text(
-            '; Top-level ledger file generated by beancount_write\ninclude "includes/customers.beancount"\ninclude "includes/creditors.beancount"\ninclude "includes/payment_accounts.beancount"\ninclude "includes/invoices/*.beancount"\n',
-            encoding="utf-8",
-        )
+    _ensure_ledger_file(base)
     target = includes / "payment_accounts.beancount"
+    index = beancount_store.write_index()
     if pa.id is None:
         # payment accounts reuse global id space via listing
-        pa.id = _next_custom_id_for("payment_account", "account_id")
+        pa.id = _next_custom_id_for("payment_account", "account_id", index)
     today = date.today().isoformat()
     lines = [f"{today} custom \"payment_account\" \"{pa.label or pa.identifier or pa.type}\""]
     if pa.id is not None:
@@ -327,7 +318,7 @@ def create_payment_account(pa: models.PaymentAccount) -> models.PaymentAccount:
     if pa.is_default:
         lines.append(f"  is_default: \"true\"")
     snippet = "\n".join(lines) + "\n"
-    errs = _temp_validate_snippet(snippet, includes)
+    errs = _validate_snippet(snippet, index)
     if errs:
         raise ValueError(f"Snippet validation failed: {errs}")
     if not target.exists():
@@ -336,34 +327,17 @@ def create_payment_account(pa: models.PaymentAccount) -> models.PaymentAccount:
     return pa
 
 
-def create_invoice(inv: models.Invoice) -> models.Invoice:
-    base = config.get_basedir()
-    includes = base / "includes"
-    invoices_dir = includes / "invoices"
-    invoices_data = invoices_dir / "data"
-    invoices_dir.mkdir(parents=True, exist_ok=True)
-    invoices_data.mkdir(parents=True, exist_ok=True)
-    ledger_file = base / "ledger.beancount"
-    if not ledger_file.exists():
-        ledger_file.write_text(
-            '; Top-level ledger file generated by beancount_write\ninclude "includes/customers.beancount"\ninclude "includes/creditors.beancount"\ninclude "includes/payment_accounts.beancount"\ninclude "includes/invoices/*.beancount"\n',
-            encoding="utf-8",
-        )
-    # allocate invoice id
-    if inv.id is None:
-        inv.id = allocate_invoice_id()
-    # write sidecar first
-    sidecar_name = f"inv-{inv.id:04d}.json"
-    sidecar_path = invoices_data / sidecar_name
-    # dump invoice lines to sidecar
-    with open(sidecar_path, "w", encoding="utf-8") as f:
-        json.dump(config.dump_model(inv), f, indent=2, ensure_ascii=False)
-        f.flush()
-        os.fsync(f.fileno())
-    # compose transaction snippet
+def _invoice_snippet(inv: models.Invoice, sidecar_name: str, checksum: Optional[str] = None) -> tuple[str, str]:
+    """Return ``(created_date, snippet)`` for an invoice transaction.
+
+    ``checksum`` (see sidecar.checksum) is recorded as ``invoice_checksum`` so
+    readers can trust the sidecar without re-validating it.
+    """
     created = (inv.created_at or datetime.now()).date().isoformat()
     title = inv.description or f"Invoice INV-{inv.id:04d}"
     lines = [f"{created} * \"{title}\"", f"  invoice_id: {inv.id}", f"  customer_id: {inv.customer_id}", f"  invoice_data: \"includes/invoices/data/{sidecar_name}\""]
+    if checksum:
+        lines.append(f"  invoice_checksum: \"{checksum}\"")
     # postings: use totals from model
     # For simplicity, write a single receivable posting and one income posting + VAT if present
     # Use inv.total and distribution
@@ -376,16 +350,34 @@ def create_invoice(inv: models.Invoice) -> models.Invoice:
     lines.append(f"  Income:Services              -{subtotal} {currency}")
     if vat and vat != 0:
         lines.append(f"  Liabilities:VAT               -{vat} {currency}")
-    snippet = "\n".join(lines) + "\n"
-    # validate snippet
-    errs = _temp_validate_snippet(snippet, invoices_dir)
+    return created, "\n".join(lines) + "\n"
+
+
+def create_invoice(inv: models.Invoice) -> models.Invoice:
+    base = config.get_basedir()
+    includes = base / "includes"
+    invoices_dir = includes / "invoices"
+    invoices_data = invoices_dir / "data"
+    invoices_dir.mkdir(parents=True, exist_ok=True)
+    invoices_data.mkdir(parents=True, exist_ok=True)
+    _ensure_ledger_file(base)
+    index = beancount_store.write_index()
+    # allocate invoice id
+    if inv.id is None:
+        inv.id = allocate_invoice_ids(1, index)[0]
+    sidecar_name = f"inv-{inv.id:04d}.json"
+    sidecar_path = invoices_data / sidecar_name
+    # dump invoice lines to sidecar using the configured codec
+    side_data = config.dump_model(inv)
+    digest = sidecar.checksum(side_data)
+    # compose and validate the transaction snippet before writing anything
+    created, snippet = _invoice_snippet(inv, sidecar_name, digest)
+    errs = _validate_snippet(snippet, index)
     if errs:
-        # remove sidecar if validation fails to avoid orphan
-        try:
-            sidecar_path.unlink()
-        except Exception:
-            pass
         raise ValueError(f"Invoice snippet validation failed: {errs}")
+    # write sidecar first, so the transaction never refers to a missing file
+    sidecar.write(sidecar_path, side_data)
+    snapshot.note_sidecar(sidecar_path, (side_data, digest))
     # append to per-month file
     month_file = invoices_dir / f"{created[:4]}-{created[5:7]}.beancount"
     if not month_file.exists():
@@ -410,11 +402,115 @@ def update_invoice(inv: models.Invoice) -> models.Invoice:
         raise ValueError("Invoice sidecar not found for invoice id")
     # Ensure directory exists
     side_path.parent.mkdir(parents=True, exist_ok=True)
-    # Atomic write new sidecar
-    tmp = side_path.parent / f".{side_path.name}.tmp-{uuid.uuid4().hex}"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(config.dump_model(inv), f, indent=2, ensure_ascii=False)
-        f.flush()
-        os.fsync(f.fileno())
-    os.replace(tmp, side_path)
+    # Atomic write new sidecar (temp file + os.replace), using the configured codec
+    side_data = config.dump_model(inv)
+    sidecar.write(side_path, side_data)
+    # the transaction keeps the original invoice_checksum, so readers fall
+    # back to full validation for this sidecar from now on
+    snapshot.note_sidecar(side_path, (side_data, sidecar.checksum(side_data)))
     return inv
+
+
+# Bulk create functions
+#
+# Each item is composed and validated on its own; items that fail are
+# returned as the exception (and not written), the rest are committed with a
+# single append per target file. Snippets are checked against a copy of the
+# write index that also holds the ids accepted earlier in the batch.
+
+
+def create_customers(customers: List[models.Customer]) -> List[Union[models.Customer, Exception]]:
+    """Create several customers with one id scan and one append."""
+    base = config.get_basedir()
+    includes = base / "includes"
+    includes.mkdir(parents=True, exist_ok=True)
+    _ensure_ledger_file(base)
+    target = includes / "customers.beancount"
+    index = beancount_store.copy_write_index(beancount_store.write_index())
+    next_id = _next_custom_id_for("customer", "customer_id", index)
+    results: List[Union[models.Customer, Exception]] = []
+    snippets: List[str] = []
+    for c in customers:
+        allocated = c.id is None
+        if allocated:
+            c.id = next_id
+        snippet = _customer_snippet(c)
+        errs = _validate_snippet(snippet, index)
+        if errs:
+            if allocated:
+                c.id = None
+            results.append(ValueError(f"Snippet validation failed: {errs}"))
+            continue
+        index["customer"].add(c.id)
+        next_id = max(next_id, c.id + 1)
+        snippets.append(snippet)
+        results.append(c)
+    if snippets:
+        if not target.exists():
+            target.write_text("", encoding="utf-8")
+        _atomic_append(target, "\n".join(snippets))
+    return results
+
+
+def create_invoices(invoices: List[models.Invoice]) -> List[Union[models.Invoice, Exception]]:
+    """Create several invoices with one sequence update and one append per month file.
+
+    Sidecars are written before the appends. When a month's append fails,
+    each invoice of that month is returned as the error and its sidecar is
+    removed again.
+    """
+    base = config.get_basedir()
+    invoices_dir = base / "includes" / "invoices"
+    invoices_data = invoices_dir / "data"
+    invoices_dir.mkdir(parents=True, exist_ok=True)
+    invoices_data.mkdir(parents=True, exist_ok=True)
+    _ensure_ledger_file(base)
+    index = beancount_store.copy_write_index(beancount_store.write_index())
+    ids = iter(allocate_invoice_ids(sum(1 for inv in invoices if inv.id is None), index))
+    results: List[Union[models.Invoice, Exception]] = []
+    # month -> [(result position, sidecar path, (data, digest), snippet)]
+    by_month: dict[str, List[tuple]] = {}
+    for inv in invoices:
+        if inv.id is None:
+            inv.id = next(ids)
+        sidecar_name = f"inv-{inv.id:04d}.json"
+        sidecar_path = invoices_data / sidecar_name
+        try:
+            side_data = config.dump_model(inv)
+            digest = sidecar.checksum(side_data)
+            created, snippet = _invoice_snippet(inv, sidecar_name, digest)
+            errs = _validate_snippet(snippet, index)
+            if errs:
+                raise ValueError(f"Invoice snippet validation failed: {errs}")
+        except Exception as e:
+            results.append(e)
+            continue
+        try:
+            # temp file + replace: a failed write leaves no partial sidecar
+            sidecar.write(sidecar_path, side_data)
+        except Exception as e:
+            results.append(e)
+            continue
+        # the local index copy only reserves the id within this batch
+        index["invoice"].add(inv.id)
+        pending = (len(results), sidecar_path, (side_data, digest), snippet)
+        by_month.setdefault(f"{created[:4]}-{created[5:7]}", []).append(pending)
+        results.append(inv)
+    for month, pending in sorted(by_month.items()):
+        month_file = invoices_dir / f"{month}.beancount"
+        try:
+            if not month_file.exists():
+                month_file.write_text("", encoding="utf-8")
+            _atomic_append(month_file, "\n".join(p[3] for p in pending))
+        except Exception as e:
+            # no transaction refers to these sidecars; remove what this call wrote
+            for pos, path, _, _ in pending:
+                results[pos] = e
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            continue
+        for _, path, verified, _ in pending:
+            snapshot.note_sidecar(path, verified)
+    return results
@@ -0,0 +1,300 @@
+"""Benchmark harness for the CLI and MCP hot paths (`arledge bench`).
+
+For each size a ledger is generated with arledge.generate, then every
+operation is timed in two modes:
+
+- ``cli``: the click command run in-process with the snapshot cache off, as
+  one ``arledge`` invocation does after interpreter start-up (every call
+  loads the ledger).
+- ``mcp``: the tool called on a resident MCP server (snapshot cache on).
+
+The first call of each measurement is reported on its own
+(``first_call_ms``: lazy imports, and for mcp the initial ledger load);
+the percentiles cover the ``repeat`` calls after it.
+
+Each (size, mode, operation) runs in its own Python process, so its peak RSS
+is its own. Operations: ``customer_list``, ``invoice_list``,
+``invoice_view``, ``export_invoice_json``, ``validate`` and
+``validate_incremental`` (cli only), ``allocate_invoice_id`` (cli only) and
+``invoice_create``. Writes run last, so reads see the generated ledger; each
+write adds ``repeat + 1`` ids or invoices. ``validate`` removes
+``.arledge/validate-state`` before every call (untimed), so each call checks
+the whole ledger; ``validate_incremental`` keeps it, so the calls after the
+first only re-check files whose digest changed.
+
+The report is one JSON object: run metadata (commit, Python, beancount,
+CPUs, load profile), the parameters, per-size generation times and one
+result per measurement with latency percentiles, throughput and peak RSS.
+``compare`` matches a report against an earlier one.
+"""
+from __future__ import annotations
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+REPORT_VERSION = 1
+
+MODES = ("cli", "mcp")
+READ_OPS = ("customer_list", "invoice_list", "invoice_view", "export_invoice_json", "validate", "validate_incremental")
+WRITE_OPS = ("allocate_invoice_id", "invoice_create")
+OPS = READ_OPS + WRITE_OPS
+# operations without an MCP tool
+_CLI_ONLY = ("validate", "validate_incremental", "allocate_invoice_id")
+
+# fixed, so reports made on different days use identical ledgers
+_END_MONTH = "2026-10"
+
+_NEW_INVOICE = {"customer_id": 1, "lines": [{"description": "Benchmark", "quantity": "2", "unit_price": "100.00", "vat_rate": "25"}]}
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(times: list[float]) -> dict:
+    """Latency percentiles (ms) and throughput (ops/s) of per-call wall times (s)."""
+    s = sorted(times)
+    total = sum(s)
+
+    def ms(v: float) -> float:
+        return round(v * 1000, 3)
+
+    return {
+        "n": len(s),
+        "min_ms": ms(s[0]),
+        "p50_ms": ms(percentile(s, 50)),
+        "p90_ms": ms(percentile(s, 90)),
+        "p99_ms": ms(percentile(s, 99)),
+        "max_ms": ms(s[-1]),
+        "mean_ms": ms(total / len(s)),
+        "ops_per_s": round(len(s) / total, 2) if total else None,
+    }
+
+
+def run(
+    sizes: list[int],
+    modes: tuple[str, ...] = MODES,
+    ops: tuple[str, ...] = OPS,
+    repeat: int = 5,
+    customers_per_invoice: float = 0.2,
+    lines_per_invoice: int = 3,
+    months: int = 12,
+    seed: int = 0,
+    workdir: Optional[Path] = None,
+    progress=None,
+) -> dict:
+    """Generate a ledger per size, time ``ops`` in ``modes`` and return the report.
+
+    ``workdir`` receives the generated ledgers (one directory per size,
+    replaced on every run); a temporary directory is used and removed
+    otherwise. ``progress(result)`` is called after each measurement.
+    """
+    from . import generate
+
+    params = {
+        "sizes": list(sizes),
+        "modes": list(modes),
+        "ops": list(ops),
+        "repeat": repeat,
+        "customers_per_invoice": customers_per_invoice,
+        "lines_per_invoice": lines_per_invoice,
+        "months": months,
+        "seed": seed,
+    }
+    report = {"version": REPORT_VERSION, "meta": _meta(), "params": params, "ledgers": [], "results": []}
+    cleanup = workdir is None
+    root = Path(tempfile.mkdtemp(prefix="arledge-bench-")) if cleanup else workdir
+    try:
+        for size in sizes:
+            base = root / f"invoices-{size}"
+            if base.exists():
+                shutil.rmtree(base)
+            base.mkdir(parents=True)
+            customers = max(1, int(size * customers_per_invoice))
+            stats = generate.generate(base, customers, size, lines_per_invoice, months, seed, end_month=_END_MONTH)
+            report["ledgers"].append(
+                {"invoices": size, "customers": customers, "lines": stats["lines"], "generate_seconds": stats["seconds"]["total"]}
+            )
+            # reads first, so every read sees the generated ledger
+            for op in [o for o in OPS if o in ops]:
+                for mode in modes:
+                    if mode == "mcp" and op in _CLI_ONLY:
+                        continue
+                    spec = {"base": str(base), "mode": mode, "op": op, "repeat": repeat, "seed": seed, "invoices": size}
+                    result = {"invoices": size, "customers": customers, "mode": mode, "op": op, **_spawn(spec)}
+                    report["results"].append(result)
+                    if progress is not None:
+                        progress(result)
+    finally:
+        if cleanup:
+            shutil.rmtree(root, ignore_errors=True)
+    return report
+
+
+def _meta() -> dict:
+    from importlib.metadata import version
+
+    from . import loading
+
+    commit = None
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+        if out.returncode == 0:
+            commit = out.stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        pass
+    return {
+        "commit": commit,
+        "started_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "beancount": version("beancount"),
+        "load_profile": loading.current_profile(),
+    }
+
+
+def _spawn(spec: dict) -> dict:
+    env = {**os.environ, "ARLEDGE_BASEDIR": spec["base"], "ARLEDGE_NO_DAEMON": "1", "BEANCOUNT_DISABLE_LOAD_CACHE": "1"}
+    code = "import sys; from arledge import bench; bench.worker(sys.argv[1])"
+    proc = subprocess.run([sys.executable, "-c", code, json.dumps(spec)], capture_output=True, text=True, env=env)
+    if proc.returncode != 0:
+        raise RuntimeError(f"benchmark {spec['mode']}/{spec['op']} failed: {proc.stderr.strip()}")
+    return json.loads(proc.stdout.splitlines()[-1])
+
+
+def worker(spec_json: str) -> None:
+    """Time one (mode, operation) on the ledger in ARLEDGE_BASEDIR and print the result as JSON."""
+    import resource
+
+    spec = json.loads(spec_json)
+    call, before = _operation(spec)
+    setup_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # the first call pays for lazy imports (and, for mcp, the initial load)
+    before()
+    t = time.perf_counter()
+    call(spec["repeat"])
+    first = time.perf_counter() - t
+    times = []
+    for i in range(spec["repeat"]):
+        before()
+        t = time.perf_counter()
+        call(i)
+        times.append(time.perf_counter() - t)
+    out = summarize(times)
+    out["first_call_ms"] = round(first * 1000, 3)
+    # ru_maxrss is in KiB on Linux
+    out["setup_rss_kb"] = setup_rss
+    out["peak_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    sys.stdout.write(json.dumps(out) + "\n")
+
+
+def _operation(spec: dict):
+    """Return ``(call, before)`` for the spec, with the mode set up.
+
+    ``call(i)`` is timed, ``i`` runs up to ``repeat``; ``before()`` runs
+    untimed ahead of every call.
+    """
+    base = Path(spec["base"])
+    rng = random.Random(spec["seed"])
+    view_ids = [rng.randint(1, spec["invoices"]) for _ in range(spec["repeat"] + 1)]
+    export_dir = base / "exports"
+    export_dir.mkdir(exist_ok=True)
+    op = spec["op"]
+    if spec["mode"] == "cli":
+        from click.testing import CliRunner
+
+        from .cli import cli
+
+        runner = CliRunner()
+        args = {
+            "customer_list": lambda i: ["customer", "list"],
+            "invoice_list": lambda i: ["invoice", "list"],
+            "invoice_view": lambda i: ["invoice", "view", str(view_ids[i])],
+            "export_invoice_json": lambda i: ["invoice", "export", str(view_ids[i]), "--path", str(export_dir / f"{i}.json")],
+            "validate": lambda i: ["validate"],
+            "validate_incremental": lambda i: ["validate"],
+            "allocate_invoice_id": lambda i: ["invoice", "allocate"],
+            "invoice_create": lambda i: ["invoice", "create", "--model", json.dumps(_NEW_INVOICE)],
+        }[op]
+
+        def call(i):
+            r = runner.invoke(cli, args(i))
+            if r.exit_code != 0:
+                raise RuntimeError(f"{' '.join(args(i))} exited {r.exit_code}: {r.stderr}")
+
+        if op == "validate":
+            from . import validation
+
+            state = validation.state_path(base)
+            return call, lambda: state.unlink(missing_ok=True)
+        return call, _nothing
+
+    import asyncio
+
+    from . import mcp_server, snapshot
+
+    snapshot.enable()
+    server = mcp_server.create_mcp_server("Benchmark")
+    tool, args = {
+        "customer_list": ("customer_list", lambda i: {}),
+        "invoice_list": ("invoice_list", lambda i: {}),
+        "invoice_view": ("invoice_view", lambda i: {"invoice_id": view_ids[i]}),
+        "export_invoice_json": ("invoice_export", lambda i: {"invoice_id": view_ids[i], "path": str(export_dir / f"{i}.json")}),
+        "invoice_create": ("invoice_create", lambda i: {"model": _NEW_INVOICE}),
+    }[op]
+
+    def call(i):
+        asyncio.run(server.call_tool(tool, args(i)))
+
+    return call, _nothing
+
+
+def _nothing() -> None:
+    pass
+
+
+def compare(report: dict, baseline: dict) -> list[dict]:
+    """Pair results with ``baseline`` by (invoices, mode, op); ratios are new/old."""
+    old = {(r["invoices"], r["mode"], r["op"]): r for r in baseline.get("results", [])}
+    rows = []
+    for r in report["results"]:
+        b = old.get((r["invoices"], r["mode"], r["op"]))
+        if b is None:
+            continue
+        rows.append(
+            {
+                "invoices": r["invoices"],
+                "mode": r["mode"],
+                "op": r["op"],
+                "p50_ms": r["p50_ms"],
+                "baseline_p50_ms": b["p50_ms"],
+                "p50_ratio": round(r["p50_ms"] / b["p50_ms"], 3) if b["p50_ms"] else None,
+                "peak_rss_ratio": round(r["peak_rss_kb"] / b["peak_rss_kb"], 3) if b["peak_rss_kb"] else None,
+            }
+        )
+    return rows
+
+
+def format_result(r: dict) -> str:
+    return (
+        f"{r['invoices']:>9} {r['mode']:<4} {r['op']:<20} p50 {r['p50_ms']:>10.2f} ms  p90 {r['p90_ms']:>10.2f} ms  "
+        f"{r['ops_per_s'] or 0:>9.2f} ops/s  peak {r['peak_rss_kb'] / 1024:>7.1f} MiB"
+    )
@@ -1,11 +1,20 @@
 import click
 import json
 import sys
-from . import models, config, beancount_store
+from . import config, schemas
 
 
 @click.group()
-def cli():
+@click.option("--timings", is_flag=True, default=False, help="Print a JSON tree of per-phase timings to stderr")
+@click.option(
+    "--profile",
+    "profile_mode",
+    type=click.Choice(["cprofile", "tracemalloc"]),
+    default=None,
+    help="Also dump a cProfile or tracemalloc profile of the command (implies --timings)",
+)
+@click.pass_context
+def cli(ctx, timings, profile_mode):
     """Ledger CLI
 
     AGENTS: run the `arledge instructions` command for detailed agent interaction instructions.
@@ -20,10 +29,33 @@ def cli():
       commands (init, list, create, export) to operate on a specific base
       directory. If unset, commands operate on the current working directory.
 
+    - Set ARLEDGE_PROFILE=1 (or cprofile/tracemalloc), or pass --timings or
+      --profile, to print per-phase timings of the command to stderr.
+
     Run the CLI with the project-friendly runner:
       uv run arledge
     """
-    pass
+    import os
+
+    if not (timings or profile_mode or os.environ.get("ARLEDGE_PROFILE")):
+        return
+    from . import profiling
+
+    try:
+        mode = profile_mode or ("timings" if timings else profiling.mode_from_env())
+    except ValueError as e:
+        click.echo(str(e), err=True)
+        sys.exit(2)
+    if mode and profiling.start(mode):
+        ctx.call_on_close(_print_timings)
+
+
+def _print_timings():
+    from . import profiling, serialize
+
+    report = profiling.finish()
+    if report is not None:
+        serialize.echo(report, stream=sys.stderr)
 
 
 @cli.command("init")
@@ -181,13 +213,11 @@ def customer():
 def customer_create(model_json, model_file, json_schema):
     """Create a customer from a JSON model or file. Prints created customer JSON to stdout."""
     if json_schema:
-        click.echo(
-            json.dumps(
-                models.Customer.model_json_schema(), indent=2, ensure_ascii=False
-            )
-        )
+        click.echo(json.dumps(schemas.get("Customer"), indent=2, ensure_ascii=False))
         return
 
+    from . import models, serialize
+
     if model_file:
         try:
             with open(model_file, "r", encoding="utf-8") as f:
@@ -212,17 +242,71 @@ def customer_create(model_json, model_file, json_schema):
         click.echo(f"Failed to create customer: {e}", err=True)
         sys.exit(2)
     # Actionable output: created customer as JSON on stdout
-    click.echo(json.dumps(config.dump_model(created), ensure_ascii=False))
+    serialize.echo(created)
+
+
+def _echo_listing(kind, empty_msg, limit, cursor, fields, fmt="json"):
+    """Print a paged, projected and/or streamed listing (see arledge.paging).
+
+    A page object is printed when --limit or --cursor is given; a projection
+    alone prints a plain JSON array like the unpaged listing. With
+    --format jsonl each record is written (and flushed) as soon as it is
+    produced.
+    """
+    from . import paging, serialize
+
+    if fmt == "jsonl":
+        if limit is not None or cursor is not None:
+            click.echo("--format jsonl cannot be combined with --limit/--cursor", err=True)
+            sys.exit(2)
+        try:
+            records = paging.iter_records(kind, fields)
+        except ValueError as e:
+            click.echo(str(e), err=True)
+            sys.exit(2)
+        count = 0
+        for rec in records:
+            serialize.echo(rec)
+            count += 1
+        if not count:
+            click.echo(empty_msg, err=True)
+        return
+    try:
+        page = paging.list_page(kind, limit=limit, cursor=cursor, fields=fields)
+    except ValueError as e:
+        click.echo(str(e), err=True)
+        sys.exit(2)
+    if limit is None and cursor is None:
+        if not page["items"]:
+            click.echo(empty_msg, err=True)
+            return
+        serialize.echo(page["items"])
+        return
+    serialize.echo(page)
 
 
 @customer.command("list")
-def customer_list():
+@click.option("--limit", type=click.IntRange(min=1), default=None, help="Return at most N items as {items, next_cursor}")
+@click.option("--cursor", default=None, help="Continue from the next_cursor of a previous page")
+@click.option("--fields", default=None, help="Comma-separated fields to include in each item")
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["json", "jsonl"]),
+    default="json",
+    help="json: one array (default); jsonl: one record per line, streamed",
+)
+def customer_list(limit, cursor, fields, fmt):
+    from . import beancount_store, serialize
+
+    if limit is not None or cursor is not None or fields is not None or fmt != "json":
+        _echo_listing("customer", "No customers", limit, cursor, fields, fmt)
+        return
     customers = beancount_store.list_customers()
     if not customers:
         click.echo("No customers", err=True)
         return
-    out = [config.dump_model(c) for c in customers]
-    click.echo(json.dumps(out, ensure_ascii=False))
+    serialize.echo(customers)
 
 
 @customer.command("update")
@@ -245,10 +329,10 @@ def customer_list():
 def customer_update(customer_id, model_json, model_file, json_schema):
     """Patch-update a customer by appending an updated custom entry. Prints updated customer JSON to stdout."""
     if json_schema:
-        click.echo(
-            json.dumps(models.Customer.model_json_schema(), indent=2, ensure_ascii=False)
-        )
+        click.echo(json.dumps(schemas.get("Customer"), indent=2, ensure_ascii=False))
         return
+    from . import models, beancount_store, serialize
+
     if model_file:
         try:
             with open(model_file, "r", encoding="utf-8") as f:
@@ -286,7 +370,7 @@ def customer_update(customer_id, model_json, model_file, json_schema):
     except Exception as e:
         click.echo(f"Failed to update customer: {e}", err=True)
         sys.exit(2)
-    click.echo(json.dumps(config.dump_model(updated), ensure_ascii=False))
+    serialize.echo(updated)
 
 
 @cli.group()
@@ -314,13 +398,11 @@ def creditor():
 def creditor_create(model_json, model_file, json_schema):
     """Create a creditor from a JSON model or file. Prints created creditor JSON to stdout."""
     if json_schema:
-        click.echo(
-            json.dumps(
-                models.Creditor.model_json_schema(), indent=2, ensure_ascii=False
-            )
-        )
+        click.echo(json.dumps(schemas.get("Creditor"), indent=2, ensure_ascii=False))
         return
 
+    from . import models, serialize
+
     if model_file:
         try:
             with open(model_file, "r", encoding="utf-8") as f:
@@ -343,27 +425,43 @@ def creditor_create(model_json, model_file, json_schema):
     except Exception as e:
         click.echo(f"Failed to create creditor: {e}", err=True)
         sys.exit(2)
-    click.echo(json.dumps(config.dump_model(created), ensure_ascii=False))
+    serialize.echo(created)
 
 
 @creditor.command("list")
-def creditor_list():
+@click.option("--limit", type=click.IntRange(min=1), default=None, help="Return at most N items as {items, next_cursor}")
+@click.option("--cursor", default=None, help="Continue from the next_cursor of a previous page")
+@click.option("--fields", default=None, help="Comma-separated fields to include in each item")
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["json", "jsonl"]),
+    default="json",
+    help="json: one array (default); jsonl: one record per line, streamed",
+)
+def creditor_list(limit, cursor, fields, fmt):
+    from . import beancount_store, serialize
+
+    if limit is not None or cursor is not None or fields is not None or fmt != "json":
+        _echo_listing("creditor", "No creditors", limit, cursor, fields, fmt)
+        return
     creds = beancount_store.list_creditors()
     if not creds:
         click.echo("No creditors", err=True)
         return
-    out = [config.dump_model(c) for c in creds]
-    click.echo(json.dumps(out, ensure_ascii=False))
+    serialize.echo(creds)
 
 
 @creditor.command("view")
 @click.argument("creditor_id", type=int)
 def creditor_view(creditor_id):
+    from . import beancount_store, serialize
+
     c = beancount_store.get_creditor(creditor_id)
     if not c:
         click.echo("Creditor not found", err=True)
         sys.exit(2)
-    click.echo(json.dumps(config.dump_model(c), ensure_ascii=False))
+    serialize.echo(c)
 
 
 @creditor.command("update")
@@ -386,11 +484,11 @@ def creditor_view(creditor_id):
 def creditor_update(creditor_id, model_json, model_file, json_schema):
     """Update a creditor by appending an updated custom entry. Prints updated creditor JSON to stdout."""
     if json_schema:
-        click.echo(
-            json.dumps(models.Creditor.model_json_schema(), indent=2, ensure_ascii=False)
-        )
+        click.echo(json.dumps(schemas.get("Creditor"), indent=2, ensure_ascii=False))
         return
 
+    from . import models, beancount_store, serialize
+
     if model_file:
         try:
             with open(model_file, "r", encoding="utf-8") as f:
@@ -438,7 +536,7 @@ def creditor_update(creditor_id, model_json, model_file, json_schema):
     except Exception as e:
         click.echo(f"Failed to update creditor: {e}", err=True)
         sys.exit(2)
-    click.echo(json.dumps(config.dump_model(updated), ensure_ascii=False))
+    serialize.echo(updated)
 
 
 @creditor.group()
@@ -468,13 +566,11 @@ def account():
 def account_create(model_json, model_file, json_schema):
     """Create a payment account from a JSON model or file. Prints created account JSON to stdout."""
     if json_schema:
-        click.echo(
-            json.dumps(
-                models.PaymentAccount.model_json_schema(), indent=2, ensure_ascii=False
-            )
-        )
+        click.echo(json.dumps(schemas.get("PaymentAccount"), indent=2, ensure_ascii=False))
         return
 
+    from . import models, serialize
+
     if model_file:
         try:
             with open(model_file, "r", encoding="utf-8") as f:
@@ -497,18 +593,19 @@ def account_create(model_json, model_file, json_schema):
     except Exception as e:
         click.echo(f"Failed to create payment account: {e}", err=True)
         sys.exit(2)
-    click.echo(json.dumps(config.dump_model(created), ensure_ascii=False))
+    serialize.echo(created)
 
 
 @account.command("list")
 @click.option("--creditor-id", type=int, default=None)
 def account_list(creditor_id):
+    from . import beancount_store, serialize
+
     rows = beancount_store.list_payment_accounts(creditor_id=creditor_id)
     if not rows:
         click.echo("No payment accounts", err=True)
         return
-    out = [config.dump_model(r) for r in rows]
-    click.echo(json.dumps(out, ensure_ascii=False))
+    serialize.echo(rows)
 
 
 @cli.group()
@@ -536,11 +633,11 @@ def invoice():
 def invoice_create(model_json, model_file, json_schema):
     """Create an invoice from a JSON model or file. Prints created invoice JSON to stdout."""
     if json_schema:
-        click.echo(
-            json.dumps(models.Invoice.model_json_schema(), indent=2, ensure_ascii=False)
-        )
+        click.echo(json.dumps(schemas.get("Invoice"), indent=2, ensure_ascii=False))
         return
 
+    from . import models, beancount_store, serialize
+
     if model_file:
         try:
             with open(model_file, "r", encoding="utf-8") as f:
@@ -566,7 +663,7 @@ def invoice_create(model_json, model_file, json_schema):
     # Include invoice id and invoice_number in actionable JSON
     out = config.dump_model(created)
     out["invoice_number"] = beancount_store.format_invoice_number(created.id)
-    click.echo(json.dumps(out, ensure_ascii=False))
+    serialize.echo(out)
 
 
 @invoice.command("update")
@@ -589,8 +686,10 @@ def invoice_create(model_json, model_file, json_schema):
 def invoice_update(invoice_id, model_json, model_file, json_schema):
     """Patch-update an invoice's sidecar data. Prints updated invoice JSON to stdout."""
     if json_schema:
-        click.echo(json.dumps(models.Invoice.model_json_schema(), indent=2, ensure_ascii=False))
+        click.echo(json.dumps(schemas.get("Invoice"), indent=2, ensure_ascii=False))
         return
+    from . import models, beancount_store, serialize
+
     if model_file:
         try:
             with open(model_file, "r", encoding="utf-8") as f:
@@ -630,22 +729,45 @@ def invoice_update(invoice_id, model_json, model_file, json_schema):
         sys.exit(2)
     out = config.dump_model(updated)
     out["invoice_number"] = beancount_store.format_invoice_number(updated.id)
-    click.echo(json.dumps(out, ensure_ascii=False))
+    serialize.echo(out)
 
 
 @invoice.command("list")
-def invoice_list():
+@click.option("--limit", type=click.IntRange(min=1), default=None, help="Return at most N items as {items, next_cursor}")
+@click.option("--cursor", default=None, help="Continue from the next_cursor of a previous page")
+@click.option("--fields", default=None, help="Comma-separated fields to include in each item")
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["json", "jsonl"]),
+    default="json",
+    help="json: one array (default); jsonl: one record per line, streamed",
+)
+def invoice_list(limit, cursor, fields, fmt):
+    """List invoices (newest id first).
+
+    With --limit/--cursor the output is a page object {"items", "next_cursor"};
+    --fields projects each item (invoices are read without their sidecar
+    unless lines or totals are requested); --format jsonl streams one
+    invoice per line.
+    """
+    from . import beancount_store, serialize
+
+    if limit is not None or cursor is not None or fields is not None or fmt != "json":
+        _echo_listing("invoice", "No invoices", limit, cursor, fields, fmt)
+        return
     invs = beancount_store.list_invoices()
     if not invs:
         click.echo("No invoices", err=True)
         return
-    out = [config.dump_model(inv) for inv in invs]
-    click.echo(json.dumps(out, ensure_ascii=False))
+    serialize.echo(invs)
 
 
 @invoice.command("allocate")
 def invoice_allocate():
     """Allocate the next invoice id and print it as JSON (id + invoice_number)."""
+    from . import beancount_store
+
     try:
         from .beancount_write import allocate_invoice_id
     except Exception as e:
@@ -663,11 +785,13 @@ def invoice_allocate():
 @invoice.command("view")
 @click.argument("invoice_id", type=int)
 def invoice_view(invoice_id):
+    from . import beancount_store, serialize
+
     inv = beancount_store.get_invoice(invoice_id)
     if not inv:
         click.echo("Invoice not found", err=True)
         sys.exit(2)
-    click.echo(json.dumps(config.dump_model(inv), ensure_ascii=False))
+    serialize.echo(inv)
 
 
 @invoice.command("export")
@@ -675,6 +799,8 @@ def invoice_view(invoice_id):
 @click.option("--format", "fmt", type=click.Choice(["json", "text"]), default="json")
 @click.option("--path", default=None)
 def invoice_export(invoice_id, fmt, path):
+    from . import beancount_store
+
     if fmt == "json":
         out = beancount_store.export_invoice_json(invoice_id, path=path)
         if not out:
@@ -687,6 +813,72 @@ def invoice_export(invoice_id, fmt, path):
         sys.exit(2)
 
 
+@invoice.command("convert-sidecars")
+@click.option(
+    "--codec",
+    type=click.Choice(["json", "compact", "gzip", "lzma"]),
+    required=True,
+    help="Target sidecar codec",
+)
+@click.option(
+    "--month",
+    "months",
+    multiple=True,
+    help="Only convert invoices dated in this month (YYYY-MM). Repeatable.",
+)
+@click.option(
+    "--before",
+    default=None,
+    help="Only convert invoices dated before this month (YYYY-MM), e.g. to compress archived months",
+)
+def invoice_convert_sidecars(codec, months, before):
+    """Re-encode existing invoice sidecars with another codec.
+
+    Reads detect the codec of each sidecar file, so converted and unconverted
+    files can be mixed freely. Prints a JSON summary (files converted and
+    bytes before/after) to stdout.
+    """
+    from . import beancount_store, sidecar
+
+    for m in list(months) + ([before] if before else []):
+        if len(m) != 7 or m[4] != "-" or not (m[:4] + m[5:]).isdigit():
+            click.echo(f"Invalid month (expected YYYY-MM): {m}", err=True)
+            sys.exit(2)
+    converted = 0
+    skipped = 0
+    bytes_before = 0
+    bytes_after = 0
+    seen = set()
+    for inv_id, d, p in beancount_store.list_invoice_sidecars():
+        month = d.isoformat()[:7] if d is not None else ""
+        if months and month not in months:
+            continue
+        if before and not (month and month < before):
+            continue
+        if p in seen or not p.exists():
+            continue
+        seen.add(p)
+        try:
+            b0, b1, changed = sidecar.convert(p, codec)
+        except Exception as e:
+            click.echo(f"Failed to convert sidecar {p}: {e}", err=True)
+            sys.exit(2)
+        bytes_before += b0
+        bytes_after += b1
+        if changed:
+            converted += 1
+        else:
+            skipped += 1
+    out = {
+        "codec": codec,
+        "converted": converted,
+        "unchanged": skipped,
+        "bytes_before": bytes_before,
+        "bytes_after": bytes_after,
+    }
+    click.echo(json.dumps(out, ensure_ascii=False))
+
+
 @cli.group()
 def mcp():
     """MCP server commands (stdio transport using FastMCP)."""
@@ -706,7 +898,35 @@ def mcp():
     default=False,
     help="Validate configuration and exit without starting the server",
 )
-def mcp_start(name, json_response, dry_run):
+@click.option(
+    "--read-workers",
+    type=click.IntRange(min=1),
+    default=config.MCP_READ_WORKERS,
+    show_default=True,
+    help="Worker threads for concurrent read tools (writes always run one at a time)",
+)
+@click.option(
+    "--timeout",
+    "request_timeout",
+    type=click.FloatRange(min=0),
+    default=config.MCP_REQUEST_TIMEOUT,
+    show_default=True,
+    help="Per-call timeout in seconds (0 disables)",
+)
+@click.option(
+    "--stats-file",
+    type=click.Path(dir_okay=False),
+    default=config.MCP_STATS_FILE,
+    help="Write the server_stats JSON to this file periodically and on exit",
+)
+@click.option(
+    "--stats-interval",
+    type=click.FloatRange(min=0, min_open=True),
+    default=config.MCP_STATS_INTERVAL,
+    show_default=True,
+    help="Seconds between --stats-file writes",
+)
+def mcp_start(name, json_response, dry_run, read_workers, request_timeout, stats_file, stats_interval):
     """Start an MCP stdio server using the official `mcp` library (blocks).
 
     Example: `uv run arledge mcp start` will block and listen on
@@ -722,12 +942,242 @@ def mcp_start(name, json_response, dry_run):
 
     # Call launcher; when not dry-run this will block (mcp.run)
     try:
-        start_mcp_stdio_server(name=name, json_response=json_response, dry_run=dry_run)
+        start_mcp_stdio_server(
+            name=name,
+            json_response=json_response,
+            dry_run=dry_run,
+            read_workers=read_workers,
+            request_timeout=request_timeout,
+            stats_file=stats_file,
+            stats_interval=stats_interval,
+        )
     except Exception:
         click.echo("Failed to start MCP server", err=True)
         sys.exit(2)
 
 
+@cli.group()
+def dev():
+    """Developer tools (synthetic ledgers for scale testing)."""
+    pass
+
+
+@dev.command("generate")
+@click.option("--customers", type=click.IntRange(min=0), default=100, show_default=True, help="Number of customers")
+@click.option("--invoices", type=click.IntRange(min=0), default=1000, show_default=True, help="Number of invoices")
+@click.option("--lines-per-invoice", type=click.IntRange(min=1), default=1, show_default=True, help="Lines on every invoice")
+@click.option("--months", type=click.IntRange(min=1), default=12, show_default=True, help="Months the invoices are spread over")
+@click.option("--end-month", default=None, help="Last month (YYYY-MM; default: this month)")
+@click.option("--seed", type=int, default=0, show_default=True, help="Random seed; the same arguments give identical files")
+@click.option("--codec", type=click.Choice(["json", "compact", "gzip", "lzma"]), default=None, help="Sidecar codec (default: the configured one)")
+def dev_generate(customers, invoices, lines_per_invoice, months, end_month, seed, codec):
+    """Generate a synthetic ledger in the base directory (see ARLEDGE_BASEDIR).
+
+    Writes ledger.beancount, the include files, one invoice file per month,
+    a sidecar per invoice and .arledge/invoice_seq, composed like
+    `customer create` / `invoice create` would but written in bulk. The
+    base directory must not contain a ledger.beancount yet.
+
+    Prints counts and timings as JSON to stdout.
+    """
+    from . import generate, serialize
+
+    base = config.get_basedir()
+    try:
+        stats = generate.generate(
+            base,
+            customers,
+            invoices,
+            lines_per_invoice=lines_per_invoice,
+            months=months,
+            seed=seed,
+            end_month=end_month,
+            codec=codec,
+        )
+    except (FileExistsError, ValueError) as e:
+        click.echo(f"Failed to generate ledger: {e}", err=True)
+        sys.exit(2)
+    click.echo(f"Generated {customers} customers and {invoices} invoices at {base}", err=True)
+    serialize.echo(stats)
+
+
+@cli.command("bench")
+@click.option("--sizes", default="1000,10000", show_default=True, help="Comma-separated invoice counts; a ledger is generated per size")
+@click.option("--modes", default="cli,mcp", show_default=True, help="cli (one-shot, ledger loaded per call) and/or mcp (resident server)")
+@click.option("--ops", default=None, help="Comma-separated operations (default: all)")
+@click.option("--repeat", type=click.IntRange(min=1), default=5, show_default=True, help="Timed calls per operation")
+@click.option("--seed", type=int, default=0, show_default=True, help="Seed for the generated ledgers")
+@click.option("--workdir", type=click.Path(file_okay=False), default=None, help="Keep the generated ledgers here (default: a removed temp dir)")
+@click.option("--output", type=click.Path(dir_okay=False), default=None, help="Also write the JSON report to this file")
+@click.option("--compare", "baseline", type=click.Path(exists=True, dir_okay=False), default=None, help="Earlier report to compare against")
+def bench(sizes, modes, ops, repeat, seed, workdir, output, baseline):
+    """Time the CLI and MCP hot paths on generated ledgers of increasing size.
+
+    Operations: customer_list, invoice_list, invoice_view,
+    export_invoice_json, validate, validate_incremental, allocate_invoice_id,
+    invoice_create. Each
+    runs in its own process; results carry latency percentiles (p50, p90,
+    p99 in ms), throughput (ops/s) and peak RSS. Progress goes to stderr and
+    the JSON report (see arledge.bench) to stdout. With --compare, the
+    report gains a "comparison" list with p50 and peak-RSS ratios (new/old).
+    """
+    from pathlib import Path
+    from . import bench as harness, serialize
+
+    def split(value):
+        return [v.strip() for v in value.split(",") if v.strip()]
+
+    try:
+        size_list = [int(v) for v in split(sizes)]
+    except ValueError:
+        click.echo(f"Invalid --sizes: {sizes}", err=True)
+        sys.exit(2)
+    mode_list = tuple(split(modes))
+    op_list = tuple(split(ops)) if ops else harness.OPS
+    unknown = [m for m in mode_list if m not in harness.MODES] + [o for o in op_list if o not in harness.OPS]
+    if unknown or not size_list or min(size_list) < 1:
+        click.echo(f"Invalid benchmark selection: {', '.join(unknown) or sizes}", err=True)
+        sys.exit(2)
+    old = None
+    if baseline:
+        try:
+            with open(baseline, "r", encoding="utf-8") as f:
+                old = json.load(f)
+        except Exception as e:
+            click.echo(f"Failed to read baseline report: {e}", err=True)
+            sys.exit(2)
+    try:
+        report = harness.run(
+            size_list,
+            modes=mode_list,
+            ops=op_list,
+            repeat=repeat,
+            seed=seed,
+            workdir=Path(workdir) if workdir else None,
+            progress=lambda r: click.echo(harness.format_result(r), err=True),
+        )
+    except Exception as e:
+        click.echo(f"Benchmark failed: {e}", err=True)
+        sys.exit(2)
+    if old is not None:
+        report["comparison"] = harness.compare(report, old)
+        for row in report["comparison"]:
+            click.echo(
+                f"{row['invoices']:>9} {row['mode']:<4} {row['op']:<20} p50 {row['baseline_p50_ms']:.2f} -> {row['p50_ms']:.2f} ms (x{row['p50_ratio']})",
+                err=True,
+            )
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    serialize.echo(report)
+
+
+@cli.command("batch")
+@click.option(
+    "--ops",
+    "ops_file",
+    type=click.File("r", encoding="utf-8"),
+    required=True,
+    help="JSONL file of operations, or - for stdin",
+)
+@click.option("--stop-on-error", is_flag=True, default=False, help="Stop after the first failing operation")
+def batch(ops_file, stop_on_error):
+    """Run a JSONL script of arledge commands in one process.
+
+    Each line is an operation mirroring a CLI invocation, e.g.
+    `{"command": "customer create", "model": {...}}` or
+    `{"argv": ["invoice", "view", "3"]}` (see arledge.batch). Operations run
+    in order against one resident ledger snapshot; one JSON result line
+    (`op`, `exit_code`, `result`, and `stderr` if any) is printed per
+    operation as it completes. Exits 2 if any operation failed.
+    """
+    from . import batch as batch_mod
+
+    failed = False
+    for res in batch_mod.run(ops_file, stop_on_error=stop_on_error):
+        click.echo(json.dumps(res, ensure_ascii=False))
+        failed = failed or res["exit_code"] != 0
+    if failed:
+        sys.exit(2)
+
+
+@cli.command("watch")
+@click.option("--since-offset", "since", default=None, help="Resume after the position token of an earlier event")
+@click.option("--once", is_flag=True, default=False, help="Print pending events and a final position, then exit")
+@click.option("--interval", type=float, default=1.0, show_default=True, help="Seconds between polls")
+def watch(since, once, interval):
+    """Stream newly written customers, creditors, payment accounts and invoices as JSONL.
+
+    Each line is an event `{"kind", "op", "id", "data", "token"}` (see
+    arledge.watch); pass an event's `token` as `--since-offset` to resume
+    after it. Without `--since-offset` only later writes are reported. The
+    first line (and with `--once` the last) is `{"kind": "position",
+    "token"}`. Only appended bytes are parsed on each poll.
+    """
+    import time
+    from . import snapshot, watch as watch_mod
+
+    was_enabled = snapshot.is_enabled()
+    snapshot.enable()
+    try:
+        feed = watch_mod.Feed(since)
+    except ValueError:
+        snapshot.enable(was_enabled)
+        click.echo("Invalid position token", err=True)
+        sys.exit(2)
+    try:
+        if not once:
+            click.echo(json.dumps({"kind": "position", "token": feed.token()}))
+        while True:
+            for event in feed.poll():
+                click.echo(json.dumps(event, ensure_ascii=False))
+            if once:
+                click.echo(json.dumps({"kind": "position", "token": feed.token()}))
+                return
+            sys.stdout.flush()
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        return
+    finally:
+        snapshot.enable(was_enabled)
+
+
+@cli.command("serve")
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Unix socket path (default: $ARLEDGE_SOCKET or <basedir>/.arledge/arledge.sock)",
+)
+def serve(socket_path):
+    """Run a resident arledge daemon on a Unix socket (blocks).
+
+    The daemon keeps the ledger snapshot, indexes and decoded sidecars warm.
+    `arledge` invocations for the same base directory are forwarded to it
+    automatically (same stdout/stderr/exit-code contract) and fall back to
+    in-process execution when no daemon is running. Commands are executed
+    one at a time inside the daemon, so writes are serialized.
+    """
+    import os
+    from pathlib import Path
+    from . import daemon
+
+    base = config.get_basedir()
+    if socket_path:
+        path = Path(socket_path)
+    elif os.environ.get("ARLEDGE_SOCKET"):
+        path = Path(os.environ["ARLEDGE_SOCKET"])
+    else:
+        path = daemon.default_socket_path(base)
+    try:
+        daemon.serve(path.absolute(), base)
+    except Exception as e:
+        click.echo(f"Failed to start daemon: {e}", err=True)
+        sys.exit(2)
+
+
 @cli.command()
 def instructions():
     """Print instructions for agentic systems on interacting with the CLI."""
@@ -784,159 +1234,98 @@ def schema(name):
 
     Example: `arledge schema customer` prints the Customer JSON Schema to stdout.
     """
-    mapping = {
-        "customer": models.Customer,
-        "creditor": models.Creditor,
-        "account": models.PaymentAccount,
-        "payment-account": models.PaymentAccount,
-        "invoice": models.Invoice,
-        "invoice-line": getattr(models, "InvoiceLine", None),
-    }
-    if name not in mapping or mapping[name] is None:
+    model_name = schemas.NAMES.get(name)
+    if model_name is None:
         click.echo(
-            "Unknown schema name. Available: customer, creditor, account, payment-account, invoice, invoice-line",
+            "Unknown schema name. Available: " + ", ".join(schemas.NAMES),
             err=True,
         )
         sys.exit(2)
-    mdl = mapping[name]
-    schema = mdl.model_json_schema()
+    schema = schemas.get(model_name)
     click.echo(json.dumps(schema, indent=2, ensure_ascii=False))
 
 
 @cli.command("validate")
-def validate():
+@click.option("--full", is_flag=True, default=False, help="Ignore the saved state and re-check everything with beancount's full loader")
+@click.option("--jobs", type=click.IntRange(min=0), default=None, help="Worker processes for checking sidecars (default: config.VALIDATE_WORKERS; 0 = one per CPU)")
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["text", "json"]),
+    default="text",
+    help="text: findings on stderr (default); json: a report with findings and per-phase timings on stdout",
+)
+def validate(full, jobs, fmt):
     """Validate the full beancount ledger and detect orphan/missing invoice sidecars.
 
-    Runs beancount.loader.load_file on ledger.beancount, reports parse errors,
-    per-transaction balance violations (per currency), and invoice sidecar
-    issues:
+    Reports parse errors, beancount's account checks, per-transaction balance
+    violations (per currency), and invoice sidecar issues:
       - missing sidecar referenced by a transaction -> error
+      - sidecar that is not a valid invoice, or whose totals do not match its lines -> error
+      - transaction postings (amounts, currency, customer) disagreeing with the sidecar -> error
       - orphan sidecar present in includes/invoices/data not referenced -> warning
 
+    Results are kept per include file and per sidecar in
+    .arledge/validate-state, so a re-run only re-checks files whose content
+    changed (see arledge.validation). --full ignores that state and also runs
+    beancount.loader.load_file (plugins, booking and all its validations).
+
+    --format json prints one JSON object to stdout instead: ok, full_load,
+    file and sidecar counts, phases (state, load, balance, sidecars, orphans;
+    each with seconds and entry counts) and findings (kind, severity, file,
+    line, message).
+
     Exits with code 0 on success, 2 on validation error.
     """
-    from decimal import Decimal
-    from pathlib import Path
-
     base = config.get_basedir()
-    ledger_file = base / "ledger.beancount"
-    if not ledger_file.exists():
+    if not (base / "ledger.beancount").exists():
         click.echo("No ledger.beancount found", err=True)
         sys.exit(2)
-    try:
-        from beancount.loader import load_file
+    from . import validation
 
-        entries, errors, options = load_file(str(ledger_file))
+    try:
+        report = validation.run(base, full=full, jobs=jobs)
     except Exception as e:
         click.echo(f"Failed to load ledger: {e}", err=True)
         sys.exit(2)
 
-    had_error = False
-    # Report parse/load errors. Treat unknown-account references as warnings.
-    if errors:
-        fatal = []
-        warns = []
-        for err in errors:
-            s = None
-            try:
-                s = str(err)
-            except Exception:
-                s = repr(err)
-            low = s.lower() if s else ""
-            if "unknown account" in low or "invalid reference to unknown account" in low:
-                warns.append(s)
-            else:
-                fatal.append(s)
-        if fatal:
-            click.echo("Beancount parse/load errors:", err=True)
-            for err in fatal:
-                click.echo(err, err=True)
-            had_error = True
-        if warns:
-            click.echo("Beancount parse/load warnings:", err=True)
-            for w in warns:
-                click.echo(w, err=True)
-
-    # Balance check: per-transaction, per-currency sums should be zero
-    balance_issues = []
-    for e in entries:
-        if e.__class__.__name__ == "Transaction":
-            sums: dict[str, Decimal] = {}
-            postings = getattr(e, "postings", []) or []
-            for p in postings:
-                u = getattr(p, "units", None)
-                if not u:
-                    continue
-                # attempt to extract numeric value
-                num = None
-                for attr in ("number", "value", "amount"):
-                    num = getattr(u, attr, None)
-                    if num is not None:
-                        break
-                if num is None:
-                    try:
-                        num = Decimal(str(u))
-                    except Exception:
-                        continue
-                try:
-                    dec = Decimal(str(num))
-                except Exception:
-                    try:
-                        dec = Decimal(num)
-                    except Exception:
-                        continue
-                cur = getattr(u, "currency", None) or getattr(u, "currency", None)
-                if not cur:
-                    cur = ""
-                sums.setdefault(cur, Decimal(0))
-                sums[cur] += dec
-            for cur, total in sums.items():
-                if total != Decimal(0):
-                    balance_issues.append(
-                        f"Unbalanced transaction {getattr(e,'date', '')} {getattr(e,'narration', '')}: currency={cur} total={total}"
-                    )
-    if balance_issues:
-        click.echo("Balance issues detected:", err=True)
-        for b in balance_issues:
-            click.echo(b, err=True)
-        had_error = True
-
-    # Sidecar detection
-    invoices_data = base / "includes" / "invoices" / "data"
-    referenced = set()
-    missing = []
-    for e in entries:
-        if e.__class__.__name__ == "Transaction":
-            meta = getattr(e, "meta", {}) or {}
-            inv_data = meta.get("invoice_data")
-            if inv_data and isinstance(inv_data, str):
-                p = Path(inv_data)
-                if not p.is_absolute():
-                    p = base / inv_data
-                referenced.add(str(p.resolve()))
-                if not p.exists():
-                    missing.append(str(p))
-    orphans = []
-    try:
-        if invoices_data.exists():
-            for f in invoices_data.iterdir():
-                if f.is_file():
-                    if str(f.resolve()) not in referenced:
-                        orphans.append(str(f))
-    except Exception:
-        pass
+    if fmt == "json":
+        from . import serialize
 
-    if missing:
+        serialize.echo(report.to_dict())
+        if not report.ok:
+            sys.exit(2)
+        return
+    # Unknown-account references are warnings.
+    if report.errors:
+        click.echo("Beancount parse/load errors:", err=True)
+        for f in report.errors:
+            click.echo(validation.format_finding(f), err=True)
+    if report.warnings:
+        click.echo("Beancount parse/load warnings:", err=True)
+        for f in report.warnings:
+            click.echo(validation.format_finding(f), err=True)
+    if report.unbalanced:
+        click.echo("Balance issues detected:", err=True)
+        for f in report.unbalanced:
+            click.echo(f["message"], err=True)
+    if report.missing:
         click.echo("Missing invoice sidecars referenced by transactions:", err=True)
-        for m in missing:
-            click.echo(m, err=True)
-        had_error = True
-
-    if orphans:
+        for f in report.missing:
+            click.echo(f["sidecar"], err=True)
+    if report.bad_sidecars:
+        click.echo("Invalid invoice sidecars:", err=True)
+        for f in report.bad_sidecars:
+            click.echo(validation.format_finding(f), err=True)
+    if report.mismatches:
+        click.echo("Invoice transactions disagreeing with their sidecars:", err=True)
+        for f in report.mismatches:
+            click.echo(validation.format_finding(f), err=True)
+    if report.orphans:
         click.echo("Orphan invoice sidecars (present but not referenced):", err=True)
-        for o in orphans:
+        for o in report.orphans:
             click.echo(o, err=True)
 
-    if had_error:
+    if not report.ok:
         sys.exit(2)
     click.echo("Ledger OK", err=True)
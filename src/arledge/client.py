@@ -0,0 +1,32 @@
+"""Thin `arledge` entry point that prefers a running daemon.
+
+When an `arledge serve` daemon is listening on ARLEDGE_SOCKET (default
+``<basedir>/.arledge/arledge.sock``) the command line is forwarded to it and
+its stdout, stderr and exit code are reproduced verbatim. Otherwise the click
+CLI runs in-process. Set ARLEDGE_NO_DAEMON=1 to always run in-process.
+"""
+from __future__ import annotations
+import os
+import sys
+from pathlib import Path
+from typing import Optional, Sequence
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = list(sys.argv[1:] if argv is None else argv)
+    if os.environ.get("ARLEDGE_NO_DAEMON") != "1":
+        from . import config, daemon
+
+        basedir = config.get_basedir()
+        sock = os.environ.get("ARLEDGE_SOCKET")
+        path = Path(sock) if sock else daemon.default_socket_path(basedir)
+        reply = daemon.forward(args, path, basedir)
+        if reply is not None:
+            sys.stdout.write(reply.get("stdout", ""))
+            sys.stdout.flush()
+            sys.stderr.write(reply.get("stderr", ""))
+            sys.stderr.flush()
+            sys.exit(int(reply.get("exit_code", 1)))
+    from .cli import cli
+
+    cli.main(args=args, prog_name="arledge")
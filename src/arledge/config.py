@@ -18,6 +18,40 @@ IS_DEVELOPMENT = True
 MCP_JSON_RESPONSE = True
 # Logging level hint for MCP server runtime
 MCP_LOG_LEVEL = "info"
+# Worker threads for read-only MCP tools; further read calls queue. Write
+# tools always run one at a time on a dedicated writer thread.
+MCP_READ_WORKERS = 4
+# Seconds a tool call may take (including time queued) before it fails;
+# 0 disables the limit. A timed-out write may still complete in the background.
+MCP_REQUEST_TIMEOUT = 30.0
+# File the MCP server periodically writes its `server_stats` JSON to (None
+# disables), and the seconds between writes.
+MCP_STATS_FILE = None
+MCP_STATS_INTERVAL = 60.0
+
+# JSON encoder for CLI output: "json" (stdlib, default) or "orjson" (needs
+# the optional orjson package; compact separators). The ARLEDGE_JSON_BACKEND
+# environment variable overrides this value.
+JSON_BACKEND = "json"
+
+# Codec used for new invoice sidecar writes: "json" (pretty), "compact",
+# "gzip" or "lzma". The ARLEDGE_SIDECAR_CODEC environment variable overrides
+# this value. Reads detect the codec per file, so mixed directories are fine.
+SIDECAR_CODEC = "compact"
+
+# How far beancount loading goes for arledge's reads (see arledge.loading):
+# "full" (booking, plugins, validation), "parse" (booking only) or "arledge"
+# (parse only). The ARLEDGE_LOAD_PROFILE environment variable overrides this
+# value.
+LOAD_PROFILE = "arledge"
+
+# Worker processes `arledge validate` uses to check changed invoice sidecars;
+# 0 uses one per CPU. Small batches are always checked in-process.
+VALIDATE_WORKERS = 0
+
+# Maximum number of decoded invoice sidecars kept in memory by long-lived
+# processes (see arledge.snapshot); ignored when the snapshot cache is off.
+SIDECAR_CACHE_SIZE = 4096
 
 
 def dt_to_iso_utc(dt: datetime) -> str:
@@ -42,8 +76,12 @@ def iso_to_dt(s: str) -> datetime:
 def decimal_to_str(d: Decimal) -> str:
     if d is None:
         return None
-    # Culture-invariant string representation
-    return format(d, "f")
+    # Culture-invariant string representation. str() is much cheaper and
+    # gives the same text unless it picks exponent notation.
+    s = str(d)
+    if "E" in s:
+        return format(d, "f")
+    return s
 
 
 def decimal_to_str_currency(d: Decimal) -> str:
@@ -137,8 +175,9 @@ def dump_model(m):
     not a JSON string; callers should call ``json.dumps(...)`` when they
     need a textual JSON representation.
     """
-    try:
-        data = m.model_dump()  # pydantic model
-    except Exception:
-        data = dict(m)
-    return _serialize_value(data)
+    if hasattr(m, "model_dump"):
+        # pydantic model: single pass over the model attributes
+        from .serialize import to_builtins
+
+        return to_builtins(m)
+    return _serialize_value(dict(m))
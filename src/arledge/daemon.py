@@ -0,0 +1,219 @@
+"""Resident arledge daemon and thin client over a Unix domain socket.
+
+`arledge serve --socket PATH` keeps one Python process alive with the CLI,
+pydantic models and a warm ledger snapshot (see arledge.snapshot) loaded.
+The `arledge` entry point (arledge.client) forwards each invocation to the
+daemon when its socket is reachable and otherwise runs the command
+in-process, so callers see the same stdout/stderr/exit-code contract either
+way.
+
+Protocol: one request per connection. The client sends a single JSON line
+``{"argv": [...], "cwd": "...", "basedir": "...", "env": {...}}`` and the
+daemon replies with one JSON line ``{"exit_code": N, "stdout": "...",
+"stderr": "..."}``. A daemon serving a different base directory replies
+``{"fallback": "<reason>"}`` and the client runs the command itself.
+
+This module imports only the standard library at import time so the client
+path stays cheap.
+"""
+from __future__ import annotations
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+from pathlib import Path
+from typing import Optional, Sequence
+
+SOCKET_NAME = "arledge.sock"
+
+# Commands that must never be forwarded: they block, own the terminal,
+# manage the daemon itself, read stdin (batch) or stream (watch).
+LOCAL_COMMANDS = {"serve", "mcp", "batch", "watch"}
+# Options of the root `arledge` group, which may precede the command name.
+_ROOT_FLAGS = {"--timings"}
+_ROOT_VALUE_OPTIONS = {"--profile"}
+
+_CONNECT_TIMEOUT = 0.5
+
+
+def default_socket_path(basedir: Path) -> Path:
+    """Return the socket path used when ARLEDGE_SOCKET is not set."""
+    return basedir / ".arledge" / SOCKET_NAME
+
+
+def _forwarded_env() -> dict[str, str]:
+    # ARLEDGE_BASEDIR is pinned by the daemon; other ARLEDGE_* settings
+    # (e.g. ARLEDGE_SIDECAR_CODEC) apply to the forwarded command only.
+    return {
+        k: v
+        for k, v in os.environ.items()
+        if k.startswith("ARLEDGE_") and k not in ("ARLEDGE_BASEDIR", "ARLEDGE_SOCKET")
+    }
+
+
+def _recv_line(conn: socket.socket) -> bytes:
+    chunks = []
+    while True:
+        buf = conn.recv(65536)
+        if not buf:
+            break
+        chunks.append(buf)
+        if buf.endswith(b"\n"):
+            break
+    return b"".join(chunks)
+
+
+def command_name(argv: Sequence[str]) -> Optional[str]:
+    """Return the command of an ``arledge`` argv, skipping the root group's options.
+
+    None when there is no command or an option is not a known root option;
+    such command lines run in-process.
+    """
+    i = 0
+    while i < len(argv) and argv[i].startswith("-"):
+        opt = argv[i].split("=", 1)[0]
+        if opt in _ROOT_FLAGS or (opt in _ROOT_VALUE_OPTIONS and "=" in argv[i]):
+            i += 1
+        elif opt in _ROOT_VALUE_OPTIONS:
+            i += 2
+        else:
+            return None
+    return argv[i] if i < len(argv) else None
+
+
+def _runs_locally(argv: Sequence[str]) -> bool:
+    name = command_name(argv)
+    return name is None or name in LOCAL_COMMANDS
+
+
+# Client
+
+
+def forward(
+    argv: Sequence[str], socket_path: Path, basedir: Path
+) -> Optional[dict]:
+    """Send ``argv`` to the daemon listening on ``socket_path``.
+
+    Returns the daemon's reply (``exit_code``, ``stdout``, ``stderr``) or None
+    when the command should run in-process instead (no daemon, connection
+    failure, or a daemon serving another base directory).
+    """
+    if _runs_locally(argv):
+        return None
+    if not socket_path.exists():
+        return None
+    req = {
+        "argv": list(argv),
+        "cwd": os.getcwd(),
+        "basedir": str(basedir),
+        "env": _forwarded_env(),
+    }
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.settimeout(_CONNECT_TIMEOUT)
+            conn.connect(str(socket_path))
+            conn.settimeout(None)
+            conn.sendall(json.dumps(req).encode("utf-8") + b"\n")
+            reply = json.loads(_recv_line(conn) or b"null")
+    except (OSError, ValueError):
+        return None
+    if not isinstance(reply, dict) or "fallback" in reply or "exit_code" not in reply:
+        return None
+    return reply
+
+
+# Server
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        from . import runner
+
+        server: DaemonServer = self.server  # type: ignore[assignment]
+        try:
+            req = json.loads(self.rfile.readline() or b"null")
+            argv = [str(a) for a in req["argv"]]
+        except Exception:
+            self._reply({"exit_code": 2, "stdout": "", "stderr": "Malformed daemon request\n"})
+            return
+        if req.get("basedir") != str(server.basedir):
+            self._reply({"fallback": "basedir mismatch"})
+            return
+        if _runs_locally(argv):
+            self._reply({"fallback": "command must run locally"})
+            return
+        env = {k: str(v) for k, v in (req.get("env") or {}).items() if k.startswith("ARLEDGE_")}
+        env["ARLEDGE_BASEDIR"] = str(server.basedir)
+        # the command sees the client's ARLEDGE_* settings only, as in-process
+        res = runner.run_cli(argv, cwd=req.get("cwd"), env=env, env_prefix="ARLEDGE_")
+        self._reply({"exit_code": res.exit_code, "stdout": res.stdout, "stderr": res.stderr})
+
+    def _reply(self, obj: dict) -> None:
+        try:
+            self.wfile.write(json.dumps(obj, ensure_ascii=False).encode("utf-8") + b"\n")
+        except OSError:
+            pass
+
+
+class DaemonServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, basedir: Path):
+        self.socket_path = socket_path
+        self.basedir = basedir
+        super().__init__(str(socket_path), _Handler)
+
+
+def _socket_in_use(path: Path) -> bool:
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.settimeout(_CONNECT_TIMEOUT)
+            s.connect(str(path))
+        return True
+    except OSError:
+        return False
+
+
+def create_server(socket_path: Path, basedir: Path) -> DaemonServer:
+    """Bind the daemon socket and warm the ledger snapshot.
+
+    Raises RuntimeError if another daemon is already listening on the path.
+    A stale socket file left by a crashed daemon is removed.
+    """
+    from . import beancount_store, snapshot
+
+    if socket_path.exists():
+        if _socket_in_use(socket_path):
+            raise RuntimeError(f"a daemon is already listening on {socket_path}")
+        socket_path.unlink()
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    os.environ["ARLEDGE_BASEDIR"] = str(basedir)
+    snapshot.enable()
+    # Warm the snapshot and the indexes used by list/view commands
+    beancount_store.list_customers()
+    beancount_store.list_creditors()
+    beancount_store.list_invoices()
+    return DaemonServer(socket_path, basedir)
+
+
+def _raise_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def serve(socket_path: Path, basedir: Path) -> None:
+    """Run the daemon until interrupted (SIGINT/SIGTERM); removes the socket file on exit."""
+    server = create_server(socket_path, basedir)
+    signal.signal(signal.SIGTERM, _raise_interrupt)
+    print(f"arledge daemon listening on {socket_path} (basedir={basedir})", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            socket_path.unlink()
+        except OSError:
+            pass
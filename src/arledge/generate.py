@@ -0,0 +1,173 @@
+"""Synthetic ledgers for scale testing (`arledge dev generate`).
+
+``generate`` writes a complete base directory: ledger.beancount, the include
+files, one invoice file per month, a sidecar per invoice and the invoice
+sequence file. Entries are composed with the same helpers as
+arledge.beancount_write (``_customer_snippet``, ``_invoice_snippet``,
+models.Invoice totals, sidecar encoding and checksums), so the result reads,
+lists and validates like a ledger written one entity at a time.
+
+Unlike beancount_write it writes in bulk: each include file is written
+sequentially in large chunks and nothing is fsynced, since a partial result
+can simply be generated again. The same arguments (including ``seed`` and
+``end_month``) always produce byte-identical files.
+"""
+from __future__ import annotations
+import calendar
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+from . import beancount_write, config, models, sidecar
+
+_CHUNK = 10_000
+
+_NAME_PARTS = (
+    ("Nordic", "Baltic", "Alpine", "Coastal", "Urban", "Polar", "Granite", "Summit", "Harbor", "Meadow"),
+    ("Consulting", "Logistics", "Software", "Design", "Foods", "Energy", "Media", "Health", "Build", "Retail"),
+    ("AB", "HB", "Oy", "AS", "Ltd"),
+)
+_STREETS = ("Storgatan", "Kungsgatan", "Drottninggatan", "Sveavägen", "Hamngatan", "Vasagatan")
+_SERVICES = ("Konsulttjänst", "Support", "Licens", "Hosting", "Utbildning", "Resa", "Material", "Projektledning")
+_QUANTITIES = ("1", "1", "2", "3", "0.5", "1.5", "8", "10")
+_VAT_RATES = ("25", "12", "6", "0")
+_VAT_WEIGHTS = (70, 15, 10, 5)
+_STATUSES = ("paid", "sent", "draft")
+_STATUS_WEIGHTS = (60, 30, 10)
+
+
+def month_range(end_month: str, months: int) -> list[tuple[int, int]]:
+    """The ``months`` calendar months ending with ``end_month`` (``YYYY-MM``), oldest first."""
+    try:
+        year, month = (int(x) for x in end_month.split("-"))
+        date(year, month, 1)
+    except ValueError:
+        raise ValueError(f"invalid month: {end_month!r} (expected YYYY-MM)") from None
+    if months < 1:
+        raise ValueError("months must be at least 1")
+    index = year * 12 + month - 1 - (months - 1)
+    return [divmod(i, 12) for i in range(index, index + months)]
+
+
+def generate(
+    base: Path,
+    customers: int,
+    invoices: int,
+    lines_per_invoice: int = 1,
+    months: int = 12,
+    seed: int = 0,
+    end_month: Optional[str] = None,
+    codec: Optional[str] = None,
+) -> dict:
+    """Write a synthetic ledger to ``base`` and return counts and timings.
+
+    ``base`` must not contain a ledger.beancount yet. Customers are dated on
+    the first day of the range; invoices are spread uniformly over the
+    ``months`` months ending with ``end_month`` (default: this month), get ids
+    in date order and reference random customers.
+    """
+    if (base / "ledger.beancount").exists():
+        raise FileExistsError(f"{base / 'ledger.beancount'} already exists")
+    if invoices and not customers:
+        raise ValueError("invoices need at least one customer")
+    if lines_per_invoice < 1:
+        raise ValueError("lines_per_invoice must be at least 1")
+    span = month_range(end_month or date.today().strftime("%Y-%m"), months)
+    codec = codec or sidecar.default_codec()
+    started = time.perf_counter()
+    rng = random.Random(seed)
+
+    includes = base / "includes"
+    invoices_dir = includes / "invoices"
+    data_dir = invoices_dir / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    (base / ".arledge").mkdir(exist_ok=True)
+    (includes / "creditors.beancount").write_text("; creditors custom directives\n", encoding="utf-8")
+    (includes / "payment_accounts.beancount").write_text("; payment accounts custom directives\n", encoding="utf-8")
+
+    first_day = date(span[0][0], span[0][1] + 1, 1)
+    _write_customers(includes / "customers.beancount", customers, first_day, rng)
+    clock = time.perf_counter()
+    phases = {"customers": round(clock - started, 3)}
+
+    per_month = [0] * len(span)
+    for _ in range(invoices):
+        per_month[rng.randrange(len(span))] += 1
+    inv_id = 0
+    sidecar_bytes = 0
+    for (year, month0), count in zip(span, per_month):
+        month = month0 + 1
+        days = calendar.monthrange(year, month)[1]
+        # seconds into the month, sorted so ids follow dates
+        offsets = sorted(rng.randrange(days * 86400) for _ in range(count))
+        snippets = []
+        for offset in offsets:
+            inv_id += 1
+            created = datetime(year, month, 1, tzinfo=timezone.utc) + timedelta(seconds=offset)
+            inv = models.Invoice(
+                id=inv_id,
+                customer_id=rng.randint(1, customers),
+                status=rng.choices(_STATUSES, _STATUS_WEIGHTS)[0],
+                created_at=created,
+                due_at=created + timedelta(days=30),
+                lines=[_line(rng) for _ in range(lines_per_invoice)],
+            )
+            name = f"inv-{inv_id:04d}.json"
+            side_data = config.dump_model(inv)
+            raw = sidecar.encode(side_data, codec)
+            with open(data_dir / name, "wb") as f:
+                f.write(raw)
+            sidecar_bytes += len(raw)
+            # compact sidecars are the checksummed text itself
+            digest = sidecar.checksum_encoded(raw) if codec == "compact" else sidecar.checksum(side_data)
+            snippets.append(beancount_write._invoice_snippet(inv, name, digest)[1])
+        path = invoices_dir / f"{year:04d}-{month:02d}.beancount"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"; Invoices for {year:04d}-{month:02d}\n")
+            for i in range(0, len(snippets), _CHUNK):
+                f.write("\n" + "\n".join(snippets[i : i + _CHUNK]))
+    phases["invoices"] = round(time.perf_counter() - clock, 3)
+
+    (base / ".arledge" / "invoice_seq").write_text(f"{invoices + 1}\n", encoding="utf-8")
+    beancount_write._ensure_ledger_file(base)
+    return {
+        "basedir": str(base),
+        "customers": customers,
+        "invoices": invoices,
+        "lines": invoices * lines_per_invoice,
+        "months": [f"{y:04d}-{m + 1:02d}" for y, m in (span[0], span[-1])],
+        "month_files": len(span),
+        "sidecar_codec": codec,
+        "sidecar_bytes": sidecar_bytes,
+        "seed": seed,
+        "seconds": {**phases, "total": round(time.perf_counter() - started, 3)},
+    }
+
+
+def _write_customers(path: Path, count: int, created: date, rng: random.Random) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("; customers custom directives\n")
+        for start in range(1, count + 1, _CHUNK):
+            snippets = []
+            for cid in range(start, min(start + _CHUNK, count + 1)):
+                name = " ".join(rng.choice(parts) for parts in _NAME_PARTS)
+                c = models.Customer(
+                    id=cid,
+                    name=f"{name} {cid}",
+                    email=f"billing{cid}@example.com",
+                    address=f"{rng.choice(_STREETS)} {rng.randint(1, 120)}, {rng.randint(10000, 99999)} Stockholm",
+                )
+                snippets.append(beancount_write._customer_snippet(c, created))
+            f.write("\n" + "\n".join(snippets))
+
+
+def _line(rng: random.Random) -> dict:
+    cents = rng.randint(100, 250_000)
+    return {
+        "description": rng.choice(_SERVICES),
+        "quantity": rng.choice(_QUANTITIES),
+        "unit_price": f"{cents // 100}.{cents % 100:02d}",
+        "vat_rate": rng.choices(_VAT_RATES, _VAT_WEIGHTS)[0],
+    }
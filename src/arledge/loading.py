@@ -0,0 +1,109 @@
+"""Beancount load profiles used by arledge's reads.
+
+``beancount.loader.load_file`` parses the ledger and then books every
+transaction, runs the plugins the ledger declares and validates the result.
+arledge's store only reads directive dates, narrations and metadata, so it
+does not need the later phases. The profile picks how far loading
+goes:
+
+- ``full``: everything ``load_file`` does (beancount's pickle cache
+  included).
+- ``parse``: parse and book (amounts are interpolated); no plugins, no
+  validation.
+- ``arledge``: parse only; no booking, plugins or validation. This is the
+  default. The entries are the directives exactly as written, sorted like a
+  full load, which is what the mapping in arledge.beancount_store reads.
+  Files are read by arledge.scanner, which handles the directives arledge
+  writes itself and hands any other file to the beancount parser.
+
+The profile comes from the ARLEDGE_LOAD_PROFILE environment variable or
+``config.LOAD_PROFILE``. ``arledge validate --full`` runs the full loader
+(see arledge.validation).
+"""
+from __future__ import annotations
+import os
+import re
+from pathlib import Path
+from typing import List
+
+from . import config
+
+PROFILES = ("full", "parse", "arledge")
+
+_INCLUDE_RE = re.compile(r'^include\s+"([^"]+)"', re.MULTILINE)
+
+
+def current_profile() -> str:
+    """Return the configured load profile; raises ValueError for an unknown name."""
+    name = os.environ.get("ARLEDGE_LOAD_PROFILE") or config.LOAD_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"unknown load profile {name!r} (expected one of: {', '.join(PROFILES)})")
+    return name
+
+
+def load(ledger_file: Path, profile: str | None = None) -> tuple[List[object], list, dict]:
+    """Load ``ledger_file`` with ``profile`` (default: ``current_profile()``).
+
+    Returns ``(entries, errors, options)`` like ``beancount.loader.load_file``.
+    ``options["include"]`` lists every parsed file for all profiles.
+    """
+    from beancount import loader
+
+    profile = profile or current_profile()
+    if profile not in PROFILES:
+        raise ValueError(f"unknown load profile {profile!r} (expected one of: {', '.join(PROFILES)})")
+    if profile == "full":
+        drop_stale_pickle_cache(ledger_file)
+        return loader.load_file(str(ledger_file))
+
+    from beancount.core import data
+
+    if profile == "arledge":
+        from . import scanner
+
+        entries, errors, options = scanner.parse_recursive(ledger_file)
+    else:
+        entries, errors, options = loader._parse_recursive([(os.path.abspath(ledger_file), True)], None, None)
+    entries.sort(key=data.entry_sortkey)
+    if profile == "parse":
+        from beancount.parser import booking
+
+        entries, booking_errors = booking.book(entries, options)
+        errors.extend(booking_errors)
+    return entries, errors, options
+
+
+def drop_stale_pickle_cache(ledger_file: Path) -> bool:
+    """Delete beancount's pickle cache of ``ledger_file`` if an include glob may now match other files.
+
+    beancount (which writes the cache after loads taking a second or more)
+    only checks the files it loaded last time, so a file newly matching an
+    include glob, such as a new invoice month file, would stay invisible.
+    The cache is dropped when a directory holding a glob include of the
+    top-level file changed after the cache was written. Returns True if it
+    was deleted.
+    """
+    from beancount import loader
+
+    pattern = os.getenv("BEANCOUNT_LOAD_CACHE_FILENAME") or loader.PICKLE_CACHE_FILENAME
+    cache = loader.get_cache_filename(pattern, str(ledger_file))
+    try:
+        cached_ns = os.stat(cache).st_mtime_ns
+        text = Path(ledger_file).read_text(encoding="utf-8")
+    except OSError:
+        return False
+    base = os.path.dirname(os.path.abspath(ledger_file))
+    for inc in _INCLUDE_RE.findall(text):
+        if not any(c in inc for c in "*?["):
+            continue
+        try:
+            changed = os.stat(os.path.join(base, os.path.dirname(inc))).st_mtime_ns >= cached_ns
+        except OSError:
+            changed = True
+        if changed:
+            try:
+                os.remove(cache)
+            except OSError:
+                return False
+            return True
+    return False
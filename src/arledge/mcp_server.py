@@ -7,12 +7,201 @@ for unit tests.
 """
 
 from __future__ import annotations
+import asyncio
+import functools
+import json
+import os
 import sys
-from typing import Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+# upper bounds (ms) of the latency histogram buckets; the last is unbounded
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+
+
+class _ToolStats:
+    __slots__ = ("calls", "errors", "timeouts", "total_ms", "run_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.total_ms = 0.0
+        self.run_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding quantile ``q`` (None above the last bound)."""
+        if not self.calls:
+            return None
+        rank = q * self.calls
+        seen = 0
+        for bound, n in zip(LATENCY_BUCKETS_MS, self.buckets):
+            seen += n
+            if seen >= rank:
+                return float(bound)
+        return None
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "mean_ms": round(self.total_ms / self.calls, 3) if self.calls else None,
+            "max_ms": round(self.max_ms, 3),
+            # time queued behind other calls is total minus run
+            "run_ms_total": round(self.run_ms, 3),
+            "total_ms": round(self.total_ms, 3),
+            "p50_ms_le": self.quantile(0.5),
+            "p90_ms_le": self.quantile(0.9),
+            "p99_ms_le": self.quantile(0.99),
+            "histogram": {
+                **{f"le_{b}": n for b, n in zip(LATENCY_BUCKETS_MS, self.buckets)},
+                "inf": self.buckets[-1],
+            },
+        }
+
+
+class ServerStats:
+    """Runtime metrics of one MCP server: per-tool counters and latency histograms.
+
+    Latency is measured from the call arriving at the dispatcher to its
+    result, so it includes time queued for a worker; ``run_ms_total`` is the
+    time spent running the tool body. ``snapshot()`` adds the cache counters
+    of arledge.snapshot (ledger hits, follows, reloads and sidecar reads).
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._tools: dict[str, _ToolStats] = {}
+
+    def record(self, tool: str, seconds: float, run_seconds: float, error: bool = False, timeout: bool = False) -> None:
+        ms = seconds * 1000
+        with self._lock:
+            st = self._tools.get(tool)
+            if st is None:
+                st = self._tools[tool] = _ToolStats()
+            st.calls += 1
+            st.errors += error
+            st.timeouts += timeout
+            st.total_ms += ms
+            st.run_ms += run_seconds * 1000
+            st.max_ms = max(st.max_ms, ms)
+            i = 0
+            while i < len(LATENCY_BUCKETS_MS) and ms > LATENCY_BUCKETS_MS[i]:
+                i += 1
+            st.buckets[i] += 1
+
+    def snapshot(self) -> dict:
+        from . import snapshot
+
+        with self._lock:
+            tools = {name: st.to_dict() for name, st in sorted(self._tools.items())}
+        return {
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - self.started, 3),
+            "calls": sum(t["calls"] for t in tools.values()),
+            "tools": tools,
+            "cache": snapshot.stats(),
+        }
+
+    def dump(self, path: Path) -> None:
+        """Write ``snapshot()`` as JSON to ``path``, replacing it atomically."""
+        path = Path(path)
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_text(json.dumps(self.snapshot(), ensure_ascii=False) + "\n", encoding="utf-8")
+        os.replace(tmp, path)
+
+    def dump_every(self, path: Path, interval: float) -> threading.Event:
+        """Dump to ``path`` every ``interval`` seconds on a daemon thread; set the returned event to stop."""
+        stop = threading.Event()
+
+        def loop():
+            while not stop.wait(interval):
+                try:
+                    self.dump(path)
+                except OSError as e:
+                    print(f"Failed to write MCP stats to {path}: {e}", file=sys.stderr)
+
+        threading.Thread(target=loop, name="arledge-stats", daemon=True).start()
+        return stop
+
+
+class _Dispatcher:
+    """Run blocking tool bodies off the event loop.
+
+    Read tools share a pool of ``read_workers`` threads (calls beyond that
+    queue); write tools go through a single writer thread so ledger appends,
+    id allocation and sidecar writes never interleave. Threads rather than
+    processes are used so every worker shares the resident ledger snapshot.
+    """
+
+    def __init__(self, read_workers: int, timeout: float, stats: Optional[ServerStats] = None):
+        self.stats = stats
+        self.readers = ThreadPoolExecutor(max_workers=max(1, read_workers), thread_name_prefix="arledge-read")
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="arledge-write")
+        self.timeout = timeout if timeout and timeout > 0 else None
+
+    def read(self, fn: Callable[..., Any]) -> Callable[..., Any]:
+        return self._offload(fn, self.readers)
+
+    def write(self, fn: Callable[..., Any]) -> Callable[..., Any]:
+        return self._offload(fn, self.writer)
+
+    def _offload(self, fn: Callable[..., Any], executor: ThreadPoolExecutor) -> Callable[..., Any]:
+        # functools.wraps keeps the signature FastMCP derives the tool schema from
+        @functools.wraps(fn)
+        async def tool(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            run = [0.0]
+
+            def timed():
+                t = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    run[0] = time.perf_counter() - t
+
+            started = time.perf_counter()
+            error = timeout = False
+            fut = loop.run_in_executor(executor, timed)
+            try:
+                if self.timeout is None:
+                    return await fut
+                return await asyncio.wait_for(fut, self.timeout)
+            except asyncio.TimeoutError:
+                error = timeout = True
+                raise TimeoutError(f"{fn.__name__} timed out after {self.timeout:g}s") from None
+            except BaseException:
+                error = True
+                raise
+            finally:
+                if self.stats is not None:
+                    self.stats.record(fn.__name__, time.perf_counter() - started, run[0], error, timeout)
+
+        return tool
+
+
+def _batch_item(key: str, value: Any, result: Any) -> dict:
+    """Per-item entry of a batch tool result: ``{key, ok, result | error}``."""
+    if isinstance(result, Exception):
+        return {key: value, "ok": False, "error": str(result)}
+    return {key: value, "ok": True, "result": result}
 
 
 def start_mcp_stdio_server(
-    name: Optional[str] = None, json_response: bool = True, dry_run: bool = False
+    name: Optional[str] = None,
+    json_response: bool = True,
+    dry_run: bool = False,
+    read_workers: Optional[int] = None,
+    request_timeout: Optional[float] = None,
+    stats_file: Optional[str] = None,
+    stats_interval: Optional[float] = None,
 ):
     """Start an MCP stdio server using FastMCP.
 
@@ -20,6 +209,9 @@ def start_mcp_stdio_server(
     - name: Optional server name displayed in logs.
     - json_response: Hint for whether JSON responses are preferred (kept for API parity).
     - dry_run: If True, validate imports and configuration but do not block or start the server.
+    - read_workers / request_timeout: Override config.MCP_READ_WORKERS / config.MCP_REQUEST_TIMEOUT.
+    - stats_file / stats_interval: Override config.MCP_STATS_FILE / config.MCP_STATS_INTERVAL;
+      with a file, the `server_stats` result is written to it periodically and on exit.
     """
     server_name = name or "Arledge MCP"
     if dry_run:
@@ -34,6 +226,48 @@ def start_mcp_stdio_server(
             file=sys.stderr,
         )
 
+    # Keep the parsed ledger, indexes and sidecars resident between tool calls
+    from . import snapshot
+
+    from . import config
+
+    snapshot.enable()
+    stats = ServerStats()
+    mcp = create_mcp_server(server_name, read_workers=read_workers, request_timeout=request_timeout, stats=stats)
+    stats_file = stats_file or config.MCP_STATS_FILE
+    stop = None
+    if stats_file:
+        interval = config.MCP_STATS_INTERVAL if stats_interval is None else stats_interval
+        stop = stats.dump_every(Path(stats_file), interval)
+
+    print("✅ MCP stdio server has started", file=sys.stderr)
+    try:
+        # FastMCP.run() blocks, serving requests over stdin/stdout
+        mcp.run()
+    finally:
+        if stop is not None:
+            stop.set()
+            stats.dump(Path(stats_file))
+
+
+def create_mcp_server(
+    name: str = "Arledge MCP",
+    read_workers: Optional[int] = None,
+    request_timeout: Optional[float] = None,
+    stats: Optional[ServerStats] = None,
+):
+    """Build the FastMCP server with all arledge tools registered (does not run it).
+
+    Reads go through arledge.beancount_store; when the snapshot cache is
+    enabled (as `start_mcp_stdio_server` does) repeated reads are served from
+    memory and re-validated against the files on disk on every call, and the
+    server's own writes update the cached snapshot in place.
+
+    Tools touching the ledger are async and run their blocking work on a
+    worker thread (see `_Dispatcher`), so a slow call does not stall `ping`
+    or other requests. Their calls are recorded in ``stats`` (a new
+    ServerStats unless given), which the `server_stats` tool returns.
+    """
     try:
         # Lazy import the official FastMCP stdio implementation
         from mcp.server.fastmcp import FastMCP
@@ -41,7 +275,31 @@ def start_mcp_stdio_server(
         print(f"Failed to import FastMCP from mcp package: {e}", file=sys.stderr)
         raise
 
-    mcp = FastMCP(server_name)
+    mcp = FastMCP(name)
+
+    # Lazy-import application modules to avoid introducing runtime deps
+    from . import models, config
+    from . import beancount_store
+    from . import beancount_write
+
+    stats = stats if stats is not None else ServerStats()
+    dispatch = _Dispatcher(
+        config.MCP_READ_WORKERS if read_workers is None else read_workers,
+        config.MCP_REQUEST_TIMEOUT if request_timeout is None else request_timeout,
+        stats,
+    )
+
+    def _listing(kind, limit, cursor, fields):
+        from . import paging
+
+        page = paging.list_page(kind, limit=limit, cursor=cursor, fields=fields)
+        return page if limit is not None or cursor is not None else page["items"]
+
+    def read_tool(fn):
+        return mcp.tool()(dispatch.read(fn))
+
+    def write_tool(fn):
+        return mcp.tool()(dispatch.write(fn))
 
     # Register a tiny health check tool so the server is minimally useful.
     @mcp.tool()
@@ -49,18 +307,13 @@ def start_mcp_stdio_server(
         """Health-check tool; returns the string 'pong'."""
         return "pong"
 
-    # Lazy-import application modules to avoid introducing runtime deps
-    from . import models, config
-    from . import beancount_store
-    from . import beancount_write
-
     @mcp.tool()
     def database_initialize() -> str:
         """Initialize the beancount layout (mirrors `ledger init`)."""
         # This is a no-op: the CLI `init` command handles layout creation. Return hint.
         return "Use `ledger init` to initialize beancount layout"
 
-    @mcp.tool()
+    @write_tool
     def customer_create(
         model: object | None = None,
         model_file: str | None = None,
@@ -100,13 +353,19 @@ def start_mcp_stdio_server(
         created = beancount_write.create_customer(model_obj)
         return config.dump_model(created)
 
-    @mcp.tool()
-    def customer_list() -> list:
-        """Return all customers as a list of JSON-serializable dicts."""
+    @read_tool
+    def customer_list(limit: int | None = None, cursor: str | None = None, fields: list[str] | None = None):
+        """Return customers as a list of JSON-serializable dicts.
+
+        With `limit`/`cursor` returns a page `{"items", "next_cursor"}`;
+        `fields` projects each item (see `invoice_list`).
+        """
+        if limit is not None or cursor is not None or fields is not None:
+            return _listing("customer", limit, cursor, fields)
         customers = beancount_store.list_customers()
         return [config.dump_model(c) for c in customers]
 
-    @mcp.tool()
+    @write_tool
     def creditor_create(
         model: object | None = None,
         model_file: str | None = None,
@@ -138,13 +397,62 @@ def start_mcp_stdio_server(
         created = beancount_write.create_creditor(model_obj)
         return config.dump_model(created)
 
-    @mcp.tool()
-    def creditor_list() -> list:
-        """Return all creditors as a list of JSON-serializable dicts."""
+    @read_tool
+    def customer_get_many(customer_ids: list[int]) -> list:
+        """Return several customers resolved against one ledger snapshot.
+
+        The result has one entry per requested id, in request order:
+        `{"id", "ok": true, "result": {...}}` or `{"id", "ok": false, "error"}`.
+        """
+        found = beancount_store.get_customers(customer_ids)
+        return [
+            _batch_item("id", cid, config.dump_model(found[cid]) if cid in found else ValueError("Customer not found"))
+            for cid in customer_ids
+        ]
+
+    def _validate_many(model_cls, items: list) -> list:
+        res = []
+        for item in items:
+            try:
+                res.append(item if isinstance(item, model_cls) else model_cls.model_validate(item))
+            except Exception as e:
+                res.append(e)
+        return res
+
+    def _create_many(model_cls, items: list, create_fn, dump) -> list:
+        parsed = _validate_many(model_cls, items)
+        valid = [m for m in parsed if not isinstance(m, Exception)]
+        created = iter(create_fn(valid) if valid else [])
+        out = []
+        for i, m in enumerate(parsed):
+            r = m if isinstance(m, Exception) else next(created)
+            out.append(_batch_item("index", i, r if isinstance(r, Exception) else dump(r)))
+        return out
+
+    @write_tool
+    def customer_create_many(items: list[object]) -> list:
+        """Create several Customers with a single ledger append.
+
+        `items` are decoded Customer models (dicts), each validated on its
+        own. The result has one entry per input item, in order:
+        `{"index", "ok": true, "result": {...}}` or `{"index", "ok": false,
+        "error"}`; failed items are not written.
+        """
+        return _create_many(models.Customer, items, beancount_write.create_customers, config.dump_model)
+
+    @read_tool
+    def creditor_list(limit: int | None = None, cursor: str | None = None, fields: list[str] | None = None):
+        """Return creditors as a list of JSON-serializable dicts.
+
+        With `limit`/`cursor` returns a page `{"items", "next_cursor"}`;
+        `fields` projects each item (see `invoice_list`).
+        """
+        if limit is not None or cursor is not None or fields is not None:
+            return _listing("creditor", limit, cursor, fields)
         creds = beancount_store.list_creditors()
         return [config.dump_model(c) for c in creds]
 
-    @mcp.tool()
+    @read_tool
     def creditor_view(creditor_id: int):
         """Return a single creditor by id as a JSON-serializable dict."""
         c = beancount_store.get_creditor(creditor_id)
@@ -152,7 +460,7 @@ def start_mcp_stdio_server(
             raise ValueError("Creditor not found")
         return config.dump_model(c)
 
-    @mcp.tool()
+    @write_tool
     def creditor_account_create(
         model: object | None = None,
         model_file: str | None = None,
@@ -184,13 +492,13 @@ def start_mcp_stdio_server(
         created = beancount_write.create_payment_account(model_obj)
         return config.dump_model(created)
 
-    @mcp.tool()
+    @read_tool
     def creditor_account_list(creditor_id: int | None = None) -> list:
         """List payment accounts; optionally filter by creditor_id."""
         rows = beancount_store.list_payment_accounts(creditor_id=creditor_id)
         return [config.dump_model(r) for r in rows]
 
-    @mcp.tool()
+    @write_tool
     def invoice_create(
         model: object | None = None,
         model_file: str | None = None,
@@ -224,13 +532,22 @@ def start_mcp_stdio_server(
         out["invoice_number"] = beancount_store.format_invoice_number(created.id)
         return out
 
-    @mcp.tool()
-    def invoice_list() -> list:
-        """Return all invoices as a list of JSON-serializable dicts."""
+    @read_tool
+    def invoice_list(limit: int | None = None, cursor: str | None = None, fields: list[str] | None = None):
+        """Return invoices (newest first) as a list of JSON-serializable dicts.
+
+        Pagination: pass `limit` to get a page `{"items": [...], "next_cursor":
+        str | null}` and pass `next_cursor` back as `cursor` for the next page.
+        A cursor is rejected once the ledger has changed; restart without it.
+        `fields` (e.g. ["id", "customer_id", "total"]) keeps only those keys;
+        invoice lines are not loaded unless lines or totals are requested.
+        """
+        if limit is not None or cursor is not None or fields is not None:
+            return _listing("invoice", limit, cursor, fields)
         invs = beancount_store.list_invoices()
         return [config.dump_model(inv) for inv in invs]
 
-    @mcp.tool()
+    @read_tool
     def invoice_view(invoice_id: int):
         """Return a single invoice by id as a JSON-serializable dict."""
         inv = beancount_store.get_invoice(invoice_id)
@@ -238,7 +555,34 @@ def start_mcp_stdio_server(
             raise ValueError("Invoice not found")
         return config.dump_model(inv)
 
-    @mcp.tool()
+    @read_tool
+    def invoice_view_many(invoice_ids: list[int]) -> list:
+        """Return several invoices resolved against one ledger snapshot.
+
+        Only the requested invoices' sidecars are read. The result has one
+        entry per requested id, in request order: `{"id", "ok": true,
+        "result": {...}}` or `{"id", "ok": false, "error"}`.
+        """
+        found = beancount_store.get_invoices(invoice_ids)
+        return [
+            _batch_item("id", iid, config.dump_model(found[iid]) if iid in found else ValueError("Invoice not found"))
+            for iid in invoice_ids
+        ]
+
+    def _dump_created_invoice(inv) -> dict:
+        out = config.dump_model(inv)
+        out["invoice_number"] = beancount_store.format_invoice_number(inv.id)
+        return out
+
+    @write_tool
+    def invoice_create_many(items: list[object]) -> list:
+        """Create several Invoices with one id allocation and one append per month file.
+
+        Result entries follow `customer_create_many`.
+        """
+        return _create_many(models.Invoice, items, beancount_write.create_invoices, _dump_created_invoice)
+
+    @read_tool
     def invoice_export(invoice_id: int, fmt: str = "json", path: str | None = None):
         """Export an invoice to JSON and return the exported file path."""
         if fmt != "json":
@@ -266,6 +610,43 @@ def start_mcp_stdio_server(
             raise ValueError("Unknown schema name")
         return mapping[name].model_json_schema()
 
+    def _changes(since: str | None) -> str:
+        from . import watch
+
+        feed = watch.Feed(since)
+        events = list(feed.poll()) if since is not None else []
+        return json.dumps({"events": events, "token": feed.token()}, ensure_ascii=False)
+
+    @mcp.resource("arledge://changes", mime_type="application/json")
+    @dispatch.read
+    def changes_position() -> str:
+        """Current change-feed position: `{"events": [], "token"}`.
+
+        Read `arledge://changes/{token}` later to get what was written since.
+        """
+        return _changes(None)
+
+    @mcp.resource("arledge://changes/{token}", mime_type="application/json")
+    @dispatch.read
+    def changes_since(token: str) -> str:
+        """Customers, creditors, payment accounts and invoices written after `token`.
+
+        Returns `{"events": [...], "token"}` (events as printed by `arledge
+        watch`); read again with the returned token to continue.
+        """
+        return _changes(token)
+
+    @mcp.tool()
+    def server_stats() -> dict:
+        """Runtime metrics of this server since it started.
+
+        Per ledger tool: calls, errors, timeouts, mean/max latency and a
+        latency histogram (`le_<ms>` buckets; `p50_ms_le` etc. are bucket
+        bounds). `cache` holds snapshot hits, follows, full loads with their
+        durations, and sidecar cache hits and reads.
+        """
+        return stats.snapshot()
+
     @mcp.tool()
     def instructions():
         """Return brief agent-facing instructions describing CLI machine I/O conventions."""
@@ -274,6 +655,4 @@ def start_mcp_stdio_server(
             "See CLI for full instructions."
         )
 
-    print("✅ MCP stdio server has started", file=sys.stderr)
-    # FastMCP.run() blocks, serving requests over stdin/stdout
-    mcp.run()
+    return mcp
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from decimal import Decimal, ROUND_HALF_UP
+from decimal import Decimal
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timezone
 
@@ -7,7 +7,7 @@ from pydantic import BaseModel, field_validator, model_validator, Field
 
 from . import __version__
 
-from . import config
+from . import config, totals
 
 
 class Creditor(BaseModel):
@@ -64,6 +64,10 @@ class Customer(BaseModel):
     address: Optional[str] = None
 
 
+# InvoiceLine fields set by compute_totals
+_LINE_COMPUTED = ("net", "vat", "line_total")
+
+
 class InvoiceLine(BaseModel):
     model_version: str = __version__
     description: str
@@ -76,24 +80,16 @@ class InvoiceLine(BaseModel):
 
     @field_validator("quantity", "unit_price", "vat_rate", mode="before")
     def _coerce_decimal(cls, v):
-        if isinstance(v, str):
-            return Decimal(v)
-        if isinstance(v, float):
-            return Decimal(str(v))
-        return v
+        return totals.coerce_decimal(v)
 
     @model_validator(mode="after")
     def compute_totals(self):
-        q = Decimal(self.quantity)
-        up = Decimal(self.unit_price)
-        net = (q * up).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-        vat = (net * (Decimal(self.vat_rate) / Decimal("100"))).quantize(
-            Decimal("0.01"), rounding=ROUND_HALF_UP
+        d = self.__dict__
+        d["net"], d["vat"], d["line_total"] = totals.line_amounts(
+            Decimal(self.quantity), Decimal(self.unit_price), Decimal(self.vat_rate)
         )
-        lt = (net + vat).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-        self.net = net
-        self.vat = vat
-        self.line_total = lt
+        # what plain attribute assignment would record, without its overhead
+        self.__pydantic_fields_set__.update(_LINE_COMPUTED)
         return self
 
 
@@ -128,14 +124,25 @@ class Invoice(BaseModel):
             l if isinstance(l, InvoiceLine) else InvoiceLine(**l) for l in self.lines
         ]
         self.lines = lines
-        subtotal = Decimal("0")
-        total_vat = Decimal("0")
-        for l in lines:
-            subtotal += Decimal(l.net)
-            total_vat += Decimal(l.vat)
-        self.subtotal = subtotal.quantize(Decimal("0.01"))
-        self.total_vat = total_vat.quantize(Decimal("0.01"))
-        self.total = (self.subtotal + self.total_vat).quantize(Decimal("0.01"))
+        self.subtotal, self.total_vat, self.total = totals.invoice_amounts(
+            (Decimal(l.net), Decimal(l.vat)) for l in lines
+        )
         if self.created_at is None:
             self.created_at = datetime.now(timezone.utc)
         return self
+
+
+def construct_trusted(cls, values: Dict[str, Any], fields_set: Optional[set] = None):
+    """Build a ``cls`` instance from already-validated ``values``, skipping validation.
+
+    For data arledge wrote itself and has verified (see the invoice sidecar
+    checksum in beancount_store). ``values`` must hold every field with its
+    final type; nothing is coerced, defaulted or recomputed. This is a
+    cheaper equivalent of ``cls.model_construct(_fields_set, **values)``.
+    """
+    m = cls.__new__(cls)
+    object.__setattr__(m, "__dict__", values)
+    object.__setattr__(m, "__pydantic_fields_set__", set(values) if fields_set is None else fields_set)
+    object.__setattr__(m, "__pydantic_extra__", None)
+    object.__setattr__(m, "__pydantic_private__", None)
+    return m
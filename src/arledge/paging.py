@@ -0,0 +1,120 @@
+"""Cursor pagination and field projection for list commands and MCP tools.
+
+A cursor is an opaque URL-safe token recording the digest of the ledger
+snapshot the first page was read from and the id of the last item returned.
+Pages are keyset-based (items after that id in the listing order), and a
+cursor presented after the ledger changed is rejected, so a client walking
+the pages sees one consistent state or restarts. Records are read as
+arledge.views objects, which serialize exactly like the models.
+"""
+from __future__ import annotations
+import base64
+import json
+from typing import Iterable, Iterator, Optional, Sequence
+
+# Invoice fields that require reading the invoice sidecar (line items and
+# the totals computed from them).
+LINE_FIELDS = frozenset({"lines", "subtotal", "total_vat", "total"})
+
+
+class CursorError(ValueError):
+    """Raised for malformed cursors or cursors from another ledger state."""
+
+
+def encode_cursor(digest: str, last_id: int) -> str:
+    raw = json.dumps([digest, last_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, digest: str) -> int:
+    """Return the last id recorded in ``cursor``; it must match ``digest``."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cur_digest, last_id = json.loads(raw)
+        last_id = int(last_id)
+    except Exception:
+        raise CursorError("Invalid cursor") from None
+    if cur_digest != digest:
+        raise CursorError("Stale cursor: the ledger changed since the first page; restart without a cursor")
+    return last_id
+
+
+def parse_fields(fields: Optional[Iterable[str] | str], model_cls) -> Optional[list[str]]:
+    """Normalize a projection (comma-separated string or list) against ``model_cls``.
+
+    Returns None when no projection was requested. Raises ValueError for
+    unknown field names.
+    """
+    if fields is None:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    names = [f.strip() for f in fields if f and f.strip()]
+    if not names:
+        return None
+    unknown = [f for f in names if f not in model_cls.model_fields]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    # keep request order, drop duplicates
+    return list(dict.fromkeys(names))
+
+
+def needs_lines(fields: Optional[Sequence[str]]) -> bool:
+    return fields is None or any(f in LINE_FIELDS for f in fields)
+
+
+def project(data: dict, fields: Optional[Sequence[str]]) -> dict:
+    if fields is None:
+        return data
+    return {f: data[f] for f in fields}
+
+
+# kind -> (beancount_store page function, iterator function, models class name)
+_KINDS = {
+    "customer": ("page_customers", "iter_customers", "Customer"),
+    "creditor": ("page_creditors", "iter_creditors", "Creditor"),
+    "invoice": ("page_invoices", "iter_invoices", "Invoice"),
+}
+
+
+def list_page(
+    kind: str,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[Iterable[str] | str] = None,
+) -> dict:
+    """Return one page of ``kind`` as ``{"items": [...], "next_cursor": str | None}``.
+
+    ``limit`` None returns everything after the cursor. Raises CursorError
+    for bad cursors and ValueError for bad arguments.
+    """
+    from . import beancount_store, config, models
+
+    page_fn_name, _, model_name = _KINDS[kind]
+    if limit is not None and limit < 1:
+        raise ValueError("limit must be at least 1")
+    fields = parse_fields(fields, getattr(models, model_name))
+    # one snapshot for the digest and the page, so the cursor matches the items
+    snap = beancount_store.current_snapshot()
+    digest = beancount_store.ledger_digest(snap)
+    after = decode_cursor(cursor, digest) if cursor else None
+    kwargs = {"with_lines": needs_lines(fields)} if kind == "invoice" else {}
+    items, more = getattr(beancount_store, page_fn_name)(limit=limit, after=after, view=True, snap=snap, **kwargs)
+    next_cursor = encode_cursor(digest, items[-1].id) if more and items else None
+    return {"items": [project(config.dump_model(m), fields) for m in items], "next_cursor": next_cursor}
+
+
+def iter_records(kind: str, fields: Optional[Iterable[str] | str] = None) -> Iterator[dict]:
+    """Return a generator of serialized (and projected) records of ``kind``.
+
+    Records are produced one at a time from the store iterators, so memory
+    use stays flat and the first record is available before the rest are
+    hydrated. ``fields`` is validated before the generator is returned.
+    """
+    from . import beancount_store, config, models
+
+    _, iter_fn_name, model_name = _KINDS[kind]
+    fields = parse_fields(fields, getattr(models, model_name))
+    kwargs = {"with_lines": needs_lines(fields)} if kind == "invoice" else {}
+    items = getattr(beancount_store, iter_fn_name)(view=True, **kwargs)
+    return (project(config.dump_model(m), fields) for m in items)
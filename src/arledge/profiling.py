@@ -0,0 +1,300 @@
+"""Per-phase timing spans for one command (ARLEDGE_PROFILE / ``--timings``).
+
+Spans are not written into the code paths they measure. ``start()`` replaces
+the functions listed in ``PHASES`` (ledger loading and parsing, the
+beancount_store readers, the beancount_write writers and their
+validate/append/fsync steps, sidecar I/O, ``config.dump_model``, output
+serialization, ``validate``) and pydantic validation of the models with
+timing wrappers, and ``finish()`` puts the originals back. A process that
+never enables profiling runs unchanged code, so the overhead when disabled
+is zero.
+
+Each span adds its wall time to a node keyed by its position in the call
+tree, so a function called 10,000 times under the same parent is one node
+with ``calls: 10000``. Nodes with children also report ``self_seconds``.
+Spans are recorded on the thread that called ``start()``; calls from other
+threads run unrecorded.
+
+Modes (``ARLEDGE_PROFILE`` or the ``--timings``/``--profile`` options):
+
+- ``timings`` (or ``1``): the JSON timing tree only.
+- ``cprofile``: also a cProfile dump (``.prof``, for pstats/snakeviz).
+- ``tracemalloc``: also the peak traced memory and a tracemalloc snapshot
+  (``.tracemalloc``, for ``tracemalloc.Snapshot.load``).
+
+Dumps go to ARLEDGE_PROFILE_DIR, default ``<basedir>/.arledge/profile``.
+"""
+from __future__ import annotations
+import functools
+import inspect
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+MODES = ("timings", "cprofile", "tracemalloc")
+
+# module (relative to arledge) -> attributes wrapped in a span named
+# "<module>.<attribute>"
+PHASES = {
+    "loading": ("load",),
+    "scanner": ("parse_recursive", "parse_tail", "parse_string"),
+    "snapshot": ("load", "read_sidecar"),
+    "beancount_store": (
+        "map_custom_to_customer",
+        "map_custom_to_creditor",
+        "map_custom_to_payment_account",
+        "_latest_custom_entries",
+        "_invoice_transactions",
+        "_map_invoice_transaction",
+        "_read_invoice_sidecar",
+        "write_index",
+        "list_customers",
+        "iter_customers",
+        "page_customers",
+        "get_customer",
+        "get_customers",
+        "list_creditors",
+        "iter_creditors",
+        "page_creditors",
+        "get_creditor",
+        "list_payment_accounts",
+        "list_invoices",
+        "page_invoices",
+        "iter_invoices",
+        "get_invoices",
+        "get_invoice",
+        "list_invoice_sidecars",
+        "invoice_sidecar_index",
+        "export_invoice_json",
+    ),
+    "beancount_write": (
+        "create_customer",
+        "update_customer",
+        "create_creditor",
+        "update_creditor",
+        "create_payment_account",
+        "create_invoice",
+        "update_invoice",
+        "create_customers",
+        "create_invoices",
+        "allocate_invoice_ids",
+        "_validate_snippet",
+        "_atomic_append",
+        "_atomic_write",
+        "_write_and_fsync",
+    ),
+    "sidecar": ("read", "read_verified", "write"),
+    "config": ("dump_model",),
+    "serialize": ("echo", "dumps"),
+    "validation": ("run",),
+}
+
+# pydantic entry points timed per model class as "pydantic.<Class>"
+MODELS = ("Customer", "Creditor", "PaymentAccount", "Invoice", "InvoiceLine")
+_MODEL_METHODS = ("model_validate", "model_validate_json", "__init__")
+
+_local = threading.local()
+_active: Optional["_Session"] = None
+_lock = threading.Lock()
+
+
+class _Node:
+    __slots__ = ("name", "calls", "seconds", "children")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0
+        self.children: dict[str, _Node] = {}
+
+    def child(self, name: str) -> "_Node":
+        node = self.children.get(name)
+        if node is None:
+            node = self.children[name] = _Node(name)
+        return node
+
+    def to_dict(self) -> dict:
+        out = {"name": self.name, "calls": self.calls, "seconds": round(self.seconds, 6)}
+        if self.children:
+            out["self_seconds"] = round(self.seconds - sum(c.seconds for c in self.children.values()), 6)
+            out["children"] = [c.to_dict() for c in self.children.values()]
+        return out
+
+
+class _Session:
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.root = _Node("total")
+        self.command: Optional[str] = None
+        self.setup_seconds = 0.0
+        self.started = time.perf_counter()
+        self.restore: list = []
+        self.profiler = None
+
+
+def mode_from_env() -> Optional[str]:
+    """Return the mode requested by ARLEDGE_PROFILE, or None; raises ValueError for an unknown value."""
+    value = os.environ.get("ARLEDGE_PROFILE", "").strip().lower()
+    if value in ("", "0"):
+        return None
+    if value == "1":
+        return "timings"
+    if value not in MODES:
+        raise ValueError(f"unknown ARLEDGE_PROFILE {value!r} (expected 1 or one of: {', '.join(MODES)})")
+    return value
+
+
+def is_active() -> bool:
+    return _active is not None
+
+
+def start(mode: str = "timings") -> bool:
+    """Install the span wrappers; returns False (and does nothing) if profiling is already active."""
+    global _active
+    if mode not in MODES:
+        raise ValueError(f"unknown profile mode {mode!r} (expected one of: {', '.join(MODES)})")
+    with _lock:
+        if _active is not None:
+            return False
+        session = _Session(mode)
+        _install(session)
+        # installing imports the instrumented modules; keep that out of the tree
+        now = time.perf_counter()
+        session.setup_seconds, session.started = now - session.started, now
+        _local.stack = [session.root]
+        _active = session
+    if mode == "cprofile":
+        import cProfile
+
+        session.profiler = cProfile.Profile()
+        session.profiler.enable()
+    elif mode == "tracemalloc":
+        import tracemalloc
+
+        tracemalloc.start()
+    return True
+
+
+def finish(dump_dir: Optional[Path] = None) -> Optional[dict]:
+    """Remove the wrappers and return the timing tree (None if profiling was not active).
+
+    For the cprofile and tracemalloc modes the dump is written to
+    ``dump_dir`` (default ``profile_dir()``) and described under ``profile``.
+    """
+    global _active
+    with _lock:
+        session = _active
+        if session is None:
+            return None
+        _active = None
+        _local.stack = None
+        for restore in reversed(session.restore):
+            restore()
+    seconds = time.perf_counter() - session.started
+    session.root.calls = 1
+    session.root.seconds = seconds
+    tree = session.root.to_dict()
+    report = {
+        "command": session.command,
+        "seconds": tree["seconds"],
+        "setup_seconds": round(session.setup_seconds, 6),
+        "spans": tree.get("children", []),
+    }
+    if session.mode == "timings":
+        return report
+    dump_dir = dump_dir or profile_dir()
+    dump_dir.mkdir(parents=True, exist_ok=True)
+    stem = datetime.now().strftime("%Y%m%dT%H%M%S-%f") + "-" + "-".join((session.command or "arledge").split())
+    if session.mode == "cprofile":
+        session.profiler.disable()
+        path = dump_dir / f"{stem}.prof"
+        session.profiler.dump_stats(str(path))
+        report["profile"] = {"mode": "cprofile", "path": str(path)}
+    else:
+        import tracemalloc
+
+        current, peak = tracemalloc.get_traced_memory()
+        path = dump_dir / f"{stem}.tracemalloc"
+        tracemalloc.take_snapshot().dump(str(path))
+        tracemalloc.stop()
+        report["profile"] = {"mode": "tracemalloc", "path": str(path), "current_bytes": current, "peak_bytes": peak}
+    return report
+
+
+def profile_dir() -> Path:
+    env = os.environ.get("ARLEDGE_PROFILE_DIR")
+    if env:
+        return Path(env)
+    from . import config
+
+    return config.get_basedir() / ".arledge" / "profile"
+
+
+def _span(name: str, fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        stack = getattr(_local, "stack", None)
+        if not stack:
+            return fn(*args, **kwargs)
+        node = stack[-1].child(name)
+        node.calls += 1
+        stack.append(node)
+        t = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            node.seconds += time.perf_counter() - t
+            stack.pop()
+
+    return wrapper
+
+
+def _install(session: _Session) -> None:
+    import importlib
+
+    import click
+
+    for module_name, attrs in PHASES.items():
+        module = importlib.import_module(f"{__package__}.{module_name}")
+        for attr in attrs:
+            original = getattr(module, attr)
+            setattr(module, attr, _span(f"{module_name}.{attr}", original))
+            session.restore.append(functools.partial(setattr, module, attr, original))
+
+    from . import models
+
+    for cls_name in MODELS:
+        cls = getattr(models, cls_name)
+        for method in _MODEL_METHODS:
+            _wrap_model_method(session, cls, method, f"pydantic.{cls_name}")
+
+    original_invoke = click.Command.invoke
+
+    def invoke(self, ctx):
+        # leaf commands only: a group's invoke spans its subcommand already
+        if isinstance(self, click.Group):
+            return original_invoke(self, ctx)
+        path = ctx.command_path.split(" ", 1)
+        name = path[1] if len(path) > 1 else path[0]
+        if session.command is None:
+            session.command = name
+        return _span(f"command {name}", original_invoke)(self, ctx)
+
+    click.Command.invoke = invoke
+    session.restore.append(functools.partial(setattr, click.Command, "invoke", original_invoke))
+
+
+def _wrap_model_method(session: _Session, cls: type, method: str, name: str) -> None:
+    own = method in cls.__dict__
+    static = inspect.getattr_static(cls, method)
+    if isinstance(static, classmethod):
+        setattr(cls, method, classmethod(_span(name, static.__func__)))
+    else:
+        setattr(cls, method, _span(name, static))
+    if own:
+        session.restore.append(functools.partial(setattr, cls, method, static))
+    else:
+        session.restore.append(functools.partial(delattr, cls, method))
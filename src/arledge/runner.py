@@ -0,0 +1,110 @@
+"""Run arledge CLI commands in-process with captured stdout/stderr.
+
+Used by long-lived processes (`arledge serve`) to execute commands on behalf
+of thin clients while preserving the CLI contract: machine JSON on stdout,
+human messages on stderr and the process exit code.
+
+Stream redirection is process-global, so ``run_cli`` holds a lock for the
+duration of a command; commands (and therefore ledger writes) are executed
+one at a time. The lock is reentrant so a command may run others (`arledge
+batch`).
+"""
+from __future__ import annotations
+import contextlib
+import io
+import os
+import sys
+import threading
+from dataclasses import dataclass
+from typing import Mapping, Optional, Sequence
+
+_exec_lock = threading.RLock()
+
+
+@dataclass
+class CommandResult:
+    exit_code: int
+    stdout: str
+    stderr: str
+
+
+@contextlib.contextmanager
+def _temporary_env(env: Mapping[str, str], only_prefix: Optional[str] = None):
+    """Apply ``env``; with ``only_prefix``, also hide other variables starting with it."""
+    hidden = [k for k in os.environ if k.startswith(only_prefix) and k not in env] if only_prefix else []
+    saved = {k: os.environ.get(k) for k in [*env, *hidden]}
+    for k in hidden:
+        del os.environ[k]
+    os.environ.update(env)
+    try:
+        yield
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+
+@contextlib.contextmanager
+def _temporary_cwd(cwd: Optional[str]):
+    if not cwd:
+        yield
+        return
+    prev = os.getcwd()
+    os.chdir(cwd)
+    try:
+        yield
+    finally:
+        os.chdir(prev)
+
+
+def run_cli(
+    argv: Sequence[str],
+    cwd: Optional[str] = None,
+    env: Optional[Mapping[str, str]] = None,
+    stdin: str = "",
+    env_prefix: Optional[str] = None,
+) -> CommandResult:
+    """Execute ``arledge <argv>`` in this process and capture its output.
+
+    With ``env_prefix`` (e.g. ``"ARLEDGE_"``) ``env`` replaces every variable
+    with that prefix for the duration of the command, so settings of this
+    process that the caller did not pass do not apply.
+    """
+    import click
+    from .cli import cli
+
+    out = io.StringIO()
+    err = io.StringIO()
+    code = 0
+    with _exec_lock, _temporary_cwd(cwd), _temporary_env(env or {}, env_prefix):
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            saved_stdin = sys.stdin
+            sys.stdin = io.StringIO(stdin)
+            try:
+                rv = cli.main(args=list(argv), prog_name="arledge", standalone_mode=False)
+                if isinstance(rv, int):
+                    code = rv
+            except click.exceptions.Exit as e:
+                code = e.exit_code
+            except click.ClickException as e:
+                e.show(file=err)
+                code = e.exit_code
+            except click.exceptions.Abort:
+                err.write("Aborted!\n")
+                code = 1
+            except SystemExit as e:
+                if e.code is None:
+                    code = 0
+                elif isinstance(e.code, int):
+                    code = e.code
+                else:
+                    err.write(f"{e.code}\n")
+                    code = 1
+            except Exception as e:
+                err.write(f"Unhandled error: {e}\n")
+                code = 1
+            finally:
+                sys.stdin = saved_stdin
+    return CommandResult(exit_code=code, stdout=out.getvalue(), stderr=err.getvalue())
@@ -0,0 +1,289 @@
+"""Fast scanner for the beancount subset that arledge writes.
+
+Everything beancount_write appends has a narrow, known shape::
+
+    2026-10-19 custom "customer" "ACME"
+      customer_id: 1
+      email: "sales@acme.example"
+
+    2026-10-19 * "Invoice INV-0001"
+      invoice_id: 1
+      invoice_data: "includes/invoices/data/inv-0001.json"
+      Assets:Receivable:1        1250.00 SEK
+      Income:Services              -1000.00 SEK
+
+``scan_text`` recognizes exactly this subset (single-line quoted strings
+without escapes, plain decimal numbers, explicit posting amounts, blank and
+``;`` comment lines) with a few regular expressions and builds the same
+beancount directives, metadata and display context the beancount parser
+would. Anything else in a file, including text beancount would reject,
+makes the whole file go to ``beancount.parser.parser.parse_file`` instead,
+so the scanner never has to reproduce beancount's error reporting.
+
+``parse_recursive`` follows the includes of a ledger like
+``beancount.loader`` does (same order, globbing, duplicate and missing-file
+errors) and reads each file through a memory map. It is used by the
+``arledge`` load profile (see arledge.loading).
+"""
+from __future__ import annotations
+import copy
+import datetime
+import gc
+import glob
+import mmap
+import os
+import re
+from decimal import Decimal
+from typing import List, Optional
+
+_GAP = re.compile(r"(?:[ \t]*\n|;[^\n]*\n)*")
+_ENTRY = re.compile(
+    r'([0-9]{4})-([0-9]{2})-([0-9]{2})[ \t]+'
+    r'(?:custom[ \t]+"([^"\\\n]*)"[ \t]+"([^"\\\n]*)"|([*!])[ \t]+"([^"\\\n]*)")[ \t]*\n'
+    r"((?:[ \t]+[^ \t\n][^\n]*\n)*)"
+)
+# One metadata line (key, string | sign, number) or posting line (account,
+# sign, integer digits, fraction digits, currency) per match.
+_LINE = re.compile(
+    r'^[ \t]+(?:([a-z][a-zA-Z0-9_-]+):[ \t]+(?:"([^"\\\n]*)"|(-?)([0-9]+(?:\.[0-9]+)?))'
+    r"|((?:Assets|Liabilities|Equity|Income|Expenses)(?::[A-Z0-9][A-Za-z0-9-]*)+)"
+    r"[ \t]+(-?)([0-9]+)(?:\.([0-9]+))?[ \t]+([A-Z][A-Z0-9]{1,23}))[ \t]*\n",
+    re.MULTILINE,
+)
+
+
+def scan_text(text: str, filename: str, lineno: int = 1) -> Optional[tuple[list, object]]:
+    """Scan ``text`` (the content of ``filename``) into ``(entries, dcontext)``.
+
+    ``lineno`` is the line number of the first line of ``text`` (for text
+    appended to a file). Entries are in file order. Returns None as soon as
+    anything outside the recognized subset is found.
+    """
+    # The directives hold no reference cycles; cyclic GC passes over the
+    # growing entry list would only cost time (about 40% of a large file).
+    if not gc.isenabled():
+        return _scan(text, filename, lineno)
+    gc.disable()
+    try:
+        return _scan(text, filename, lineno)
+    finally:
+        gc.enable()
+
+
+def _scan(text: str, filename: str, lineno: int) -> Optional[tuple[list, object]]:
+    from beancount.core import data
+    from beancount.core.amount import Amount
+    from beancount.core.display_context import DisplayContext
+    from beancount.parser.grammar import ValueType
+
+    if text and not text.endswith("\n"):
+        text += "\n"
+    Transaction, Custom, Posting, EMPTY = data.Transaction, data.Custom, data.Posting, data.EMPTY_SET
+    entries: list = []
+    dates: dict = {}
+    numbers: dict = {}
+    # posting amounts by (currency, integer digits, fraction digits): numbers
+    # of one shape update the display context identically
+    shapes: dict = {}
+    gap, entry, lines = _GAP.match, _ENTRY.match, _LINE.findall
+    pos, end = 0, len(text)
+    while True:
+        g = gap(text, pos).end()
+        lineno += text.count("\n", pos, g)
+        pos = g
+        if pos >= end:
+            break
+        m = entry(text, pos)
+        if m is None:
+            return None
+        y, mo, d, ctype, cvalue, flag, narration, body = m.groups()
+        key = (y, mo, d)
+        date = dates.get(key)
+        if date is None:
+            try:
+                date = dates[key] = datetime.date(int(y), int(mo), int(d))
+            except ValueError:
+                return None
+        meta = {"filename": filename, "lineno": lineno}
+        n = lineno + 1
+        parsed = lines(body)
+        if len(parsed) != body.count("\n"):
+            return None
+        postings = []
+        for k, s, sign, digits, account, psign, whole, frac, currency in parsed:
+            if k:
+                if postings or k in meta:
+                    return None
+                if s or not digits:
+                    meta[k] = s
+                else:
+                    text_ = sign + digits
+                    number = numbers.get(text_)
+                    if number is None:
+                        # the parser applies unary minus, so "-0.00" is Decimal("0.00")
+                        number = numbers[text_] = -Decimal(digits) if sign else Decimal(digits)
+                    meta[k] = number
+            elif flag:
+                text_ = f"{psign}{whole}.{frac}" if frac else psign + whole
+                number = numbers.get(text_)
+                if number is None:
+                    number = numbers[text_] = -Decimal(text_[1:]) if psign else Decimal(text_)
+                shape = (currency, len(whole.lstrip("0")), len(frac))
+                seen = shapes.get(shape)
+                if seen is None:
+                    shapes[shape] = [number, 1]
+                else:
+                    seen[1] += 1
+                postings.append(Posting(account, Amount(number, currency), None, None, None, {"filename": filename, "lineno": n}))
+            else:
+                return None
+            n += 1
+        if flag:
+            entries.append(Transaction(meta, date, flag, None, narration, EMPTY, EMPTY, postings))
+        else:
+            entries.append(Custom(meta, date, ctype, [ValueType(cvalue, str)]))
+        lineno = n
+        pos = m.end()
+    dcontext = DisplayContext()
+    for (currency, _, _), (number, count) in shapes.items():
+        dcontext.update(number, currency)
+        if count > 1:
+            # the remaining updates only add to the precision histogram
+            dcontext.ccontexts[currency].fractional_dist.hist[-number.as_tuple().exponent] += count - 1
+    return entries, dcontext
+
+
+def parse_tail(text: str, filename: str, lines_before: int) -> tuple[list, object]:
+    """Parse ``text`` appended after line ``lines_before`` of ``filename`` into ``(entries, dcontext)``.
+
+    Scanned if possible, otherwise parsed by beancount; either way the entry
+    metadata points at the real file and line numbers, so the entries sort
+    exactly like those of a fresh load. Raises ValueError if the text does
+    not parse on its own.
+    """
+    res = scan_text(text, filename, lines_before + 1)
+    if res is not None:
+        return res
+    from beancount.parser import parser
+
+    entries, errors, opts = parser.parse_string(text)
+    if errors:
+        raise ValueError(f"appended text does not parse: {errors}")
+    res = []
+    for e in entries:
+        meta = dict(e.meta or {})
+        meta["filename"] = filename
+        meta["lineno"] = lines_before + int(meta.get("lineno", 0))
+        e = e._replace(meta=meta)
+        postings = getattr(e, "postings", None)
+        if postings:
+            fixed = []
+            for p in postings:
+                pmeta = dict(p.meta or {})
+                pmeta["filename"] = filename
+                pmeta["lineno"] = lines_before + int(pmeta.get("lineno", 0))
+                fixed.append(p._replace(meta=pmeta))
+            e = e._replace(postings=fixed)
+        res.append(e)
+    return res, opts["dcontext"]
+
+
+def _read(filename: str) -> str:
+    with open(filename, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            return str(m, "utf-8")
+
+
+def parse_file(filename: str) -> tuple[List[object], list, dict]:
+    """Parse one file like ``parser.parse_file``: scanned if possible, otherwise by beancount."""
+    from beancount.parser import parser
+
+    try:
+        res = scan_text(_read(filename), filename)
+    except (OSError, ValueError):
+        res = None
+    if res is None:
+        return parser.parse_file(filename)
+    return _scanned(res, filename)
+
+
+def parse_string(text: str, filename: str) -> tuple[List[object], list, dict]:
+    """Like ``parse_file`` for ``text`` already read from ``filename``."""
+    from beancount.parser import parser
+
+    res = scan_text(text, filename)
+    if res is None:
+        return parser.parse_string(text, filename)
+    return _scanned(res, filename)
+
+
+def _scanned(res: tuple[list, object], filename: str) -> tuple[List[object], list, dict]:
+    from beancount.core import data
+    from beancount.parser import options
+
+    entries, dcontext = res
+    opts = copy.deepcopy(options.OPTIONS_DEFAULTS)
+    dcontext.set_commas(opts["render_commas"])
+    opts["dcontext"] = dcontext
+    opts["filename"] = filename
+    return sorted(entries, key=data.entry_sortkey), [], opts
+
+
+def parse_recursive(ledger_file) -> tuple[List[object], list, dict]:
+    """Parse ``ledger_file`` and its includes like beancount's loader, scanning where possible.
+
+    Returns ``(entries, errors, options)`` with entries unsorted across
+    files, exactly like ``beancount.loader._parse_recursive``.
+    """
+    from beancount.core import data
+    from beancount.loader import LoadError, aggregate_options_map
+    from beancount.parser import options, parser
+    from beancount.utils import encryption
+
+    entries: list = []
+    errors: list = []
+    options_map = None
+    other_options_map = []
+    stack = [os.path.abspath(ledger_file)]
+    seen = set()
+    while stack:
+        source = stack.pop(0)
+        is_top_level = options_map is None
+        cwd = os.path.dirname(source)
+        if encryption.is_encrypted_file(source):
+            # like beancount: no duplicate check, not listed in "include"
+            src_entries, src_errors, src_options = parser.parse_string(encryption.read_encrypted_file(source), source)
+        else:
+            filename = os.path.normpath(source)
+            if filename in seen:
+                errors.append(LoadError(data.new_metadata("<load>", 0), f'Duplicate filename parsed: "{filename}"'))
+                continue
+            if not os.path.exists(filename):
+                errors.append(LoadError(data.new_metadata("<load>", 0), f'File "{filename}" does not exist'))
+                continue
+            seen.add(filename)
+            src_entries, src_errors, src_options = parse_file(filename)
+            cwd = os.path.dirname(filename)
+        entries.extend(src_entries)
+        errors.extend(src_errors)
+        if is_top_level:
+            options_map = src_options
+        else:
+            other_options_map.append(src_options)
+        for include in src_options["include"]:
+            search = include if os.path.isabs(include) else os.path.join(cwd, include)
+            matched = glob.glob(search, recursive=True)
+            if not matched:
+                errors.append(
+                    LoadError(data.new_metadata("<load>", 0), f'File glob "{include}" does not match any files')
+                )
+            for name in matched:
+                if not os.path.isabs(name):
+                    name = os.path.join(cwd, name)
+                stack.append(os.path.normpath(name))
+    if options_map is None:
+        options_map = options.OPTIONS_DEFAULTS.copy()
+    options_map["include"] = sorted(seen)
+    return entries, errors, aggregate_options_map(options_map, other_options_map)
@@ -0,0 +1,73 @@
+"""Precomputed JSON Schemas of the models, for ``schema`` and ``--json-schema``.
+
+Building a schema needs pydantic and the models, which is most of the
+CLI's start-up cost, only to print a document that changes when the models
+do. The schemas are therefore generated once into ``_schemas.json`` next
+to this module and read from there; a test keeps the file in sync with
+``Model.model_json_schema()``. Regenerate it after changing a model with
+
+    python -m arledge.schemas
+
+A model missing from the file (or a missing file) falls back to building
+its schema live.
+"""
+from __future__ import annotations
+import json
+from pathlib import Path
+from typing import Dict, Optional
+
+ARTIFACT = Path(__file__).with_name("_schemas.json")
+
+# CLI schema names -> model class names
+NAMES = {
+    "customer": "Customer",
+    "creditor": "Creditor",
+    "account": "PaymentAccount",
+    "payment-account": "PaymentAccount",
+    "invoice": "Invoice",
+    "invoice-line": "InvoiceLine",
+}
+
+_cache: Optional[Dict[str, dict]] = None
+
+
+def build() -> Dict[str, dict]:
+    """Build the schemas of all named models from the models themselves."""
+    from . import models
+
+    return {m: getattr(models, m).model_json_schema() for m in dict.fromkeys(NAMES.values())}
+
+
+def _load() -> Dict[str, dict]:
+    global _cache
+    if _cache is None:
+        try:
+            _cache = json.loads(ARTIFACT.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            _cache = {}
+    return _cache
+
+
+def get(model_name: str) -> dict:
+    """Return the JSON Schema of model ``model_name`` (e.g. ``"Customer"``)."""
+    schema = _load().get(model_name)
+    if schema is None:
+        from . import models
+
+        schema = getattr(models, model_name).model_json_schema()
+    return schema
+
+
+def write(path: Path = ARTIFACT) -> Path:
+    """(Re)generate the schema artifact; returns its path.
+
+    Keys keep pydantic's order (model field order), which the CLI prints.
+    """
+    global _cache
+    path.write_text(json.dumps(build(), indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    _cache = None
+    return path
+
+
+if __name__ == "__main__":
+    print(write())
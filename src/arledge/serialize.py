@@ -0,0 +1,142 @@
+"""One-pass JSON serialization of arledge models for CLI output.
+
+``config.dump_model`` used to call ``model_dump()`` and then walk the result
+again in ``_serialize_value`` to stringify Decimals and datetimes before the
+CLI ran ``json.dumps`` over it. ``to_builtins`` produces the same
+JSON-ready structure in a single walk over the model attributes, using a
+cached field list per model class, and ``dumps``/``echo`` turn it into text.
+
+The output contract is unchanged: ``dumps(x)`` is byte-identical to
+``json.dumps(config.dump_model(x), ensure_ascii=False)`` for models (and to
+the equivalent for lists and dicts of models). See
+benchmarks/serialize_bench.py.
+
+Optional backend: with ``ARLEDGE_JSON_BACKEND=orjson`` (or
+``config.JSON_BACKEND``) and the ``orjson`` package installed, encoding is
+done by orjson. orjson has no separator option, so that output is compact
+(``{"a":1}``): the same JSON values, but not the same bytes. Without orjson
+the stdlib encoder is used.
+"""
+from __future__ import annotations
+import json
+import os
+import sys
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Optional, TextIO
+
+from . import config
+from .views import View
+
+BACKENDS = ("json", "orjson")
+
+_PLAIN = frozenset({str, int, bool, float, type(None)})
+
+# model class -> tuple of field names in declaration order (model_dump order),
+# or None for classes that are not plain pydantic models
+_fields_cache: dict[type, Optional[tuple[str, ...]]] = {}
+
+
+def _model_fields(cls: type) -> Optional[tuple[str, ...]]:
+    try:
+        return _fields_cache[cls]
+    except KeyError:
+        pass
+    fields = getattr(cls, "model_fields", None)
+    names = None
+    # Models allowing extra attributes or declaring computed fields are left
+    # to model_dump(), which knows how to include them.
+    if (
+        isinstance(fields, dict)
+        and getattr(cls, "model_config", {}).get("extra") != "allow"
+        and not getattr(cls, "model_computed_fields", None)
+    ):
+        names = tuple(fields)
+    _fields_cache[cls] = names
+    return names
+
+
+def to_builtins(v: Any) -> Any:
+    """Return ``v`` as JSON-ready builtins, equal to ``config.dump_model`` for models.
+
+    Decimals become ``config.decimal_to_str`` strings, datetimes
+    ``config.dt_to_iso_utc`` strings, models (and arledge.views views) dicts
+    of their fields and tuples lists. Other values are returned unchanged.
+    """
+    t = type(v)
+    if t in _PLAIN:
+        return v
+    if t is Decimal:
+        return config.decimal_to_str(v)
+    if t is list or t is tuple:
+        return [to_builtins(x) for x in v]
+    if t is dict:
+        return {k: to_builtins(x) for k, x in v.items()}
+    if isinstance(v, datetime):
+        return config.dt_to_iso_utc(v)
+    names = _model_fields(t)
+    if names is not None:
+        d = v.__dict__
+        return {k: to_builtins(d[k]) for k in names}
+    if isinstance(v, View):
+        return {k: to_builtins(getattr(v, k)) for k in t.__slots__}
+    if hasattr(v, "model_dump"):
+        return to_builtins(v.model_dump())
+    if isinstance(v, Decimal):
+        return config.decimal_to_str(v)
+    if isinstance(v, dict):
+        return {k: to_builtins(x) for k, x in v.items()}
+    if isinstance(v, (list, tuple)):
+        return [to_builtins(x) for x in v]
+    return v
+
+
+def backend() -> str:
+    """Return the configured JSON backend ("json" or "orjson")."""
+    name = os.environ.get("ARLEDGE_JSON_BACKEND") or config.JSON_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown JSON backend: {name} (expected one of {', '.join(BACKENDS)})")
+    return name
+
+
+def _orjson():
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+
+def dumps_bytes(v: Any) -> bytes:
+    """Serialize models (or lists/dicts of them) to UTF-8 JSON bytes."""
+    data = to_builtins(v)
+    if backend() == "orjson":
+        orjson = _orjson()
+        if orjson is not None:
+            return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def dumps(v: Any) -> str:
+    """Serialize models (or lists/dicts of them) to JSON text."""
+    return dumps_bytes(v).decode("utf-8")
+
+
+def echo(v: Any, stream: Optional[TextIO] = None) -> None:
+    """Write ``v`` as one line of JSON to ``stream`` (default stdout) and flush.
+
+    Bytes go straight to the stream's binary buffer when it has one (and is
+    UTF-8), skipping the text layer; otherwise the text is written.
+    """
+    stream = stream if stream is not None else sys.stdout
+    data = dumps_bytes(v) + b"\n"
+    buf = getattr(stream, "buffer", None)
+    encoding = (getattr(stream, "encoding", None) or "").lower().replace("-", "")
+    if buf is not None and encoding == "utf8":
+        # keep ordering with anything already written through the text layer
+        stream.flush()
+        buf.write(data)
+        buf.flush()
+    else:
+        stream.write(data.decode("utf-8"))
+        stream.flush()
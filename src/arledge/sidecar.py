@@ -0,0 +1,157 @@
+"""Invoice sidecar encoding: pluggable codecs with transparent decoding.
+
+Invoice lines live in JSON sidecar files under includes/invoices/data/. This
+module owns how those files are encoded on disk:
+
+- ``json``: pretty-printed JSON (``indent=2``), the legacy layout.
+- ``compact``: JSON without insignificant whitespace.
+- ``gzip``: compact JSON compressed with gzip (good for archived months).
+- ``lzma``: compact JSON compressed with xz/lzma (smallest, slower to write).
+
+The codec is recorded in each file itself: compressed files start with the
+gzip or xz magic header and plain files are JSON text. Readers sniff the
+header, so the ``invoice_data`` path referenced from the ledger never changes
+when a sidecar is converted between codecs.
+"""
+from __future__ import annotations
+import gzip
+import hashlib
+import json
+import lzma
+import os
+import uuid
+from pathlib import Path
+from typing import Any
+
+from . import config
+
+CODECS = ("json", "compact", "gzip", "lzma")
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_XZ_MAGIC = b"\xfd7zXZ\x00"
+
+
+def default_codec() -> str:
+    """Return the codec used for new sidecar writes.
+
+    Respects the ARLEDGE_SIDECAR_CODEC environment variable, falling back to
+    ``config.SIDECAR_CODEC``.
+    """
+    codec = os.environ.get("ARLEDGE_SIDECAR_CODEC") or config.SIDECAR_CODEC
+    if codec not in CODECS:
+        raise ValueError(f"Unknown sidecar codec: {codec}")
+    return codec
+
+
+def detect_codec(raw: bytes) -> str:
+    """Return the codec a sidecar payload was written with."""
+    if raw.startswith(_GZIP_MAGIC):
+        return "gzip"
+    if raw.startswith(_XZ_MAGIC):
+        return "lzma"
+    if raw[:2] in (b"{\n", b"[\n"):
+        return "json"
+    return "compact"
+
+
+def dumps_text(data: Any, codec: str) -> str:
+    """Return the JSON text layer for ``codec`` (before any compression)."""
+    if codec == "json":
+        return json.dumps(data, indent=2, ensure_ascii=False)
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def encode(data: Any, codec: str | None = None) -> bytes:
+    """Encode a JSON-serializable mapping into sidecar bytes."""
+    codec = codec or default_codec()
+    if codec not in CODECS:
+        raise ValueError(f"Unknown sidecar codec: {codec}")
+    payload = dumps_text(data, codec).encode("utf-8")
+    if codec == "gzip":
+        # mtime=0 keeps output deterministic for identical content
+        return gzip.compress(payload, compresslevel=6, mtime=0)
+    if codec == "lzma":
+        return lzma.compress(payload, preset=6)
+    return payload
+
+
+def decode_text(raw: bytes) -> bytes:
+    """Return the decompressed JSON text bytes of a sidecar payload."""
+    codec = detect_codec(raw)
+    if codec == "gzip":
+        return gzip.decompress(raw)
+    if codec == "lzma":
+        return lzma.decompress(raw)
+    return raw
+
+
+def decode(raw: bytes) -> Any:
+    """Decode sidecar bytes written with any supported codec."""
+    return json.loads(decode_text(raw))
+
+
+def read(path: Path | str) -> Any:
+    """Read and decode the sidecar at ``path``."""
+    with open(path, "rb") as f:
+        return decode(f.read())
+
+
+def checksum(data: Any) -> str:
+    """Content checksum of sidecar ``data``, independent of the codec.
+
+    The hash covers the compact JSON text, so converting a sidecar between
+    codecs keeps its checksum.
+    """
+    return checksum_encoded(dumps_text(data, "compact").encode("utf-8"))
+
+
+def checksum_encoded(raw: bytes) -> str:
+    """Checksum of sidecar content already encoded with the ``compact`` codec.
+
+    ``checksum_encoded(encode(data, "compact")) == checksum(data)``, without
+    encoding ``data`` a second time.
+    """
+    return "sha256:" + hashlib.sha256(raw).hexdigest()
+
+
+def read_verified(path: Path | str) -> tuple[Any, str]:
+    """Read the sidecar at ``path`` and return ``(data, checksum(data))``.
+
+    Compact text (the common case) is hashed as read, without re-encoding.
+    """
+    with open(path, "rb") as f:
+        text = decode_text(f.read())
+    data = json.loads(text)
+    if text[:2] in (b"{\n", b"[\n"):
+        return data, checksum(data)
+    return data, checksum_encoded(text)
+
+
+def write(path: Path, data: Any, codec: str | None = None) -> int:
+    """Atomically write ``data`` to ``path`` using ``codec``.
+
+    Writes to a temp file in the same directory, fsyncs and replaces the
+    target. Returns the number of bytes written.
+    """
+    raw = encode(data, codec)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.parent / f".{path.name}.tmp-{uuid.uuid4().hex}"
+    with open(tmp, "wb") as f:
+        f.write(raw)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return len(raw)
+
+
+def convert(path: Path, codec: str) -> tuple[int, int, bool]:
+    """Re-encode an existing sidecar with ``codec``.
+
+    Returns ``(bytes_before, bytes_after, changed)``. Files already using
+    ``codec`` are left untouched.
+    """
+    raw = path.read_bytes()
+    if detect_codec(raw) == codec:
+        return len(raw), len(raw), False
+    after = write(path, decode(raw), codec)
+    return len(raw), after, True
@@ -0,0 +1,544 @@
+"""Resident ledger snapshot cache for long-lived arledge processes.
+
+One-shot CLI invocations parse the ledger on every read. Long-lived processes
+(`arledge serve`, the MCP server) enable this cache so the parsed ledger,
+derived indexes and decoded invoice sidecars stay in memory between requests.
+
+Freshness is checked on every access by comparing a cheap fingerprint
+(``stat`` of every loaded include file plus the directories holding them, so
+new files matching an include glob are noticed) with the one recorded at load
+time. Files modified while a load was in progress are "racy" (as in git's
+index): their mtime may not change again, so such a snapshot is never reused.
+
+arledge only ever appends to include files. For parse-only loads
+(``incremental=True``) a snapshot also remembers each include file's size,
+line count and a checksum of its content; when other processes appended to
+files, only the appended bytes are parsed and merged (see ``_follow``). A
+file that shrank, was replaced (new inode), changed before the old end, or
+a changed top-level file or include listing makes the next read reload
+everything.
+
+The cache is disabled by default; callers opt in with ``enable()``.
+``stats()`` reports cache hits and misses, full loads and their durations,
+followed appends and sidecar reads since start-up (or ``reset_stats()``).
+"""
+from __future__ import annotations
+import hashlib
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable
+
+from . import config, scanner
+
+# Files whose mtime is this close to (or after) the start of a load may have
+# been modified during the load without a visible mtime change.
+_RACY_WINDOW_NS = 50_000_000
+
+_enabled = False
+_lock = threading.RLock()
+_snapshots: dict[str, "LedgerSnapshot"] = {}
+_sidecars: "OrderedDict[str, tuple[tuple, Any]]" = OrderedDict()
+_version = 0
+# counters behind stats(); updated with _lock held
+_counts = {
+    "hits": 0,
+    "follows": 0,
+    "follow_seconds": 0.0,
+    "loads": 0,
+    "reloads": 0,
+    "load_seconds": 0.0,
+    "load_max_seconds": 0.0,
+    "appends_merged": 0,
+    "dropped": 0,
+    "index_builds": 0,
+    "sidecar_hits": 0,
+    "sidecar_reads": 0,
+}
+
+
+def _key(path: Path | str) -> str:
+    return os.path.normpath(os.path.abspath(str(path)))
+
+
+def _stamp(path: str) -> tuple | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _is_racy(stamps: dict[str, tuple | None], started_ns: int) -> bool:
+    limit = started_ns - _RACY_WINDOW_NS
+    return any(s is not None and s[0] >= limit for s in stamps.values())
+
+
+class LedgerSnapshot:
+    """A parsed ledger plus the fingerprint of the files it was loaded from."""
+
+    def __init__(
+        self,
+        ledger_file: Path,
+        entries: list,
+        errors: list,
+        options: dict,
+        stamps: dict[str, tuple | None],
+        version: int,
+        reusable: bool,
+        tails: dict[str, tuple[int, int, int]] | None = None,
+        incremental: bool = False,
+    ):
+        self.ledger_file = ledger_file
+        self.entries = entries
+        self.errors = errors
+        self.options = options
+        self.stamps = stamps
+        self.version = version
+        self.reusable = reusable
+        # include file -> (size, crc32 of the content, line count) when
+        # appends may be followed incrementally
+        self.tails = tails
+        # loaded parse-only, so parsed appends can be merged into it
+        self.incremental = incremental
+        self._memo: dict[Any, tuple[Any, Any]] = {}
+
+    def digest(self) -> str:
+        """Short hash of the file stamps; changes whenever the loaded ledger does."""
+        h = hashlib.sha256(repr(sorted(self.stamps.items())).encode("utf-8"))
+        return h.hexdigest()[:16]
+
+    def is_fresh(self) -> bool:
+        if not self.reusable:
+            return False
+        return all(_stamp(p) == s for p, s in self.stamps.items())
+
+    def memo(self, key: Any, compute: Callable[[], Any], extend: Callable[[Any, list], Any] | None = None) -> Any:
+        """Return a value derived from this snapshot, computing it at most once.
+
+        Used for indexes (entries by custom type, invoice transactions by id).
+        ``extend(value, added)`` returns the value for the entries plus
+        ``added`` (sorted, all after the existing entries) without modifying
+        ``value``; with it the index survives appends instead of being
+        recomputed.
+        """
+        # Bind the memo dict first: if a concurrent ``note_append`` swaps in
+        # new entries (and a fresh dict) meanwhile, a value computed here is
+        # stored in the discarded dict instead of going stale in the new one.
+        memo = self._memo
+        try:
+            return memo[key][0]
+        except KeyError:
+            with _lock:
+                _counts["index_builds"] += 1
+            val = compute()
+            memo[key] = (val, extend)
+            return val
+
+
+def enable(flag: bool = True) -> None:
+    """Enable (or disable) the resident snapshot and sidecar caches."""
+    global _enabled
+    with _lock:
+        _enabled = flag
+        if not flag:
+            _snapshots.clear()
+            _sidecars.clear()
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def stats() -> dict:
+    """Counters of the snapshot and sidecar caches since start-up or ``reset_stats()``.
+
+    ``snapshot.hits`` are reads served by a fresh cached snapshot,
+    ``follows`` reads that merged appends made by other processes and
+    ``loads`` full parses (``reloads`` of them replaced a stale snapshot).
+    ``sidecars.reads`` counts sidecar files actually read and decoded.
+    """
+    with _lock:
+        c = dict(_counts)
+        cached_entries = sum(len(s.entries) for s in _snapshots.values())
+        snapshots, sidecars = len(_snapshots), len(_sidecars)
+
+    def ratio(hits: int, misses: int) -> float | None:
+        return round(hits / (hits + misses), 4) if hits + misses else None
+
+    return {
+        "enabled": _enabled,
+        "snapshot": {
+            "hits": c["hits"],
+            "follows": c["follows"],
+            "loads": c["loads"],
+            "reloads": c["reloads"],
+            "hit_ratio": ratio(c["hits"], c["follows"] + c["loads"]),
+            "load_seconds": round(c["load_seconds"], 6),
+            "load_max_seconds": round(c["load_max_seconds"], 6),
+            "follow_seconds": round(c["follow_seconds"], 6),
+            "appends_merged": c["appends_merged"],
+            "dropped": c["dropped"],
+            "index_builds": c["index_builds"],
+            "cached": snapshots,
+            "cached_entries": cached_entries,
+        },
+        "sidecars": {
+            "hits": c["sidecar_hits"],
+            "reads": c["sidecar_reads"],
+            "hit_ratio": ratio(c["sidecar_hits"], c["sidecar_reads"]),
+            "cached": sidecars,
+            "capacity": config.SIDECAR_CACHE_SIZE,
+        },
+    }
+
+
+def reset_stats() -> None:
+    with _lock:
+        for k, v in _counts.items():
+            _counts[k] = type(v)()
+
+
+def invalidate() -> None:
+    """Drop cached snapshots and sidecars; the next read reloads from disk."""
+    with _lock:
+        _snapshots.clear()
+        _sidecars.clear()
+
+
+def _fingerprint(ledger_file: Path, options: dict) -> dict[str, tuple | None]:
+    files = {_key(ledger_file)}
+    for f in options.get("include", None) or []:
+        files.add(_key(f))
+    # Directories of included files (other than the base directory) change
+    # mtime when a file matching an include glob is created or removed.
+    base = _key(ledger_file.parent)
+    dirs = {os.path.dirname(f) for f in files} - {base}
+    return {p: _stamp(p) for p in sorted(files | dirs)}
+
+
+def load(
+    ledger_file: Path,
+    loader: Callable[[Path], tuple[list, list, dict]],
+    variant: str = "",
+    incremental: bool = False,
+) -> LedgerSnapshot:
+    """Return a snapshot of ``ledger_file``, reusing the cached one when fresh.
+
+    ``loader`` performs the actual parse and returns ``(entries, errors, options)``.
+    Snapshots of the same file made with different loaders are cached apart
+    by ``variant`` (the load profile). ``incremental`` says the loader only
+    parses (no booking or plugins), so appends to include files can be
+    parsed on their own and merged. When the cache is disabled every call
+    loads from disk.
+    """
+    global _version
+    key = f"{ledger_file}#{variant}" if variant else str(ledger_file)
+    if _enabled:
+        with _lock:
+            snap = _snapshots.get(key)
+            if snap is not None:
+                if snap.is_fresh():
+                    _counts["hits"] += 1
+                    return snap
+                t = time.perf_counter()
+                followed = _follow(snap) if incremental else None
+                if followed is not None:
+                    _counts["follows"] += 1
+                    _counts["follow_seconds"] += time.perf_counter() - t
+                    # a racy result is served once; the cached snapshot is
+                    # followed again on the next read
+                    if followed.reusable:
+                        _snapshots[key] = followed
+                    return followed
+    started = time.time_ns()
+    t = time.perf_counter()
+    entries, errors, options = loader(ledger_file)
+    stamps = _fingerprint(ledger_file, options or {})
+    ok = bool(options) and not _is_racy(stamps, started)
+    tails = _tail_states(ledger_file, stamps) if _enabled and incremental and ok else None
+    seconds = time.perf_counter() - t
+    with _lock:
+        _counts["loads"] += 1
+        _counts["reloads"] += key in _snapshots
+        _counts["load_seconds"] += seconds
+        _counts["load_max_seconds"] = max(_counts["load_max_seconds"], seconds)
+        _version += 1
+        snap = LedgerSnapshot(ledger_file, entries, errors, options, stamps, _version, ok, tails, incremental)
+        if _enabled:
+            _snapshots[key] = snap
+    return snap
+
+
+def _tail_states(ledger_file: Path, stamps: dict[str, tuple | None]) -> dict[str, tuple[int, int, int]] | None:
+    """Size, checksum and line count of every include file (None if one changed since stamped)."""
+    top = _key(ledger_file)
+    tails = {}
+    for path, stamp in stamps.items():
+        if path == top or stamp is None or os.path.isdir(path):
+            continue
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) != stamp[1]:
+            return None
+        tails[path] = (len(data), zlib.crc32(data), data.count(b"\n"))
+    return tails
+
+
+def _follow(snap: LedgerSnapshot) -> LedgerSnapshot | None:
+    """Return ``snap`` updated with what other processes appended to its include files.
+
+    Only bytes after each file's recorded end are parsed. Returns None when
+    something else changed (the caller then reloads everything): a file
+    shrank, was replaced, differs before its old end or is still being
+    written; the top-level file changed; an include directory gained or
+    lost files other than new empty ones; or appended text does not parse.
+    Must be called with ``_lock`` held.
+    """
+    global _version
+    if not snap.reusable or snap.tails is None:
+        return None
+    started = time.time_ns()
+    stamps = dict(snap.stamps)
+    tails = dict(snap.tails)
+    added: list = []
+    dcontexts = []
+    changed = {}
+    for path, old in snap.stamps.items():
+        new = _stamp(path)
+        if new == old:
+            continue
+        if path in tails:
+            res = _read_tail(path, old, new, tails[path])
+            if res is None:
+                return None
+            tails[path], entries, dcontext = res
+            added.extend(entries)
+            dcontexts.append(dcontext)
+        elif not (new is not None and os.path.isdir(path) and _relist(path, stamps, tails)):
+            return None
+        stamps[path] = changed[path] = new
+    _version += 1
+    entries, memo = _merged(snap, added)
+    follow = LedgerSnapshot(
+        snap.ledger_file,
+        entries,
+        snap.errors,
+        _with_dcontexts(snap.options, dcontexts),
+        stamps,
+        _version,
+        not _is_racy(changed, started),
+        tails,
+        True,
+    )
+    follow._memo = memo
+    return follow
+
+
+def _read_tail(path: str, old: tuple | None, new: tuple | None, tail: tuple[int, int, int]):
+    """Parse what was appended to ``path`` since ``tail`` = (size, crc32, lines) was recorded.
+
+    Returns ``(new tail state, entries, dcontext)`` or None if the file
+    changed in any other way.
+    """
+    size, crc, lines = tail
+    if old is None or new is None or new[2] != old[2] or new[1] < size:
+        return None
+    try:
+        with open(path, "rb") as f:
+            data = f.read(new[1])
+    except OSError:
+        return None
+    if len(data) != new[1] or _stamp(path) != new:
+        return None
+    head = memoryview(data)[:size]
+    if zlib.crc32(head) != crc or (size and data[size - 1] != 0x0A):
+        return None
+    appended = data[size:]
+    try:
+        entries, dcontext = scanner.parse_tail(appended.decode("utf-8"), path, lines)
+    except ValueError:
+        return None
+    return (len(data), zlib.crc32(appended, crc), lines + appended.count(b"\n")), entries, dcontext
+
+
+def _merged(snap: LedgerSnapshot, added: list) -> tuple[list, dict]:
+    """Entries of ``snap`` plus ``added`` in load order, and the memo carried over.
+
+    Appends normally sort after every existing entry; then the entry list is
+    extended and memoized indexes with an ``extend`` function are updated
+    instead of dropped.
+    """
+    from beancount.core import data
+
+    if not added:
+        return snap.entries, snap._memo
+    added.sort(key=data.entry_sortkey)
+    entries = snap.entries
+    if entries and data.entry_sortkey(added[0]) <= data.entry_sortkey(entries[-1]):
+        return sorted(list(entries) + added, key=data.entry_sortkey), {}
+    memo = {k: (extend(v, added), extend) for k, (v, extend) in snap._memo.items() if extend is not None}
+    return list(entries) + added, memo
+
+
+def _with_dcontexts(options: dict, dcontexts: list) -> dict:
+    if not dcontexts or options.get("dcontext") is None:
+        return options
+    import copy
+
+    options = dict(options)
+    options["dcontext"] = copy.deepcopy(options["dcontext"])
+    for d in dcontexts:
+        options["dcontext"].update_from(d)
+    return options
+
+
+def note_append(path: Path, text: str, nbytes: int) -> None:
+    """Apply an append made by this process to cached snapshots in place.
+
+    ``text`` is exactly what was appended to ``path`` and ``nbytes`` its
+    encoded length. The appended directives are parsed on their own and
+    merged into every cached snapshot that already includes ``path``, so the
+    next read is served from memory instead of re-parsing the ledger. If the
+    file changed in any other way since it was stamped (size or inode do not
+    line up) the snapshot is dropped and the next read reloads from disk.
+    Snapshots not loaded with ``incremental=True`` (booked, or processed by
+    plugins) are dropped as well: unbooked directives cannot be merged into
+    them.
+    """
+    if not _enabled:
+        return
+    key = _key(path)
+    with _lock:
+        for ledger_key, snap in list(_snapshots.items()):
+            old = snap.stamps.get(key)
+            if old is None:
+                continue
+            new = _stamp(key)
+            if not snap.incremental or new is None or new[2] != old[2] or new[1] != old[1] + nbytes:
+                del _snapshots[ledger_key]
+                _counts["dropped"] += 1
+                continue
+            try:
+                if snap.tails is not None and key in snap.tails:
+                    lines = snap.tails[key][2]
+                else:
+                    with open(key, "rb") as f:
+                        lines = f.read(old[1]).count(b"\n")
+                added, dcontext = scanner.parse_tail(text, key, lines)
+            except Exception:
+                del _snapshots[ledger_key]
+                _counts["dropped"] += 1
+                continue
+            _counts["appends_merged"] += 1
+            snap.entries, snap._memo = _merged(snap, added)
+            snap.options = _with_dcontexts(snap.options, [dcontext])
+            snap.stamps = dict(snap.stamps)
+            snap.stamps[key] = new
+            if snap.tails is not None and key in snap.tails:
+                size, crc, lines = snap.tails[key]
+                raw = text.encode("utf-8")
+                snap.tails = dict(snap.tails)
+                snap.tails[key] = (size + len(raw), zlib.crc32(raw, crc), lines + text.count("\n"))
+
+
+def note_dir(path: Path) -> None:
+    """Re-stamp an included directory after this process changed its listing.
+
+    Writers create empty month files and short-lived temp files next to the
+    included files, which changes the directory mtime. Hidden files are
+    ignored (beancount's include globs skip them) and a new empty
+    ``*.beancount`` file is adopted as included (it contributes no entries).
+    Any other difference in the listing drops the snapshot.
+    """
+    if not _enabled:
+        return
+    key = _key(path)
+    with _lock:
+        for ledger_key, snap in list(_snapshots.items()):
+            if key not in snap.stamps:
+                continue
+            stamps = dict(snap.stamps)
+            tails = dict(snap.tails) if snap.tails is not None else None
+            if not _relist(key, stamps, tails):
+                del _snapshots[ledger_key]
+                _counts["dropped"] += 1
+                continue
+            stamps[key] = _stamp(key)
+            snap.stamps, snap.tails = stamps, tails
+
+
+def _relist(key: str, stamps: dict, tails: dict | None) -> bool:
+    """Adopt new empty ``*.beancount`` files of directory ``key`` into ``stamps`` (and ``tails``).
+
+    Returns False if the listing differs in any other way.
+    """
+    try:
+        names = [n for n in os.listdir(key) if n.endswith(".beancount") and not n.startswith(".")]
+    except OSError:
+        return False
+    current = {os.path.join(key, n) for n in names}
+    known = {p for p in stamps if os.path.dirname(p) == key and p.endswith(".beancount")}
+    added = {p: _stamp(p) for p in current - known}
+    if known - current or any(s is None or s[1] != 0 for s in added.values()):
+        return False
+    stamps.update(added)
+    if tails is not None:
+        tails.update((p, (0, 0, 0)) for p in added)
+    return True
+
+
+def note_sidecar(path: Path, data: Any) -> None:
+    """Record a sidecar just written to ``path`` by this process.
+
+    ``data`` must be what the reader passed to ``read_sidecar`` would return
+    for the new file.
+    """
+    if not _enabled:
+        return
+    key = str(path)
+    stamp = _stamp(key)
+    with _lock:
+        if stamp is None:
+            _sidecars.pop(key, None)
+            return
+        _sidecars[key] = (stamp, data)
+        _sidecars.move_to_end(key)
+        while len(_sidecars) > config.SIDECAR_CACHE_SIZE:
+            _sidecars.popitem(last=False)
+
+
+def read_sidecar(path: Path, reader: Callable[[Path], Any]) -> Any:
+    """Return ``reader(path)``, served from cache while the file is unchanged.
+
+    The cache is an LRU bounded by ``config.SIDECAR_CACHE_SIZE`` entries and is
+    keyed by path and file stamp. Callers must treat the returned data as
+    read-only.
+    """
+    if not _enabled:
+        with _lock:
+            _counts["sidecar_reads"] += 1
+        return reader(path)
+    key = str(path)
+    stamp = _stamp(key)
+    with _lock:
+        hit = _sidecars.get(key)
+        if hit is not None and stamp is not None and hit[0] == stamp:
+            _sidecars.move_to_end(key)
+            _counts["sidecar_hits"] += 1
+            return hit[1]
+        _counts["sidecar_reads"] += 1
+    started = time.time_ns()
+    data = reader(path)
+    if stamp is not None and not _is_racy({key: stamp}, started) and _stamp(key) == stamp:
+        with _lock:
+            _sidecars[key] = (stamp, data)
+            while len(_sidecars) > config.SIDECAR_CACHE_SIZE:
+                _sidecars.popitem(last=False)
+    return data
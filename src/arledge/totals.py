@@ -0,0 +1,45 @@
+"""Invoice amount rounding shared by the models.
+
+``line_amounts`` is the rule for one invoice line (net, VAT and line total,
+each rounded to cents with ROUND_HALF_UP) and ``invoice_amounts`` the sums
+over an invoice. They perform exactly the Decimal operations the models
+always did, in the same order and under the current decimal context, so
+results are identical down to exponent and sign (``-0.00`` stays ``-0.00``)
+and inputs that overflow the context precision raise the same errors. The
+rounding constants are built once here instead of on every line.
+"""
+from __future__ import annotations
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Iterable
+
+CENT = Decimal("0.01")
+_HUNDRED = Decimal("100")
+_ZERO = Decimal("0")
+
+
+def coerce_decimal(v):
+    """Turn str and float inputs into Decimal (floats via their repr); other values pass through."""
+    if isinstance(v, str):
+        return Decimal(v)
+    if isinstance(v, float):
+        return Decimal(str(v))
+    return v
+
+
+def line_amounts(quantity: Decimal, unit_price: Decimal, vat_rate: Decimal) -> tuple[Decimal, Decimal, Decimal]:
+    """Return ``(net, vat, line_total)`` for one invoice line."""
+    net = (quantity * unit_price).quantize(CENT, rounding=ROUND_HALF_UP)
+    vat = (net * (vat_rate / _HUNDRED)).quantize(CENT, rounding=ROUND_HALF_UP)
+    return net, vat, (net + vat).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def invoice_amounts(amounts: Iterable[tuple[Decimal, Decimal]]) -> tuple[Decimal, Decimal, Decimal]:
+    """Return ``(subtotal, total_vat, total)`` from per-line ``(net, vat)`` pairs."""
+    subtotal = _ZERO
+    total_vat = _ZERO
+    for net, vat in amounts:
+        subtotal += net
+        total_vat += vat
+    subtotal = subtotal.quantize(CENT)
+    total_vat = total_vat.quantize(CENT)
+    return subtotal, total_vat, (subtotal + total_vat).quantize(CENT)
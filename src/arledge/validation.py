@@ -0,0 +1,691 @@
+"""Incremental ledger validation (`arledge validate`).
+
+Almost everything ``validate`` checks depends on a single file: parse
+errors, transaction balances, which sidecars a file references and whether a
+sidecar is a readable invoice whose stored totals match its lines. The result of checking an include file or a
+sidecar is therefore kept in ``.arledge/validate-state``, keyed by a digest
+of the file's content, and a re-run only re-checks files whose content
+changed. A file whose ``stat`` (mtime, size, inode) is unchanged is not even
+hashed, unless it was modified just before the state was saved (racy, as in
+git's index).
+
+For an include file the state keeps a summary: parse errors, unbalanced
+transactions, include patterns, referenced sidecars, open/close/commodity
+directives and, per account, the dates and currencies it is used with. The
+checks that span files are recomputed from these summaries on every run:
+include globs, missing and orphan sidecars, and beancount's account checks
+(duplicate open/close/commodity directives, unknown or inactive accounts,
+currency constraints). Unknown accounts are reported once per account and
+file rather than once per entry.
+
+Each invoice transaction is also cross-checked against its sidecar: invoice
+and customer ids, the receivable account, the currency, and the
+receivable, income and VAT postings against the sidecar's total, subtotal
+and VAT (see ``_mismatches``). ``update_invoice`` only rewrites the sidecar,
+so an updated invoice with changed amounts shows up here. Reading and
+recomputing changed sidecars is the costly part of a run without saved
+state; with enough of them it is spread over worker processes.
+
+Checks that need booking or plugins cannot be derived from per-file
+summaries. When the ledger declares plugins or documents, or a file holds
+balance, pad or document directives, postings with a cost or price, several
+elided postings in one transaction, or is encrypted, the cross-file errors
+and balances come from beancount's full loader instead, as they always do
+with ``full=True``. ``full=True`` also ignores the saved state.
+"""
+from __future__ import annotations
+import glob
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+from pathlib import Path
+from typing import Optional
+
+STATE_VERSION = 3
+
+# Files whose mtime is this close to (or after) the start of a run may have
+# been modified during the run without a visible mtime change.
+_RACY_WINDOW_NS = 50_000_000
+
+# Fewest changed sidecars per worker process worth starting a pool for.
+_PARALLEL_MIN = 256
+
+
+@dataclass
+class Report:
+    """Outcome of a validation run.
+
+    Findings are dicts with ``file`` (None for load errors without a
+    location), ``line`` and ``message``; ``errors`` also carry a ``kind``
+    (``parse``, ``include``, ``validation``, or beancount's error class such
+    as ``booking`` when the full loader ran); ``missing`` findings also carry the
+    referenced ``sidecar`` path. ``mismatches`` (a transaction disagreeing
+    with its sidecar) also carry ``invoice_id``, ``sidecar``, ``field`` and
+    the ``ledger`` and ``sidecar_value`` values. ``orphans`` are sidecar paths.
+    """
+
+    errors: list = field(default_factory=list)
+    warnings: list = field(default_factory=list)
+    unbalanced: list = field(default_factory=list)
+    missing: list = field(default_factory=list)
+    bad_sidecars: list = field(default_factory=list)
+    mismatches: list = field(default_factory=list)
+    orphans: list = field(default_factory=list)
+    files: int = 0
+    files_checked: int = 0
+    sidecars: int = 0
+    sidecars_checked: int = 0
+    # why beancount's full loader ran (None: everything came from summaries)
+    full_load: Optional[str] = None
+    # {"phase", "seconds", counts...} in run order
+    phases: list = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not (self.errors or self.unbalanced or self.missing or self.bad_sidecars or self.mismatches)
+
+    def to_dict(self) -> dict:
+        """The report as JSON-serializable data (``validate --format json``)."""
+        findings = []
+        for kind, severity, items in (
+            ("error", "error", self.errors),
+            ("unknown_account", "warning", self.warnings),
+            ("unbalanced", "error", self.unbalanced),
+            ("missing_sidecar", "error", self.missing),
+            ("invalid_sidecar", "error", self.bad_sidecars),
+            ("sidecar_mismatch", "error", self.mismatches),
+        ):
+            findings.extend({"kind": kind, "severity": severity, **f} for f in items)
+        findings.extend(
+            {"kind": "orphan_sidecar", "severity": "warning", **_finding(p, 0, "Orphan invoice sidecar")}
+            for p in self.orphans
+        )
+        return {
+            "ok": self.ok,
+            "full_load": self.full_load,
+            "files": {"total": self.files, "checked": self.files_checked},
+            "sidecars": {"total": self.sidecars, "checked": self.sidecars_checked},
+            "phases": self.phases,
+            "findings": findings,
+        }
+
+
+def state_path(base: Path) -> Path:
+    return base / ".arledge" / "validate-state"
+
+
+def run(base: Path, full: bool = False, jobs: Optional[int] = None) -> Report:
+    """Validate the ledger in ``base``, re-checking only files changed since the last run.
+
+    Changed sidecars are checked on ``jobs`` processes (default
+    ``config.VALIDATE_WORKERS``; 0 means one per CPU). Raises whatever
+    beancount's loader raises when it has to run.
+    """
+    from . import config
+
+    from beancount import __version__ as beancount_version
+
+    started = time.time_ns()
+    clock = time.perf_counter()
+    ledger_file = base / "ledger.beancount"
+    spath = state_path(base)
+    state = {} if full else _read_state(spath, beancount_version)
+    old_files = state.get("files", {})
+    old_sidecars = state.get("sidecars", {})
+    report = Report()
+    clock = _phase(report, "state", clock)
+    files: dict[str, dict] = {}
+    summaries: list[tuple[str, dict]] = []
+
+    # include files, in beancount's load order
+    stack = [os.path.abspath(ledger_file)]
+    seen = set()
+    while stack:
+        filename = os.path.normpath(stack.pop(0))
+        if filename in seen:
+            report.errors.append(_finding(None, 0, f'Duplicate filename parsed: "{filename}"', "include"))
+            continue
+        if not os.path.exists(filename):
+            report.errors.append(_finding(None, 0, f'File "{filename}" does not exist', "include"))
+            continue
+        seen.add(filename)
+        key = os.path.relpath(filename, base)
+        entry, checked = _file_entry(filename, old_files.get(key))
+        files[key] = entry
+        report.files_checked += checked
+        summary = entry["summary"]
+        summaries.append((filename, summary))
+        cwd = os.path.dirname(filename)
+        for include in summary["includes"]:
+            search = include if os.path.isabs(include) else os.path.join(cwd, include)
+            matched = glob.glob(search, recursive=True)
+            if not matched:
+                report.errors.append(_finding(None, 0, f'File glob "{include}" does not match any files', "include"))
+            for name in matched:
+                stack.append(name if os.path.isabs(name) else os.path.join(cwd, name))
+    report.files = len(files)
+
+    reasons = [s["full"] for _, s in summaries if s["full"]]
+    if summaries and summaries[0][1]["plugins"]:
+        reasons.insert(0, "plugins or documents declared by the ledger")
+    if full:
+        reasons.insert(0, "--full")
+    entries = None
+    if reasons:
+        from . import loading
+
+        report.full_load = reasons[0]
+        report.errors = []
+        entries, errors, _ = loading.load(ledger_file, "full")
+        for err in errors:
+            source = getattr(err, "source", None) or {}
+            filename = source.get("filename")
+            if filename == "<load>":
+                filename = None
+            finding = _finding(filename, source.get("lineno", 0), str(getattr(err, "message", err)), _error_kind(err))
+            if "unknown account" in finding["message"].lower():
+                del finding["kind"]
+                report.warnings.append(finding)
+            else:
+                report.errors.append(finding)
+    counts = {"files": report.files, "files_checked": report.files_checked}
+    counts["entries"] = len(entries) if entries is not None else sum(s["entries"] for _, s in summaries)
+    clock = _phase(report, "load", clock, **counts)
+
+    if entries is not None:
+        report.unbalanced = _unbalanced_entries(entries)
+        transactions = sum(1 for e in entries if e.__class__.__name__ == "Transaction")
+    else:
+        for filename, s in summaries:
+            report.errors.extend(_finding(filename, line, msg, "parse") for line, msg in s["errors"])
+            report.unbalanced.extend(_finding(filename, line, msg) for line, msg in s["unbalanced"])
+        _account_checks(summaries, report)
+        transactions = sum(s["transactions"] for _, s in summaries)
+    clock = _phase(report, "balance", clock, transactions=transactions)
+
+    if jobs is None:
+        jobs = config.VALIDATE_WORKERS
+    sidecars, referenced = _check_sidecars(base, summaries, old_sidecars, report, jobs or os.cpu_count() or 1)
+    clock = _phase(report, "sidecars", clock, sidecars=report.sidecars, sidecars_checked=report.sidecars_checked)
+    scanned = _orphans(base, referenced, report)
+    clock = _phase(report, "orphans", clock, files=scanned)
+    _write_state(spath, beancount_version, files, sidecars, started, state)
+    # reading and saving the state are one phase
+    report.phases[0]["seconds"] += round(time.perf_counter() - clock, 6)
+    return report
+
+
+def _phase(report: Report, name: str, started: float, **counts) -> float:
+    now = time.perf_counter()
+    report.phases.append({"phase": name, "seconds": round(now - started, 6), **counts})
+    return now
+
+
+def _error_kind(err) -> str:
+    name = type(err).__name__
+    return {"ParserError": "parse", "LexerError": "parse", "LoadError": "include"}.get(name) or name.removesuffix("Error").lower() or "beancount"
+
+
+def _finding(filename: Optional[str], line: int, message: str, kind: Optional[str] = None) -> dict:
+    finding = {"file": filename, "line": line, "message": message}
+    if kind is not None:
+        finding["kind"] = kind
+    return finding
+
+
+def format_finding(finding: dict) -> str:
+    if finding["file"] is None:
+        return finding["message"]
+    if not finding["line"]:
+        return f"{finding['file']}: {finding['message']}"
+    return f"{finding['file']}:{finding['line']}: {finding['message']}"
+
+
+# state file
+
+def _read_state(path: Path, beancount_version: str) -> dict:
+    try:
+        with open(path, "rb") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    # summaries depend on how beancount parses
+    if not isinstance(state, dict) or state.get("version") != STATE_VERSION or state.get("beancount") != beancount_version:
+        return {}
+    return state
+
+
+def _write_state(path: Path, beancount_version: str, files: dict, sidecars: dict, started_ns: int, old: dict) -> None:
+    limit = started_ns - _RACY_WINDOW_NS
+    changed = False
+    for entries, previous in ((files, old.get("files")), (sidecars, old.get("sidecars"))):
+        for entry in entries.values():
+            if entry["stamp"] is not None and entry["stamp"][0] >= limit:
+                # may change again within the same mtime: compare content next time
+                entry["stamp"] = None
+        changed = changed or entries != previous
+    if not changed:
+        return
+    state = {"version": STATE_VERSION, "beancount": beancount_version, "files": files, "sidecars": sidecars}
+    tmp = path.with_name(path.name + f".tmp{os.getpid()}")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, separators=(",", ":"))
+        os.replace(tmp, path)
+    except OSError:
+        # a read-only checkout still validates, just not incrementally
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def _stamp(st: os.stat_result) -> list[int]:
+    return [st.st_mtime_ns, st.st_size, st.st_ino]
+
+
+def _digest(raw: bytes) -> str:
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def _file_entry(filename: str, cached: Optional[dict]) -> tuple[dict, bool]:
+    """Return ``(state entry, re-checked)`` for an include file."""
+    from beancount.utils import encryption
+
+    st = os.stat(filename)
+    stamp = _stamp(st)
+    if cached is not None and cached["stamp"] == stamp:
+        return cached, False
+    if encryption.is_encrypted_file(filename):
+        return {"stamp": None, "digest": None, "summary": _summary([], [], None, "encrypted file")}, True
+    with open(filename, "rb") as f:
+        raw = f.read()
+    digest = _digest(raw)
+    if cached is not None and cached["digest"] == digest:
+        return {"stamp": stamp, "digest": digest, "summary": cached["summary"]}, False
+    from . import scanner
+
+    try:
+        text = raw.decode("utf-8")
+    except UnicodeDecodeError as e:
+        summary = _summary([], [], None)
+        summary["errors"].append([1, f"File is not valid UTF-8: {e}"])
+    else:
+        summary = _summary(*scanner.parse_string(text, filename))
+    return {"stamp": stamp, "digest": digest, "summary": summary}, True
+
+
+# per-file summaries
+
+def _summary(entries: list, errors: list, options: Optional[dict], full: Optional[str] = None) -> dict:
+    """Everything the cross-file checks need from one parsed file (JSON-serializable)."""
+    from beancount.core import data, getters
+
+    summary = {
+        "errors": [],
+        "unbalanced": [],
+        "includes": list(options["include"]) if options else [],
+        "plugins": bool(options and (options["plugin"] or options["documents"])),
+        "sidecars": [],
+        "opens": [],
+        "closes": [],
+        "commodities": [],
+        # account -> [first date, last date, currencies, line of first use]
+        "accounts": {},
+        "full": full,
+        "entries": len(entries),
+        "transactions": 0,
+    }
+    for err in errors:
+        source = getattr(err, "source", None) or {}
+        summary["errors"].append([source.get("lineno", 0), str(getattr(err, "message", err))])
+    accounts = summary["accounts"]
+
+    def use(account: str, date: str, currency: Optional[str], lineno: int, after_close_ok: bool = False) -> None:
+        a = accounts.get(account)
+        if a is None:
+            a = accounts[account] = [date, None, [], lineno]
+        elif date < a[0]:
+            a[0], a[3] = date, lineno
+        if not after_close_ok and (a[1] is None or date > a[1]):
+            a[1] = date
+        if currency is not None and currency not in a[2]:
+            a[2].append(currency)
+
+    for e in entries:
+        lineno = e.meta.get("lineno", 0)
+        date = e.date.isoformat()
+        if isinstance(e, data.Transaction):
+            summary["transactions"] += 1
+            sums: dict[str, Decimal] = {}
+            elided = 0
+            inv_data = e.meta.get("invoice_data")
+            if inv_data and isinstance(inv_data, str):
+                postings = []
+                summary["sidecars"].append(
+                    [lineno, inv_data, _meta_str(e.meta.get("invoice_id")), _meta_str(e.meta.get("customer_id")), postings]
+                )
+            else:
+                postings = None
+            for p in e.postings:
+                if p.cost is not None or p.price is not None:
+                    summary["full"] = summary["full"] or "posting with a cost or price"
+                number = getattr(p.units, "number", None)
+                currency = getattr(p.units, "currency", None)
+                if not isinstance(number, Decimal) or not isinstance(currency, str):
+                    elided += 1
+                    use(p.account, date, None, lineno)
+                    continue
+                sums[currency] = sums.get(currency, Decimal(0)) + number
+                use(p.account, date, currency, lineno)
+                if postings is not None:
+                    postings.append([p.account, str(number), currency])
+            if elided > 1:
+                summary["full"] = summary["full"] or "transaction with several elided postings"
+            if elided:
+                # booking interpolates the elided posting, which balances the rest
+                continue
+            for cur, total in sums.items():
+                if total != Decimal(0):
+                    summary["unbalanced"].append(
+                        [lineno, f"Unbalanced transaction {e.date} {e.narration}: currency={cur} total={total}"]
+                    )
+        elif isinstance(e, data.Open):
+            summary["opens"].append([e.account, date, list(e.currencies or []), lineno])
+        elif isinstance(e, data.Close):
+            summary["closes"].append([e.account, date, lineno])
+        elif isinstance(e, data.Commodity):
+            summary["commodities"].append([e.currency, date, lineno])
+        elif isinstance(e, (data.Balance, data.Pad, data.Document)):
+            summary["full"] = summary["full"] or f"{type(e).__name__.lower()} directive"
+        else:
+            for account in getters.get_entry_accounts(e):
+                use(account, date, None, lineno, after_close_ok=isinstance(e, data.Note))
+    return summary
+
+
+def _meta_str(value) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def _unbalanced_entries(entries: list) -> list:
+    """Per-currency unbalanced transactions among loaded (booked) entries."""
+    res = []
+    for e in entries:
+        if e.__class__.__name__ != "Transaction":
+            continue
+        sums: dict[str, Decimal] = {}
+        for p in e.postings or []:
+            number = getattr(p.units, "number", None)
+            if not isinstance(number, Decimal):
+                continue
+            cur = getattr(p.units, "currency", None) or ""
+            sums[cur] = sums.get(cur, Decimal(0)) + number
+        for cur, total in sums.items():
+            if total != Decimal(0):
+                res.append(
+                    _finding(
+                        e.meta.get("filename"),
+                        e.meta.get("lineno", 0),
+                        f"Unbalanced transaction {e.date} {e.narration}: currency={cur} total={total}",
+                    )
+                )
+    return res
+
+
+# cross-file checks
+
+def _account_checks(summaries: list[tuple[str, dict]], report: Report) -> None:
+    """beancount's open/close, active-account and currency-constraint checks, from summaries."""
+
+    def error(filename: str, line: int, message: str) -> None:
+        report.errors.append(_finding(filename, line, message, "validation"))
+
+    opens: dict[str, str] = {}
+    closes: dict[str, str] = {}
+    # like beancount, the last open listing currencies sets the constraint
+    constraints: dict[str, list] = {}
+    directives = []
+    for filename, s in summaries:
+        directives.extend((date, -2, line, filename, account, currencies) for account, date, currencies, line in s["opens"])
+        directives.extend((date, 0, line, filename, currency, None) for currency, date, line in s["commodities"])
+        directives.extend((date, 2, line, filename, account, None) for account, date, line in s["closes"])
+    # in the order of beancount's entry_sortkey: date, type, line
+    commodities = set()
+    for date, kind, line, filename, account, currencies in sorted(directives, key=lambda d: d[:3]):
+        if kind == -2:
+            if account in opens:
+                error(filename, line, f"Duplicate open directive for {account}")
+            else:
+                opens[account] = date
+            if currencies:
+                constraints[account] = currencies
+        elif kind == 0:
+            if account in commodities:
+                error(filename, line, f"Duplicate commodity directives for '{account}'")
+            commodities.add(account)
+        elif account in closes:
+            error(filename, line, f"Duplicate close directive for {account}")
+        else:
+            if account not in opens:
+                error(filename, line, f"Unopened account {account} is being closed")
+            elif date < opens[account]:
+                error(filename, line, f"Internal error: closing date for {account} appears before opening date")
+            closes[account] = date
+    for filename, s in summaries:
+        for account, (first, last, currencies, line) in s["accounts"].items():
+            opened = opens.get(account)
+            if opened is None:
+                report.warnings.append(_finding(filename, line, f"Invalid reference to unknown account '{account}'"))
+                continue
+            closed = closes.get(account)
+            if first < opened or (closed is not None and last is not None and last > closed):
+                error(filename, line, f"Invalid reference to inactive account '{account}'")
+            allowed = constraints.get(account)
+            for currency in currencies:
+                if allowed and currency not in allowed:
+                    error(filename, line, f"Invalid currency {currency} for account '{account}'")
+
+
+def _check_sidecars(base: Path, summaries: list[tuple[str, dict]], old: dict, report: Report, jobs: int) -> tuple[dict, set]:
+    """Check referenced sidecars against their transactions; find missing ones.
+
+    Returns the sidecar state entries and the set of referenced paths.
+
+    Sidecars whose content changed are read and checked by ``jobs`` worker
+    processes (see ``_map``); the cross-checks against the postings use the
+    cached results and run here.
+    """
+    entries: dict[str, dict] = {}
+    refs = []
+    todo = []
+    seen = set()
+    # plain strings: pathlib costs more than the stat per sidecar
+    root = os.path.normpath(os.path.abspath(base))
+    for filename, s in summaries:
+        for ref in s["sidecars"]:
+            path = os.path.normpath(os.path.join(root, ref[1]))
+            refs.append((filename, ref, path))
+            if path in seen:
+                continue
+            seen.add(path)
+            key = path[len(root) + 1 :] if path.startswith(root + os.sep) else os.path.relpath(path, root)
+            cached = old.get(key)
+            try:
+                stamp = _stamp(os.stat(path))
+            except OSError:
+                continue
+            if cached is not None and cached["stamp"] == stamp:
+                entries[key] = cached
+            else:
+                todo.append((key, path, cached))
+    for (key, _, _), (entry, checked) in zip(todo, _map(_sidecar_entry, [(p, c) for _, p, c in todo], jobs)):
+        if entry is not None:
+            entries[key] = entry
+            report.sidecars_checked += checked
+    report.sidecars = len(entries)
+
+    reported = set()
+    for filename, (line, inv_data, inv_id, customer_id, postings), path in refs:
+        key = path[len(root) + 1 :] if path.startswith(root + os.sep) else os.path.relpath(path, root)
+        entry = entries.get(key)
+        if entry is None:
+            shown = str(base / inv_data)
+            report.missing.append({**_finding(filename, line, "Missing invoice sidecar"), "sidecar": shown})
+            continue
+        if entry["error"] is not None:
+            if path not in reported:
+                reported.add(path)
+                report.bad_sidecars.append(_finding(str(base / inv_data), 0, entry["error"]))
+            continue
+        invoice = entry["invoice"]
+        if postings == _written_postings(invoice) and inv_id == str(invoice["id"]) and customer_id == str(invoice["customer_id"]):
+            continue
+        shown = str(base / inv_data)
+        for name, ledger, side in _mismatches(invoice, inv_id, customer_id, postings):
+            report.mismatches.append(
+                {
+                    **_finding(filename, line, f"invoice {inv_id} {name}: ledger {ledger}, sidecar {side}"),
+                    "invoice_id": inv_id,
+                    "sidecar": shown,
+                    "field": name,
+                    "ledger": ledger,
+                    "sidecar_value": side,
+                }
+            )
+    return entries, seen
+
+
+def _orphans(base: Path, referenced: set, report: Report) -> int:
+    """List sidecars in includes/invoices/data no transaction references; returns the files scanned."""
+    root = os.path.normpath(os.path.abspath(base))
+    try:
+        with os.scandir(os.path.join(root, "includes", "invoices", "data")) as it:
+            names = [e.path for e in it if e.is_file()]
+    except OSError:
+        names = []
+    report.orphans = sorted(p for p in names if p not in referenced)
+    return len(names)
+
+
+def _map(fn, items: list, jobs: int) -> list:
+    """``[fn(*item) for item in items]``, on up to ``jobs`` processes when there are enough items."""
+    workers = min(jobs, len(items) // _PARALLEL_MIN)
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        try:
+            with ProcessPoolExecutor(workers) as pool:
+                return list(pool.map(_call, [(fn, item) for item in items], chunksize=-(-len(items) // (workers * 4))))
+        except OSError:
+            # no process support (e.g. a sandbox): fall back to this process
+            pass
+    return [fn(*item) for item in items]
+
+
+def _call(job: tuple) -> object:
+    fn, item = job
+    return fn(*item)
+
+
+def _sidecar_entry(path: str, cached: Optional[dict]) -> tuple[Optional[dict], bool]:
+    """Return ``(state entry, re-checked)`` for a sidecar; ``(None, False)`` if it does not exist."""
+    try:
+        stamp = _stamp(os.stat(path))
+        with open(path, "rb") as f:
+            raw = f.read()
+    except OSError:
+        return None, False
+    digest = _digest(raw)
+    if cached is not None and cached["digest"] == digest:
+        return {**cached, "stamp": stamp}, False
+    error, invoice = _check_sidecar(raw)
+    return {"stamp": stamp, "digest": digest, "error": error, "invoice": invoice}, True
+
+
+def _check_sidecar(raw: bytes) -> tuple[Optional[str], Optional[dict]]:
+    """Return ``(error, totals)`` for sidecar content.
+
+    The totals are recomputed from the lines by validating the content as an
+    Invoice; a sidecar whose stored totals differ from them is an error.
+    """
+    from . import models, sidecar
+
+    try:
+        data = sidecar.decode(raw)
+        inv = models.Invoice.model_validate(data)
+    except Exception as e:
+        lines = str(e).splitlines() or [type(e).__name__]
+        return " ".join(line.strip() for line in lines[:3]), None
+    for name in ("subtotal", "total_vat", "total"):
+        stored = data.get(name)
+        try:
+            same = stored is None or Decimal(str(stored)) == getattr(inv, name)
+        except ArithmeticError:
+            same = False
+        if not same:
+            return f"stored {name} {stored} does not match its lines ({getattr(inv, name)})", None
+    invoice = {
+        "id": inv.id,
+        "customer_id": inv.customer_id,
+        "currency": inv.currency,
+        "subtotal": str(inv.subtotal),
+        "total_vat": str(inv.total_vat),
+        "total": str(inv.total),
+    }
+    return None, invoice
+
+
+def _written_postings(invoice: dict) -> list:
+    """The postings beancount_write.create_invoice writes for ``invoice``, as kept in summaries."""
+    currency = invoice["currency"]
+    postings = [
+        [f"Assets:Receivable:{invoice['customer_id']}", invoice["total"], currency],
+        ["Income:Services", str(-Decimal(invoice["subtotal"])), currency],
+    ]
+    if Decimal(invoice["total_vat"]) != 0:
+        postings.append(["Liabilities:VAT", str(-Decimal(invoice["total_vat"])), currency])
+    return postings
+
+
+def _mismatches(invoice: dict, inv_id: Optional[str], customer_id: Optional[str], postings: list) -> list[tuple]:
+    """``(field, ledger value, sidecar value)`` for each way a transaction disagrees with its sidecar.
+
+    Mirrors what beancount_write writes for an invoice: ``Assets:Receivable:<customer>``
+    for the total, ``Income:Services`` for minus the subtotal and ``Liabilities:VAT``
+    for minus the VAT (no posting when there is none), all in the invoice currency.
+    """
+    res = []
+    if invoice["id"] is not None and inv_id is not None and inv_id != str(invoice["id"]):
+        res.append(("id", inv_id, str(invoice["id"])))
+    if customer_id is not None and customer_id != str(invoice["customer_id"]):
+        res.append(("customer_id", customer_id, str(invoice["customer_id"])))
+    sums: dict[str, dict[str, Decimal]] = {"total": {}, "subtotal": {}, "total_vat": {}}
+    receivables = set()
+    for account, number, currency in postings:
+        if account.startswith("Assets:Receivable"):
+            name, sign = "total", 1
+            receivables.add(account)
+        elif account.startswith("Income:"):
+            name, sign = "subtotal", -1
+        elif account.startswith("Liabilities:VAT"):
+            name, sign = "total_vat", -1
+        else:
+            continue
+        sums[name][currency] = sums[name].get(currency, Decimal(0)) + sign * Decimal(number)
+    account = f"Assets:Receivable:{invoice['customer_id']}"
+    if receivables and receivables != {account}:
+        res.append(("receivable_account", ",".join(sorted(receivables)), account))
+    currency = invoice["currency"]
+    other = sorted({c for amounts in sums.values() for c in amounts} - {currency})
+    if other:
+        res.append(("currency", ",".join(other), currency))
+    for name, amounts in sums.items():
+        ledger = amounts.get(currency, Decimal(0))
+        if ledger != Decimal(invoice[name]):
+            res.append((name, f"{ledger} {currency}", f"{invoice[name]} {currency}"))
+    return res
@@ -0,0 +1,116 @@
+"""Slotted read-only views of ledger records for listings.
+
+Listing thousands of customers, creditors or invoices only to serialize them
+does not need pydantic models: validating each record and keeping its
+``__dict__`` and ``model_fields_set`` is most of the cost. The store builds
+these views straight from beancount entries instead (see the ``view=True``
+options of the beancount_store listing functions).
+
+A view has the same attributes, holding the same values, as the model it
+stands for, and ``serialize`` writes it exactly like that model. Views are
+not validated on assignment and must be treated as read-only; call
+``to_model()`` when validation or other model behaviour is needed.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, ClassVar, List, Optional
+
+
+class View:
+    """Base class; the ``__slots__`` of subclasses are the model fields in model order."""
+
+    __slots__ = ()
+    model_name: ClassVar[str] = ""
+
+    def model_dump(self) -> dict:
+        """Field values as a dict, like the model's ``model_dump()``."""
+        return {k: _dump(getattr(self, k)) for k in self.__slots__}
+
+    def to_model(self):
+        """Validate the values into the pydantic model this view stands for."""
+        from . import models
+
+        return getattr(models, self.model_name).model_validate(self.model_dump())
+
+    @classmethod
+    def from_model(cls, m) -> "View":
+        """Build a view holding the values of model ``m``."""
+        return cls(*[_from(getattr(m, k)) for k in cls.__slots__])
+
+
+def _dump(v: Any) -> Any:
+    if isinstance(v, View):
+        return v.model_dump()
+    if type(v) is list:
+        return [_dump(x) for x in v]
+    return v
+
+
+def _from(v: Any) -> Any:
+    # the only list field is Invoice.lines
+    if type(v) is list:
+        return [InvoiceLineView.from_model(x) for x in v]
+    return v
+
+
+@dataclass(slots=True)
+class CustomerView(View):
+    model_name: ClassVar[str] = "Customer"
+
+    model_version: str
+    id: Optional[int]
+    name: str
+    email: Optional[str]
+    address: Optional[str]
+
+
+@dataclass(slots=True)
+class CreditorView(View):
+    model_name: ClassVar[str] = "Creditor"
+
+    model_version: str
+    id: Optional[int]
+    name: str
+    address: Optional[str]
+    email: Optional[str]
+    phone: Optional[str]
+    tax_id: Optional[str]
+    payment_instructions: Optional[str]
+    default_currency: str
+    beancount_account: Optional[str]
+    created_at: Optional[datetime]
+
+
+@dataclass(slots=True)
+class InvoiceLineView(View):
+    model_name: ClassVar[str] = "InvoiceLine"
+
+    model_version: str
+    description: str
+    quantity: Decimal
+    unit_price: Decimal
+    vat_rate: Decimal
+    net: Optional[Decimal]
+    vat: Optional[Decimal]
+    line_total: Optional[Decimal]
+
+
+@dataclass(slots=True)
+class InvoiceView(View):
+    model_name: ClassVar[str] = "Invoice"
+
+    model_version: str
+    id: Optional[int]
+    customer_id: int
+    status: str
+    created_at: Optional[datetime]
+    due_at: Optional[datetime]
+    description: Optional[str]
+    creditor_id: Optional[int]
+    currency: str
+    lines: List[InvoiceLineView]
+    subtotal: Optional[Decimal]
+    total_vat: Optional[Decimal]
+    total: Optional[Decimal]
@@ -0,0 +1,258 @@
+"""Change feed of entities written to the ledger (`arledge watch`).
+
+Everything arledge writes is an append to an include file, except invoice
+updates, which replace the invoice's sidecar. A ``Feed`` remembers a byte
+offset per include file and a modification-time mark for sidecars. Each
+``poll`` parses only the bytes appended since (see
+arledge.scanner.parse_tail) and stats sidecars only when a sidecar
+directory changed. It yields one event per written entity::
+
+    {"kind": "customer", "op": "created", "id": 3, "data": {...}, "token": "..."}
+
+``kind`` is ``customer``, ``creditor``, ``payment_account`` or ``invoice``.
+``op`` is ``created`` for the first directive with that id and ``updated``
+otherwise (later customer/creditor directives, rewritten invoice sidecars).
+``data`` is the entity as written by that directive (invoices: as stored
+now). ``token`` is the position just after the event: pass it as
+``since`` to resume. A file that shrank or was replaced is reported again
+from its start, so treat events as upserts keyed by ``(kind, id)``.
+
+A file that cannot be parsed yields ``{"kind": "error", "file", "message"}``
+and is skipped up to its current end.
+"""
+from __future__ import annotations
+import base64
+import json
+import os
+import time
+from typing import Iterator, Optional
+
+from . import config
+
+TOKEN_VERSION = 1
+
+# sidecars modified this close to a poll may still get an older mtime
+# (coarse filesystem clocks); they are checked again by the next poll
+_MTIME_SLACK_NS = 50_000_000
+
+_CUSTOM_KINDS = {"customer": "customer_id", "creditor": "creditor_id", "payment_account": "account_id"}
+
+
+def encode_token(files: dict[str, list[int]], sidecars: int, seen: dict[int, int]) -> str:
+    """Encode a feed position.
+
+    ``files`` maps base-relative path -> ``[inode, offset]``, ``sidecars`` is
+    the sidecar mtime mark and ``seen`` maps invoice id -> sidecar mtime for
+    sidecars at or after the mark that were already reported.
+    """
+    pos = {"v": TOKEN_VERSION, "files": files, "sidecars": sidecars, "seen": {str(k): v for k, v in seen.items()}}
+    raw = json.dumps(pos, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_token(token: str) -> tuple[dict[str, list[int]], int, dict[int, int]]:
+    """Inverse of ``encode_token``; raises ValueError for a malformed token."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        pos = json.loads(raw)
+        if pos["v"] != TOKEN_VERSION:
+            raise ValueError
+        files = {str(k): [int(v[0]), int(v[1])] for k, v in pos["files"].items()}
+        seen = {int(k): int(v) for k, v in pos["seen"].items()}
+        return files, int(pos["sidecars"]), seen
+    except Exception:
+        raise ValueError("invalid position token") from None
+
+
+class Feed:
+    """Resumable change feed over the ledger in ``config.get_basedir()``.
+
+    Without ``since`` the feed starts at the current end of every file, so
+    only later writes are reported. Reads go through arledge.beancount_store;
+    with the snapshot cache enabled each poll only follows the appends.
+    """
+
+    def __init__(self, since: Optional[str] = None):
+        self.base = config.get_basedir()
+        # path -> [inode, offset]; offsets always sit at a line start
+        self.files: dict[str, list[int]] = {}
+        self.sidecars = 0
+        self.seen: dict[int, int] = {}
+        self._lines: dict[str, tuple[int, int, int]] = {}
+        self._firsts: dict[str, dict] = {}
+        self._dirs: tuple[object, set] = (None, set())
+        if since is not None:
+            self.files, self.sidecars, self.seen = decode_token(since)
+        else:
+            self.sidecars = time.time_ns() - _MTIME_SLACK_NS
+            for path, stamp in self._include_stamps().items():
+                self.files[path] = [stamp[2], stamp[1]]
+
+    def token(self) -> str:
+        return encode_token(self.files, self.sidecars, self.seen)
+
+    def _include_stamps(self) -> dict[str, tuple]:
+        """Base-relative path -> stamp of every include file of the current snapshot."""
+        from . import beancount_store
+
+        snap = beancount_store._snapshot()
+        if snap is None:
+            return {}
+        top = os.path.normpath(os.path.abspath(snap.ledger_file))
+        res = {}
+        for path in snap.options.get("include", []):
+            stamp = snap.stamps.get(os.path.normpath(path))
+            if path != top and stamp is not None and not os.path.isdir(path):
+                res[os.path.relpath(path, self.base)] = stamp
+        return res
+
+    def poll(self) -> Iterator[dict]:
+        """Yield the events written since the last poll (or the start position)."""
+        from . import beancount_store
+
+        started = time.time_ns()
+        self._firsts = {}
+        for rel, stamp in sorted(self._include_stamps().items()):
+            ino, offset = self.files.get(rel, [stamp[2], 0])
+            if ino != stamp[2] or offset > stamp[1]:
+                # replaced or truncated: report the whole file again
+                ino, offset = stamp[2], 0
+            # read only what the snapshot holds, so ``data`` matches the ledger
+            if offset < stamp[1]:
+                yield from self._file_events(rel, ino, offset, stamp[1])
+            self.files[rel] = [ino, stamp[1]]
+        yield from self._sidecar_events(beancount_store)
+        self.sidecars = max(self.sidecars, started - _MTIME_SLACK_NS)
+        self.seen = {i: m for i, m in self.seen.items() if m >= self.sidecars}
+
+    def _prefix_lines(self, rel: str, ino: int, offset: int) -> int:
+        known = self._lines.get(rel)
+        if known is not None and known[0] == ino and known[1] == offset:
+            return known[2]
+        with open(self.base / rel, "rb") as f:
+            return f.read(offset).count(b"\n")
+
+    def _file_events(self, rel: str, ino: int, offset: int, end: int) -> Iterator[dict]:
+        from . import scanner
+
+        path = str(self.base / rel)
+        lines_before = self._prefix_lines(rel, ino, offset)
+        with open(path, "rb") as f:
+            f.seek(offset)
+            raw = f.read(end - offset)
+        self._lines[rel] = (ino, end, lines_before + raw.count(b"\n"))
+        try:
+            entries = scanner.parse_tail(raw.decode("utf-8"), os.path.normpath(path), lines_before)[0]
+        except ValueError as e:
+            self.files[rel] = [ino, end]
+            yield {"kind": "error", "file": rel, "message": str(e), "token": self.token()}
+            return
+        entries.sort(key=lambda e: e.meta["lineno"])
+        # byte offset of each line of ``raw``, to place the token after an entry
+        starts = [0]
+        i = raw.find(b"\n")
+        while i != -1:
+            starts.append(i + 1)
+            i = raw.find(b"\n", i + 1)
+        for n, e in enumerate(entries):
+            event = self._entry_event(e)
+            if event is None:
+                continue
+            if n + 1 < len(entries):
+                self.files[rel] = [ino, offset + starts[entries[n + 1].meta["lineno"] - lines_before - 1]]
+            else:
+                self.files[rel] = [ino, end]
+            event["token"] = self.token()
+            yield event
+
+    def _entry_event(self, e) -> Optional[dict]:
+        from . import beancount_spike, beancount_store
+
+        meta = e.meta
+        name = type(e).__name__
+        if name == "Custom" and e.type in _CUSTOM_KINDS:
+            kind, id_field = e.type, _CUSTOM_KINDS[e.type]
+            ident = beancount_spike.coerce_int(meta.get(id_field))
+            if ident is None:
+                return None
+            first = self._first_entries(kind, id_field).get(ident)
+            mapper = getattr(beancount_spike, f"map_custom_to_{kind}")
+            model = beancount_store._map_or_none(mapper, e)
+        elif name == "Transaction" and "invoice_id" in meta:
+            kind = "invoice"
+            ident = beancount_spike.coerce_int(meta.get("invoice_id"))
+            if ident is None:
+                return None
+            first = beancount_store._invoice_transactions().get(ident)
+            model = beancount_store.get_invoice(ident)
+            # the sidecar written with the invoice is part of this event
+            side = beancount_store.get_invoice_sidecar_path(ident)
+            m = _mtime(side) if side is not None else -1
+            if m >= self.sidecars:
+                self.seen[ident] = m
+        else:
+            return None
+        created = first is None or (first.meta.get("filename"), first.meta.get("lineno")) == (
+            meta["filename"],
+            meta["lineno"],
+        )
+        return {
+            "kind": kind,
+            "op": "created" if created else "updated",
+            "id": ident,
+            "data": config.dump_model(model) if model is not None else None,
+        }
+
+    def _first_entries(self, kind: str, id_field: str) -> dict:
+        """id -> first directive of custom type ``kind`` (built once per poll)."""
+        from . import beancount_spike, beancount_store
+
+        firsts = self._firsts.get(kind)
+        if firsts is None:
+            firsts = self._firsts[kind] = {}
+            for x in beancount_store._entries_for_custom_type(kind):
+                firsts.setdefault(beancount_spike.coerce_int(x.meta.get(id_field)), x)
+        return firsts
+
+    def _sidecar_events(self, beancount_store) -> Iterator[dict]:
+        mark = self.sidecars
+        index = beancount_store.invoice_sidecar_index()
+        changed = []
+        # sidecar updates replace the file, which changes its directory
+        if self._dirs[0] is not index:
+            self._dirs = (index, {os.path.dirname(p) for p in index})
+        for d in self._dirs[1]:
+            if _mtime(d) < mark:
+                continue
+            try:
+                it = os.scandir(d)
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    inv_id = index.get(entry.path)
+                    if inv_id is None:
+                        continue
+                    try:
+                        m = entry.stat().st_mtime_ns
+                    except OSError:
+                        continue
+                    if m >= mark and self.seen.get(inv_id) != m:
+                        changed.append((m, inv_id))
+        for m, inv_id in sorted(changed):
+            self.seen[inv_id] = m
+            inv = beancount_store.get_invoice(inv_id)
+            yield {
+                "kind": "invoice",
+                "op": "updated",
+                "id": inv_id,
+                "data": config.dump_model(inv) if inv is not None else None,
+                "token": self.token(),
+            }
+
+
+def _mtime(path: str) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return -1
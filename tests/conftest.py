@@ -0,0 +1,44 @@
+import asyncio
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from arledge import cli, snapshot
+
+
+@pytest.fixture
+def basedir(tmp_path, monkeypatch):
+    """An `arledge init`-ed base directory (``tmp_path``) set as ARLEDGE_BASEDIR.
+
+    Files written by a test are read back within milliseconds, so snapshot
+    stamps are never treated as racy. The snapshot cache is disabled again
+    afterwards. Test modules extend it by overriding ``basedir(basedir)``.
+    """
+    monkeypatch.setenv("ARLEDGE_BASEDIR", str(tmp_path))
+    monkeypatch.delenv("ARLEDGE_LOAD_PROFILE", raising=False)
+    monkeypatch.delenv("ARLEDGE_PROFILE", raising=False)
+    monkeypatch.setattr(snapshot, "_RACY_WINDOW_NS", 0)
+    assert CliRunner().invoke(cli.cli, ["init"]).exit_code == 0
+    yield tmp_path
+    snapshot.enable(False)
+
+
+@pytest.fixture
+def server(basedir):
+    """An MCP server on ``basedir`` with the resident snapshot enabled, as `mcp start` runs it."""
+    from arledge import mcp_server
+
+    snapshot.enable()
+    return mcp_server.create_mcp_server("Test")
+
+
+@pytest.fixture
+def call(server):
+    """``call(tool, **args)``: run an MCP tool on ``server`` and return its JSON results."""
+
+    def run(name, **args):
+        content = asyncio.run(server.call_tool(name, args))
+        return [json.loads(c.text) for c in content]
+
+    return run
@@ -33,6 +33,7 @@ def test_invoice_with_creditor_and_invoice_list_and_view(tmp_path):
     # create creditor and invoice using CLI in isolated filesystem
     runner = CliRunner()
     with runner.isolated_filesystem():
+        assert runner.invoke(cli.cli, ["customer", "create", "--model", json.dumps({"name":"K1"})]).exit_code == 0
         r = runner.invoke(cli.cli, ["creditor", "create", "--model", json.dumps({"name":"C1"})])
         assert r.exit_code == 0
         created_cred = json.loads(r.output)
@@ -0,0 +1,103 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from arledge import batch, beancount_store, cli, runner, snapshot
+
+
+def script(*ops):
+    return "".join((op if isinstance(op, str) else json.dumps(op)) + "\n" for op in ops)
+
+
+def results(output):
+    return [json.loads(line) for line in output.splitlines()]
+
+
+LINE = {"description": "Work", "quantity": "2", "unit_price": "100", "vat_rate": "25"}
+
+
+def test_batch_runs_ops_in_order(basedir):
+    ops = script(
+        {"command": "customer create", "model": {"name": "ACME"}, "id": "c1"},
+        {"command": "invoice create", "model": {"customer_id": 1, "lines": [LINE]}},
+        "",
+        {"argv": ["invoice", "view", "1"]},
+        {"command": "invoice list", "args": ["--fields", "id,total"]},
+        {"command": "invoice export 1", "args": ["--path", str(basedir / "inv 1.json")]},
+    )
+    r = CliRunner().invoke(cli.cli, ["batch", "--ops", "-"], input=ops)
+    assert r.exit_code == 0, r.output
+    res = results(r.output)
+    assert [x["op"] for x in res] == [1, 2, 4, 5, 6]
+    assert res[0]["id"] == "c1" and res[0]["result"]["name"] == "ACME"
+    assert "id" not in res[1] and res[1]["result"]["invoice_number"] == "INV-0001"
+    assert res[2]["result"]["total"] == "250.00"
+    assert res[3]["result"] == [{"id": 1, "total": "250.00"}]
+    assert json.loads((basedir / "inv 1.json").read_text(encoding="utf-8"))["id"] == 1
+    assert all(x["exit_code"] == 0 and "stderr" not in x for x in res)
+    # the snapshot is only enabled for the batch
+    assert not snapshot.is_enabled()
+
+
+def test_batch_reports_failures_and_continues(basedir, tmp_path):
+    ops_file = tmp_path / "ops.jsonl"
+    ops_file.write_text(
+        script(
+            "not json",
+            {"command": "serve"},
+            {"args": ["x"]},
+            {"argv": ["invoice", "view", "7"]},
+            {"command": "customer create", "model": {"name": "Bo"}},
+        ),
+        encoding="utf-8",
+    )
+    r = CliRunner().invoke(cli.cli, ["batch", "--ops", str(ops_file)])
+    assert r.exit_code == 2
+    res = results(r.output)
+    assert [x["exit_code"] for x in res] == [2, 2, 2, 2, 0]
+    assert res[1]["stderr"] == "Invalid operation: 'serve' cannot run inside a batch\n"
+    assert res[3]["stderr"] == "Invoice not found\n" and res[3]["result"] is None
+    assert beancount_store.get_customer(1).name == "Bo"
+
+    r = CliRunner().invoke(cli.cli, ["batch", "--ops", str(ops_file), "--stop-on-error"])
+    assert r.exit_code == 2
+    assert len(results(r.output)) == 1
+    assert beancount_store.get_customer(2) is None
+
+
+def test_batch_keeps_non_json_stdout(basedir):
+    out = list(batch.run([script({"command": "customer list", "args": ["--format", "jsonl"]})]))
+    assert out == [{"op": 1, "exit_code": 0, "result": None, "stderr": "No customers\n"}]
+    batch_ops = [script({"command": "customer create", "model": {"name": n}}) for n in ("A", "B")]
+    list(batch.run(batch_ops))
+    (res,) = batch.run([script({"command": "customer list", "args": ["--format", "jsonl", "--fields", "id"]})])
+    assert res["stdout"] == '{"id": 1}\n{"id": 2}\n' and "result" not in res
+
+
+def test_parse_op():
+    assert batch.parse_op({"command": "invoice view", "args": [3]}) == ["invoice", "view", "3"]
+    assert batch.parse_op({"command": "customer create", "model": {"name": "Å"}}) == [
+        "customer", "create", "--model", '{"name": "Å"}'
+    ]
+    for bad in ([], {"argv": "invoice list"}, {"argv": []}, {"command": "mcp start"}, {"command": "x", "args": "y"}):
+        with pytest.raises(ValueError):
+            batch.parse_op(bad)
+
+
+def test_parse_op_skips_root_options():
+    assert batch.parse_op({"argv": ["--timings", "invoice", "list"]}) == ["--timings", "invoice", "list"]
+    for argv, name in ((["--timings", "watch"], "watch"), (["--profile", "x", "serve"], "serve"), (["--profile=x", "batch"], "batch")):
+        with pytest.raises(ValueError, match=f"'{name}' cannot run inside a batch"):
+            batch.parse_op({"argv": argv})
+    for argv in (["--timings"], ["--bogus", "watch"]):
+        with pytest.raises(ValueError, match="no command"):
+            batch.parse_op({"argv": argv})
+
+
+def test_batch_via_runner_does_not_deadlock(basedir, tmp_path):
+    ops_file = tmp_path / "ops.jsonl"
+    ops_file.write_text(script({"command": "customer create", "model": {"name": "ACME"}}), encoding="utf-8")
+    res = runner.run_cli(["batch", "--ops", str(ops_file)])
+    assert res.exit_code == 0
+    assert results(res.stdout)[0]["result"]["id"] == 1
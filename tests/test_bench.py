@@ -0,0 +1,69 @@
+import json
+
+from click.testing import CliRunner
+
+from arledge import bench, cli
+
+
+def test_percentiles_and_summary():
+    values = [float(v) for v in range(1, 101)]
+    assert [bench.percentile(values, p) for p in (50, 90, 99, 100)] == [50.0, 90.0, 99.0, 100.0]
+    assert bench.percentile([3.0], 99) == 3.0
+    s = bench.summarize([0.002, 0.001, 0.004, 0.003])
+    assert (s["n"], s["min_ms"], s["p50_ms"], s["max_ms"], s["mean_ms"]) == (4, 1.0, 2.0, 4.0, 2.5)
+    assert s["ops_per_s"] == 400.0
+
+
+def test_compare_matches_by_size_mode_and_op():
+    old = {"results": [{"invoices": 10, "mode": "cli", "op": "validate", "p50_ms": 4.0, "peak_rss_kb": 1000}]}
+    new = {
+        "results": [
+            {"invoices": 10, "mode": "cli", "op": "validate", "p50_ms": 3.0, "peak_rss_kb": 1100},
+            {"invoices": 10, "mode": "mcp", "op": "invoice_view", "p50_ms": 1.0, "peak_rss_kb": 900},
+        ]
+    }
+    (row,) = bench.compare(new, old)
+    assert (row["op"], row["p50_ratio"], row["peak_rss_ratio"]) == ("validate", 0.75, 1.1)
+
+
+def test_cli_bench_report(tmp_path):
+    out = tmp_path / "report.json"
+    args = ["bench", "--sizes", "20", "--repeat", "2", "--ops", "invoice_view,validate,validate_incremental,invoice_create", "--output", str(out)]
+    r = CliRunner().invoke(cli.cli, args + ["--workdir", str(tmp_path / "work")])
+    assert r.exit_code == 0, r.stderr
+    report = json.loads(r.stdout)
+    assert report == json.loads(out.read_text(encoding="utf-8"))
+    assert report["ledgers"][0]["invoices"] == 20 and report["meta"]["cpus"]
+    measured = [(x["mode"], x["op"]) for x in report["results"]]
+    assert measured == [("cli", "invoice_view"), ("mcp", "invoice_view"), ("cli", "validate"), ("cli", "validate_incremental"), ("cli", "invoice_create"), ("mcp", "invoice_create")]
+    for x in report["results"]:
+        assert x["n"] == 2 and 0 < x["min_ms"] <= x["p50_ms"] <= x["p99_ms"] == x["max_ms"]
+        assert x["peak_rss_kb"] >= x["setup_rss_kb"] > 0 and x["first_call_ms"] > 0
+    # the ledger kept in --workdir got the created invoices
+    assert (tmp_path / "work" / "invoices-20" / ".arledge" / "invoice_seq").read_text(encoding="utf-8") == "27\n"
+
+    r = CliRunner().invoke(cli.cli, ["bench", "--sizes", "20", "--repeat", "1", "--ops", "validate", "--modes", "cli", "--compare", str(out)])
+    assert r.exit_code == 0, r.stderr
+    (row,) = json.loads(r.stdout)["comparison"]
+    assert row["op"] == "validate" and row["baseline_p50_ms"] == report["results"][2]["p50_ms"]
+
+
+def test_cli_bench_rejects_unknown_selection():
+    r = CliRunner().invoke(cli.cli, ["bench", "--ops", "nope"])
+    assert r.exit_code == 2 and "nope" in r.stderr
+
+
+def test_validate_op_runs_without_state(basedir):
+    from arledge import validation
+
+    state = validation.state_path(basedir)
+    spec = {"base": str(basedir), "mode": "cli", "op": "validate", "repeat": 1, "seed": 0, "invoices": 1}
+    call, before = bench._operation(spec)
+    call(0)
+    assert state.exists()
+    before()
+    assert not state.exists()
+    call, before = bench._operation({**spec, "op": "validate_incremental"})
+    call(0)
+    before()
+    assert state.exists()
@@ -0,0 +1,68 @@
+import json
+import subprocess
+import sys
+
+from click.testing import CliRunner
+
+from arledge import cli, models, schemas
+
+# modules the commands below must not import at start-up
+HEAVY = ("pydantic", "beancount", "mcp", "arledge.models", "arledge.beancount_store")
+
+
+def run_cli(*arg_lists):
+    """Run the CLI with each argv in a fresh interpreter; return ``(heavy modules imported, stdout)``."""
+    code = (
+        "import sys\n"
+        "from arledge.cli import cli\n"
+        f"for args in {list(arg_lists)!r}:\n"
+        "    try:\n"
+        "        cli(args)\n"
+        "    except SystemExit:\n"
+        "        pass\n"
+        "print('\\n'.join(sys.modules), file=sys.stderr)\n"
+    )
+    r = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    heavy = sorted({m for m in r.stderr.splitlines() if m.split(".")[0] in HEAVY or m in HEAVY})
+    return heavy, r.stdout
+
+
+def test_help_does_not_import_models():
+    heavy, out = run_cli(["--help"], ["invoice", "--help"])
+    assert heavy == []
+    assert "Usage:" in out
+
+
+def test_schema_commands_do_not_import_models():
+    heavy, out = run_cli(["schema", "invoice"], ["customer", "create", "--json-schema"])
+    assert heavy == []
+    decoder = json.JSONDecoder()
+    invoice, end = decoder.raw_decode(out)
+    assert invoice == schemas.get("Invoice") and invoice["title"] == "Invoice"
+    assert decoder.raw_decode(out[end:].lstrip())[0]["title"] == "Customer"
+
+
+def test_schema_artifact_matches_models():
+    # regenerate with `python -m arledge.schemas` after changing a model
+    # compared as text: key order (model field order) is part of the output
+    stored = json.loads(schemas.ARTIFACT.read_text(encoding="utf-8"))
+    assert json.dumps(stored) == json.dumps(schemas.build()), "src/arledge/_schemas.json is stale"
+    for name, model_name in schemas.NAMES.items():
+        r = CliRunner().invoke(cli.cli, ["schema", name])
+        assert r.exit_code == 0
+        expected = json.dumps(getattr(models, model_name).model_json_schema(), indent=2, ensure_ascii=False)
+        assert r.output == expected + "\n"
+
+
+def test_schema_falls_back_to_models(tmp_path, monkeypatch):
+    monkeypatch.setattr(schemas, "ARTIFACT", tmp_path / "missing.json")
+    monkeypatch.setattr(schemas, "_cache", None)
+    assert schemas.get("Creditor") == models.Creditor.model_json_schema()
+    out = schemas.write(tmp_path / "schemas.json")
+    assert json.loads(out.read_text(encoding="utf-8"))["InvoiceLine"] == models.InvoiceLine.model_json_schema()
+
+
+def test_unknown_schema_name():
+    r = CliRunner().invoke(cli.cli, ["schema", "nope"])
+    assert r.exit_code == 2
+    assert "customer, creditor, account, payment-account, invoice, invoice-line" in r.output
@@ -0,0 +1,115 @@
+import json
+import threading
+
+import pytest
+from click.testing import CliRunner
+
+from arledge import beancount_store, cli, daemon, runner, snapshot
+
+
+@pytest.fixture
+def server(basedir):
+    sock = basedir / ".arledge" / daemon.SOCKET_NAME
+    srv = daemon.create_server(sock, basedir)
+    t = threading.Thread(target=srv.serve_forever, daemon=True)
+    t.start()
+    yield sock
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_snapshot_cache_reuses_and_detects_changes(basedir):
+    snapshot.enable()
+    s1 = beancount_store._snapshot()
+    assert beancount_store._snapshot() is s1
+    (basedir / "includes" / "customers.beancount").write_text(
+        '2026-03-01 custom "customer" "ACME"\n  customer_id: 1\n', encoding="utf-8"
+    )
+    s2 = beancount_store._snapshot()
+    assert s2 is not s1
+    assert [c.name for c in beancount_store.list_customers()] == ["ACME"]
+    # a new month file matching the include glob is noticed too
+    (basedir / "includes" / "invoices" / "1999-01.beancount").write_text("", encoding="utf-8")
+    assert beancount_store._snapshot() is not s2
+
+
+def test_run_cli_captures_contract(basedir):
+    res = runner.run_cli(["customer", "create", "--model", json.dumps({"name": "A"})])
+    assert res.exit_code == 0
+    assert json.loads(res.stdout)["name"] == "A"
+    res = runner.run_cli(["invoice", "view", "999"])
+    assert res.exit_code == 2
+    assert "Invoice not found" in res.stderr
+    res = runner.run_cli(["no-such-command"])
+    assert res.exit_code == 2
+    assert "No such command" in res.stderr
+
+
+def test_forward_matches_in_process_output(server, basedir):
+    reply = daemon.forward(["customer", "create", "--model", json.dumps({"name": "Fwd"})], server, basedir)
+    assert reply is not None and reply["exit_code"] == 0
+    assert json.loads(reply["stdout"])["name"] == "Fwd"
+    reply = daemon.forward(["customer", "list"], server, basedir)
+    local = CliRunner().invoke(cli.cli, ["customer", "list"])
+    assert reply["stdout"] == local.stdout
+    reply = daemon.forward(["creditor", "view", "42"], server, basedir)
+    assert reply["exit_code"] == 2
+    assert "Creditor not found" in reply["stderr"]
+
+
+def test_forward_falls_back(server, basedir, tmp_path_factory):
+    other = tmp_path_factory.mktemp("other")
+    assert daemon.forward(["customer", "list"], server, other) is None
+    assert daemon.forward(["serve"], server, basedir) is None
+    assert daemon.forward(["customer", "list"], basedir / "missing.sock", basedir) is None
+
+
+def test_local_commands_after_root_options(server, basedir):
+    for argv in (["--timings", "watch"], ["--timings", "batch", "-"], ["--profile", "cprofile", "serve"], ["--profile=cprofile", "mcp"], ["--bogus", "watch"]):
+        assert daemon.forward(argv, server, basedir) is None, argv
+    # the daemon refuses them as well, without running the command
+    import socket
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(str(server))
+        conn.sendall(json.dumps({"argv": ["--timings", "watch"], "basedir": str(basedir)}).encode("utf-8") + b"\n")
+        assert json.loads(daemon._recv_line(conn)) == {"fallback": "command must run locally"}
+    reply = daemon.forward(["--timings", "customer", "list"], server, basedir)
+    assert reply["exit_code"] == 0 and json.loads(reply["stderr"].splitlines()[-1])["command"] == "customer list"
+    # the root options known to the daemon are the root group's
+    options = {o for p in cli.cli.params for o in p.opts}
+    assert options == daemon._ROOT_FLAGS | daemon._ROOT_VALUE_OPTIONS
+
+
+def test_forwarded_env_replaces_daemon_settings(server, basedir, monkeypatch):
+    import os
+
+    # set when the daemon started, not by the client
+    monkeypatch.setenv("ARLEDGE_LOAD_PROFILE", "nope")
+    monkeypatch.setattr(daemon, "_forwarded_env", lambda: {})
+    reply = daemon.forward(["customer", "list"], server, basedir)
+    assert reply["exit_code"] == 0, reply["stderr"]
+    assert os.environ["ARLEDGE_LOAD_PROFILE"] == "nope"
+    # what the client sets still applies
+    monkeypatch.setattr(daemon, "_forwarded_env", lambda: {"ARLEDGE_PROFILE": "1"})
+    reply = daemon.forward(["customer", "list"], server, basedir)
+    assert json.loads(reply["stderr"].splitlines()[-1])["command"] == "customer list"
+    assert "ARLEDGE_PROFILE" not in os.environ
+
+
+def test_second_daemon_refused(server, basedir):
+    with pytest.raises(RuntimeError):
+        daemon.create_server(server, basedir)
+
+
+def test_client_main_uses_daemon_then_local(server, basedir, monkeypatch, capsys):
+    from arledge import client
+
+    with pytest.raises(SystemExit) as e:
+        client.main(["customer", "list"])
+    assert e.value.code == 0
+    assert "No customers" in capsys.readouterr().err
+    monkeypatch.setenv("ARLEDGE_NO_DAEMON", "1")
+    with pytest.raises(SystemExit) as e:
+        client.main(["customer", "list"])
+    assert e.value.code == 0
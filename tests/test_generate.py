@@ -0,0 +1,62 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from arledge import beancount_store, beancount_write, cli, generate, models, validation
+
+
+def files(base):
+    return {str(p.relative_to(base)): p.read_bytes() for p in sorted(base.rglob("*")) if p.is_file()}
+
+
+@pytest.fixture
+def base(tmp_path, monkeypatch):
+    monkeypatch.setenv("ARLEDGE_BASEDIR", str(tmp_path))
+    monkeypatch.setenv("BEANCOUNT_DISABLE_LOAD_CACHE", "1")
+    return tmp_path
+
+
+def test_generated_ledger_reads_and_validates(base):
+    stats = generate.generate(base, 4, 30, lines_per_invoice=3, months=3, seed=7, end_month="2026-02")
+    assert stats["months"] == ["2025-12", "2026-02"] and stats["lines"] == 90
+    assert sorted(p.name for p in (base / "includes" / "invoices").glob("*.beancount")) == [
+        "2025-12.beancount",
+        "2026-01.beancount",
+        "2026-02.beancount",
+    ]
+    assert [c.id for c in beancount_store.list_customers()] == [1, 2, 3, 4]
+    invoices = beancount_store.list_invoices()
+    assert sorted(inv.id for inv in invoices) == list(range(1, 31))
+    # ids follow dates
+    by_id = sorted(invoices, key=lambda inv: inv.id)
+    assert [inv.created_at for inv in by_id] == sorted(inv.created_at for inv in by_id)
+    assert all(len(inv.lines) == 3 and 1 <= inv.customer_id <= 4 for inv in invoices)
+    report = validation.run(base)
+    assert report.ok and not report.mismatches and not report.orphans
+    # the sequence continues after the generated invoices
+    created = beancount_write.create_invoice(models.Invoice(customer_id=1, lines=[{"description": "x", "unit_price": "1"}]))
+    assert created.id == 31
+
+
+def test_same_arguments_give_identical_files(tmp_path):
+    first, second, other = tmp_path / "a", tmp_path / "b", tmp_path / "c"
+    for d, seed in ((first, 1), (second, 1), (other, 2)):
+        d.mkdir()
+        generate.generate(d, 3, 12, lines_per_invoice=2, months=2, seed=seed, end_month="2026-10", codec="gzip")
+    assert files(first) == files(second)
+    assert files(first) != files(other)
+
+
+def test_cli_generate(base):
+    runner = CliRunner()
+    r = runner.invoke(cli.cli, ["dev", "generate", "--end-month", "2026-13"])
+    assert r.exit_code == 2 and "invalid month" in r.stderr
+    r = runner.invoke(cli.cli, ["dev", "generate", "--customers", "2", "--invoices", "5", "--months", "1", "--end-month", "2026-10"])
+    assert r.exit_code == 0, r.stderr
+    stats = json.loads(r.stdout)
+    assert (stats["customers"], stats["invoices"], stats["month_files"]) == (2, 5, 1)
+    assert (base / ".arledge" / "invoice_seq").read_text(encoding="utf-8") == "6\n"
+    # an existing ledger is never overwritten
+    r = runner.invoke(cli.cli, ["dev", "generate"])
+    assert r.exit_code == 2 and "already exists" in r.stderr
@@ -0,0 +1,92 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+import pytest
+from hypothesis import given, strategies as st
+
+from arledge import totals
+from arledge.models import Invoice, InvoiceLine
+
+
+def reference_line(q, up, rate):
+    # the InvoiceLine.compute_totals arithmetic before arledge.totals existed
+    net = (q * up).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    vat = (net * (Decimal(rate) / Decimal("100"))).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    lt = (net + vat).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    return net, vat, lt
+
+
+def reference_invoice(amounts):
+    subtotal = Decimal("0")
+    total_vat = Decimal("0")
+    for net, vat in amounts:
+        subtotal += Decimal(net)
+        total_vat += Decimal(vat)
+    subtotal = subtotal.quantize(Decimal("0.01"))
+    total_vat = total_vat.quantize(Decimal("0.01"))
+    return subtotal, total_vat, (subtotal + total_vat).quantize(Decimal("0.01"))
+
+
+def outcome(fn, *args):
+    try:
+        return [(str(x), x.as_tuple()) for x in fn(*args)]
+    except ArithmeticError as e:
+        return type(e)
+
+
+# includes negative zero, exponents and values near the 28-digit precision
+amounts = st.decimals(allow_nan=False, allow_infinity=False, min_value=-10**30, max_value=10**30)
+rates = st.one_of(
+    st.sampled_from([Decimal("0"), Decimal("-0"), Decimal("25"), Decimal("25.0"), Decimal("12.5"), Decimal("6")]),
+    st.decimals(allow_nan=False, allow_infinity=False, min_value=-1000, max_value=1000),
+)
+
+
+@given(q=amounts, up=amounts, rate=rates)
+def test_line_amounts_match_reference(q, up, rate):
+    # identical text and digits, or the same error
+    assert outcome(totals.line_amounts, q, up, rate) == outcome(reference_line, q, up, rate)
+
+
+@given(st.lists(st.tuples(amounts, amounts), max_size=20))
+def test_invoice_amounts_match_reference(pairs):
+    pairs = [(a.quantize(Decimal("0.01")) if abs(a) < 10**20 else a, b) for a, b in pairs]
+    assert outcome(totals.invoice_amounts, pairs) == outcome(reference_invoice, pairs)
+
+
+def test_negative_zero_is_kept():
+    net, vat, lt = totals.line_amounts(Decimal("-0.001"), Decimal("1"), Decimal("25"))
+    assert (str(net), str(vat), str(lt)) == ("-0.00", "-0.00", "-0.00")
+    # the invoice sums start from +0
+    assert [str(x) for x in totals.invoice_amounts([(net, vat)])] == ["0.00", "0.00", "0.00"]
+
+
+@given(
+    st.lists(
+        st.tuples(
+            st.decimals(min_value=-10**6, max_value=10**6, places=3),
+            st.decimals(min_value=-10**4, max_value=10**4, places=4),
+            st.sampled_from(["0", "6", "12", "25", "25.0"]),
+        ),
+        max_size=15,
+    )
+)
+def test_invoice_model_matches_reference(rows):
+    lines = [
+        {"description": "x", "quantity": str(q), "unit_price": str(up), "vat_rate": rate}
+        for q, up, rate in rows
+    ]
+    inv = Invoice(customer_id=1, lines=lines)
+    expected = [reference_line(q, up, Decimal(rate)) for q, up, rate in rows]
+    assert [(l.net, l.vat, l.line_total) for l in inv.lines] == expected
+    assert [str(l.line_total) for l in inv.lines] == [str(e[2]) for e in expected]
+    assert (inv.subtotal, inv.total_vat, inv.total) == reference_invoice((n, v) for n, v, _ in expected)
+
+
+def test_line_fields_set_unchanged():
+    line = InvoiceLine(description="x", unit_price="2")
+    assert line.model_fields_set == {"description", "unit_price", "net", "vat", "line_total"}
+
+
+def test_precision_overflow_still_raises():
+    with pytest.raises(ArithmeticError):
+        InvoiceLine(description="x", quantity=Decimal("1E+30"), unit_price="1")
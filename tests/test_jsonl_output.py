@@ -0,0 +1,52 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from arledge import beancount_store, beancount_write, cli, models, paging
+
+
+@pytest.fixture
+def runner(basedir):
+    r = CliRunner()
+    return r
+
+
+def populate():
+    beancount_write.create_customers([models.Customer(name=f"C{i}") for i in range(3)])
+    line = {"description": "S", "unit_price": "10.00"}
+    beancount_write.create_invoices([models.Invoice(customer_id=1, lines=[line]) for _ in range(4)])
+
+
+@pytest.mark.parametrize("kind", ["customer", "creditor", "invoice"])
+def test_jsonl_matches_json_array(runner, kind):
+    populate()
+    beancount_write.create_creditor(models.Creditor(name="Cred"))
+    arr = json.loads(runner.invoke(cli.cli, [kind, "list"]).stdout)
+    r = runner.invoke(cli.cli, [kind, "list", "--format", "jsonl"])
+    assert r.exit_code == 0
+    recs = [json.loads(ln) for ln in r.stdout.splitlines()]
+    strip = lambda d: {k: v for k, v in d.items() if k != "created_at"}
+    assert [strip(x) for x in recs] == [strip(x) for x in arr]
+
+
+def test_jsonl_is_lazy(runner, monkeypatch):
+    populate()
+    calls = []
+    orig = beancount_store._map_invoice_transaction
+    monkeypatch.setattr(
+        beancount_store, "_map_invoice_transaction", lambda e, with_lines=True, view=False: calls.append(1) or orig(e, with_lines, view)
+    )
+    records = paging.iter_records("invoice", "id")
+    assert next(records) == {"id": 4}
+    assert len(calls) == 1
+
+
+def test_jsonl_empty_and_errors(runner):
+    r = runner.invoke(cli.cli, ["invoice", "list", "--format", "jsonl"])
+    assert r.exit_code == 0 and r.stdout == ""
+    assert "No invoices" in r.output
+    r = runner.invoke(cli.cli, ["invoice", "list", "--format", "jsonl", "--limit", "2"])
+    assert r.exit_code == 2
+    r = runner.invoke(cli.cli, ["customer", "list", "--format", "jsonl", "--fields", "bogus"])
+    assert r.exit_code == 2
@@ -0,0 +1,147 @@
+import os
+import time
+
+import pytest
+
+from arledge import beancount_spike, beancount_store, beancount_write, config, loading, models, serialize, snapshot
+
+
+@pytest.fixture
+def basedir(basedir):
+    beancount_write.create_customers([models.Customer(name=f"C{i}", email=f"c{i}@example.com") for i in range(5)])
+    cred = beancount_write.create_creditor(models.Creditor(name="Me AB"))
+    beancount_write.create_payment_account(models.PaymentAccount(creditor_id=cred.id, type="bank", identifier="SE1"))
+    line = {"description": "Konsult", "quantity": "3", "unit_price": "99.95", "vat_rate": "25"}
+    beancount_write.create_invoices([models.Invoice(customer_id=1 + i, lines=[line] * (i + 1)) for i in range(4)])
+    beancount_write.update_customer(models.Customer(id=2, name="C2 renamed"))
+    with open(basedir / "ledger.beancount", "a", encoding="utf-8") as f:
+        # a plugin and an option only the full profile acts on
+        f.write('option "operating_currency" "SEK"\nplugin "beancount.plugins.auto_accounts"\n')
+    with open(basedir / "includes" / "invoices" / "legacy.beancount", "w", encoding="utf-8") as f:
+        # hand-written: elided amount (filled in by booking) and an EUR invoice
+        f.write(
+            '2024-01-02 * "Old invoice"\n  invoice_id: 50\n  customer_id: 2\n  due_at: "2024-02-01"\n'
+            "  Assets:Receivable:2\n  Income:Services  -100 EUR\n\n"
+            '2024-01-03 * "Older invoice"\n  invoice_id: 51\n  customer_id: 3\n'
+            "  Assets:Receivable:3  10 USD\n  Income:Services\n"
+        )
+    return basedir
+
+
+def mapped():
+    # created_at of invoices without one in the ledger is the load time
+    invoices = serialize.to_builtins(beancount_store.list_invoices() + [beancount_store.get_invoice(3)])
+    for d in invoices:
+        d.pop("created_at")
+    return {
+        "customers": serialize.to_builtins(beancount_store.list_customers()),
+        "creditors": serialize.to_builtins(beancount_store.list_creditors()),
+        "accounts": serialize.to_builtins(beancount_store.list_payment_accounts()),
+        "invoices": invoices,
+    }
+
+
+def test_profiles_map_the_same_entities(basedir, monkeypatch):
+    results = {}
+    for profile in loading.PROFILES:
+        monkeypatch.setenv("ARLEDGE_LOAD_PROFILE", profile)
+        results[profile] = mapped()
+    assert results["arledge"] == results["full"] == results["parse"]
+    assert [i["id"] for i in results["arledge"]["invoices"]] == [51, 50, 4, 3, 2, 1, 3]
+    assert results["arledge"]["customers"][1]["name"] == "C2 renamed"
+
+
+def test_profiles_see_the_same_transactions(basedir):
+    def invoice_txns(profile):
+        entries = loading.load(basedir / "ledger.beancount", profile)[0]
+        txns = [e for e in entries if type(e).__name__ == "Transaction"]
+        return [(e.date, e.narration, e.meta["lineno"], beancount_spike.map_transaction_to_invoice(e).currency) for e in txns]
+
+    full = invoice_txns("full")
+    assert invoice_txns("parse") == invoice_txns("arledge") == full
+    assert [c for *_, c in full][:2] == ["EUR", "USD"]
+
+
+def test_arledge_profile_skips_booking_and_plugins(basedir):
+    ledger = basedir / "ledger.beancount"
+    full, _, opts = loading.load(ledger, "full")
+    raw, errors, raw_opts = loading.load(ledger, "arledge")
+    # auto_accounts inserts Open directives; booking fills in the elided amount
+    assert any(type(e).__name__ == "Open" for e in full)
+    assert not any(type(e).__name__ == "Open" for e in raw)
+    assert raw_opts["include"] == opts["include"]
+    assert errors == []
+    booked = loading.load(ledger, "parse")[0]
+    legacy = [e for e in booked if type(e).__name__ == "Transaction" and e.meta["invoice_id"] == 50][0]
+    assert str(legacy.postings[0].units) == "100 EUR"
+
+
+def test_unknown_profile(basedir, monkeypatch):
+    monkeypatch.setenv("ARLEDGE_LOAD_PROFILE", "fast")
+    with pytest.raises(ValueError, match="unknown load profile 'fast'"):
+        beancount_store.list_customers()
+    monkeypatch.delenv("ARLEDGE_LOAD_PROFILE")
+    monkeypatch.setattr(config, "LOAD_PROFILE", "parse")
+    assert loading.current_profile() == "parse"
+
+
+def test_snapshots_are_kept_per_profile(basedir, monkeypatch):
+    snapshot.enable()
+    try:
+        monkeypatch.setenv("ARLEDGE_LOAD_PROFILE", "full")
+        full = beancount_store._snapshot()
+        monkeypatch.setenv("ARLEDGE_LOAD_PROFILE", "arledge")
+        raw = beancount_store._snapshot()
+        assert raw is not full and len(raw.entries) < len(full.entries)
+    finally:
+        snapshot.enable(False)
+
+
+def test_own_appends_merge_only_into_parse_only_snapshots(basedir, monkeypatch):
+    monkeypatch.setattr(snapshot, "_RACY_WINDOW_NS", 0)
+    snapshot.enable()
+    try:
+        monkeypatch.setenv("ARLEDGE_LOAD_PROFILE", "full")
+        full = beancount_store._snapshot()
+        monkeypatch.setenv("ARLEDGE_LOAD_PROFILE", "arledge")
+        raw = beancount_store._snapshot()
+        beancount_write.create_customer(models.Customer(name="Appended"))
+        # merged into the parse-only snapshot; the booked one is reloaded
+        assert beancount_store._snapshot() is raw
+        monkeypatch.setenv("ARLEDGE_LOAD_PROFILE", "full")
+        reloaded = beancount_store._snapshot()
+        assert reloaded is not full and not reloaded.incremental
+        assert "Appended" in [c.name for c in beancount_store.list_customers()]
+    finally:
+        snapshot.enable(False)
+
+
+def test_stale_pickle_cache_is_dropped(basedir):
+    # beancount writes .ledger.beancount.picklecache after slow loads and
+    # only re-checks the files it loaded, not the include globs
+    ledger = basedir / "ledger.beancount"
+    cache = basedir / ".ledger.beancount.picklecache"
+    from beancount import loader
+
+    old = loader.PICKLE_CACHE_THRESHOLD
+    loader.PICKLE_CACHE_THRESHOLD = 0
+    loader.initialize(True)
+    try:
+        loading.load(ledger, "full")
+        assert cache.exists()
+        assert loading.drop_stale_pickle_cache(ledger) is False
+        past = time.time() - 10
+        os.utime(cache, (past, past))
+        (basedir / "includes" / "invoices" / "2020-01.beancount").write_text(
+            '2020-01-01 * "New month"\n  invoice_id: 60\n  customer_id: 1\n'
+            "  Assets:Receivable:1  1 SEK\n  Income:Services  -1 SEK\n",
+            encoding="utf-8",
+        )
+        def has_new_invoice(entries):
+            return any(getattr(e, "meta", {}).get("invoice_id") == 60 for e in entries)
+
+        assert not has_new_invoice(loader.load_file(str(ledger))[0])
+        assert has_new_invoice(loading.load(ledger, "full")[0])
+    finally:
+        loader.PICKLE_CACHE_THRESHOLD = old
+        loader.initialize(os.getenv("BEANCOUNT_DISABLE_LOAD_CACHE") is None)
@@ -0,0 +1,60 @@
+from arledge import beancount_store, beancount_write, models
+
+
+def line(desc="Service", price="100.00"):
+    return {"description": desc, "unit_price": price}
+
+
+def test_customer_create_many_and_get_many(call, tmp_path):
+    res = call("customer_create_many", items=[{"name": "A"}, {"email": "no-name"}, {"name": "B"}])
+    assert [r["ok"] for r in res] == [True, False, True]
+    assert [r["index"] for r in res] == [0, 1, 2]
+    assert [r["result"]["id"] for r in res if r["ok"]] == [1, 2]
+    assert "name" in res[1]["error"]
+    # both customers were committed with one append
+    text = (tmp_path / "includes" / "customers.beancount").read_text(encoding="utf-8")
+    assert [ln.split('"')[3] for ln in text.splitlines() if ln.startswith("20")] == ["A", "B"]
+
+    got = call("customer_get_many", customer_ids=[2, 7, 1])
+    assert [(g["id"], g["ok"]) for g in got] == [(2, True), (7, False), (1, True)]
+    assert got[0]["result"]["name"] == "B"
+    assert got[1]["error"] == "Customer not found"
+
+
+def test_invoice_create_many_and_view_many(call, tmp_path):
+    call("customer_create", model={"name": "A"})
+    res = call(
+        "invoice_create_many",
+        items=[
+            {"customer_id": 1, "lines": [line()]},
+            {"customer_id": 1, "lines": [{"description": "bad", "unit_price": "x"}]},
+            {"customer_id": 1, "lines": [line("Other", "50.00")]},
+        ],
+    )
+    assert [r["ok"] for r in res] == [True, False, True]
+    assert [r["result"]["invoice_number"] for r in res if r["ok"]] == ["INV-0001", "INV-0002"]
+    assert (tmp_path / ".arledge" / "invoice_seq").read_text(encoding="utf-8") == "3\n"
+
+    got = call("invoice_view_many", invoice_ids=[2, 99, 1])
+    assert [(g["id"], g["ok"]) for g in got] == [(2, True), (99, False), (1, True)]
+    assert got[0]["result"]["lines"][0]["description"] == "Other"
+    assert got[1]["error"] == "Invoice not found"
+
+
+def test_bulk_write_matches_single_writes(server):
+    beancount_write.create_customer(models.Customer(name="ACME"))
+    single = beancount_write.create_invoice(models.Invoice(customer_id=1, lines=[line()]))
+    bulk = beancount_write.create_invoices([models.Invoice(customer_id=1, lines=[line()]) for _ in range(3)])
+    assert [b.id for b in bulk] == [single.id + 1, single.id + 2, single.id + 3]
+    invs = beancount_store.get_invoices([1, 2, 3, 4])
+    assert sorted(invs) == [1, 2, 3, 4]
+    assert all(inv.total == invs[1].total for inv in invs.values())
+    assert beancount_store.get_invoice(4).lines == invs[4].lines
+
+
+def test_list_tools_paginate(call):
+    call("customer_create_many", items=[{"name": f"C{i}"} for i in range(3)])
+    p1 = call("customer_list", limit=2, fields=["id", "name"])[0]
+    assert p1["items"] == [{"id": 1, "name": "C0"}, {"id": 2, "name": "C1"}]
+    p2 = call("customer_list", cursor=p1["next_cursor"], fields=["name"])[0]
+    assert p2 == {"items": [{"name": "C2"}], "next_cursor": None}
@@ -0,0 +1,37 @@
+from arledge import beancount_store, snapshot
+
+
+def test_own_writes_update_snapshot_in_place(call):
+    call("customer_create", model={"name": "ACME"})
+    snap = beancount_store._snapshot()
+    call("customer_create", model={"name": "Beta"})
+    created = call("invoice_create", model={"customer_id": 2, "lines": [{"description": "x", "unit_price": "10.00"}]})
+    assert created[0]["id"] == 1
+    # served from the same resident snapshot, no reload from disk
+    assert beancount_store._snapshot() is snap
+    assert [c["name"] for c in call("customer_list")] == ["ACME", "Beta"]
+    assert call("invoice_view", invoice_id=1)[0]["lines"][0]["description"] == "x"
+    assert beancount_store._snapshot() is snap
+    # the in-place merge matches a fresh load
+    fresh = beancount_store._load_file(snap.ledger_file)[0]
+    assert [(type(e).__name__, e.date, e.meta["lineno"]) for e in snap.entries] == [
+        (type(e).__name__, e.date, e.meta["lineno"]) for e in fresh
+    ]
+
+
+def test_external_edit_invalidates(call, tmp_path):
+    call("customer_create", model={"name": "ACME"})
+    snap = beancount_store._snapshot()
+    with open(tmp_path / "includes" / "customers.beancount", "a", encoding="utf-8") as f:
+        f.write('\n2026-03-01 custom "customer" "Edited"\n  customer_id: 9\n')
+    assert [c["name"] for c in call("customer_list")] == ["ACME", "Edited"]
+    assert beancount_store._snapshot() is not snap
+
+
+def test_append_mismatch_drops_snapshot(call, tmp_path):
+    call("customer_create", model={"name": "ACME"})
+    snap = beancount_store._snapshot()
+    path = tmp_path / "includes" / "customers.beancount"
+    # size does not line up with what this process says it appended
+    snapshot.note_append(path, "\n", 1)
+    assert beancount_store._snapshot() is not snap
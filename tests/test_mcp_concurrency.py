@@ -0,0 +1,57 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from click.testing import CliRunner
+
+from arledge import beancount_store, cli, mcp_server
+
+
+def test_slow_read_does_not_block_ping(basedir, monkeypatch):
+    release = threading.Event()
+
+    def slow_list():
+        release.wait(5)
+        return []
+
+    monkeypatch.setattr(beancount_store, "list_invoices", slow_list)
+    server = mcp_server.create_mcp_server("Test", request_timeout=0)
+
+    async def scenario():
+        slow = asyncio.ensure_future(server.call_tool("invoice_list", {}))
+        await asyncio.sleep(0.05)
+        pong = await server.call_tool("ping", {})
+        assert not slow.done()
+        release.set()
+        await slow
+        return pong
+
+    assert "pong" in str(asyncio.run(scenario()))
+
+
+def test_concurrent_writes_are_serialized(basedir):
+    server = mcp_server.create_mcp_server("Test", read_workers=4)
+
+    async def scenario():
+        calls = [server.call_tool("customer_create", {"model": {"name": f"C{i}"}}) for i in range(8)]
+        return await asyncio.gather(*calls)
+
+    results = asyncio.run(scenario())
+    ids = sorted(json.loads(r[0].text)["id"] for r in results)
+    assert ids == list(range(1, 9))
+    assert len(beancount_store.list_customers()) == 8
+
+
+def test_request_timeout(basedir, monkeypatch):
+    monkeypatch.setattr(beancount_store, "list_customers", lambda: time.sleep(0.5) or [])
+    server = mcp_server.create_mcp_server("Test", request_timeout=0.05)
+    with pytest.raises(Exception, match="timed out"):
+        asyncio.run(server.call_tool("customer_list", {}))
+
+
+def test_mcp_start_exposes_concurrency_options():
+    r = CliRunner().invoke(cli.cli, ["mcp", "start", "--help"])
+    assert "--read-workers" in r.output
+    assert "--timeout" in r.output
@@ -0,0 +1,72 @@
+import asyncio
+import json
+
+import pytest
+
+from arledge import beancount_store, mcp_server, snapshot
+
+
+def test_server_stats_counts_tools_and_caches(call, server, tmp_path):
+    snapshot.reset_stats()
+    call("customer_create", model={"name": "ACME"})
+    call("invoice_create", model={"customer_id": 1, "lines": [{"description": "x", "unit_price": "10.00"}]})
+    for _ in range(3):
+        call("invoice_view", invoice_id=1)
+    with pytest.raises(Exception):
+        asyncio.run(server.call_tool("invoice_view", {"invoice_id": "nope"}))
+    # an append by another process is followed, not reloaded
+    with open(tmp_path / "includes" / "customers.beancount", "a", encoding="utf-8") as f:
+        f.write('\n2026-03-01 custom "customer" "Other"\n  customer_id: 2\n')
+    call("customer_list")
+
+    (stats,) = call("server_stats")
+    view = stats["tools"]["invoice_view"]
+    assert view["calls"] == 3 and view["errors"] == 0
+    assert sum(view["histogram"].values()) == 3 and view["p50_ms_le"] is not None
+    assert view["max_ms"] >= view["mean_ms"] > 0 and view["total_ms"] >= view["run_ms_total"]
+    assert stats["tools"]["customer_create"]["calls"] == 1 and stats["calls"] == 6
+    assert "server_stats" not in stats["tools"]
+    cache = stats["cache"]
+    assert cache["enabled"] and cache["snapshot"]["loads"] == 1 and cache["snapshot"]["follows"] == 1
+    assert cache["snapshot"]["hits"] > 0 and 0 < cache["snapshot"]["hit_ratio"] < 1
+    assert cache["snapshot"]["appends_merged"] >= 2 and cache["snapshot"]["load_seconds"] > 0
+    # the sidecar written by invoice_create is noted, so no view reads it from disk
+    assert cache["sidecars"] == {**cache["sidecars"], "hits": 3, "reads": 0, "hit_ratio": 1.0}
+
+
+def test_stats_record_errors_and_histogram_buckets():
+    stats = mcp_server.ServerStats()
+    for ms in (0.5, 1.5, 40, 40, 70_000):
+        stats.record("t", ms / 1000, ms / 1000)
+    stats.record("t", 0.003, 0.003, error=True, timeout=True)
+    t = stats.snapshot()["tools"]["t"]
+    assert (t["calls"], t["errors"], t["timeouts"]) == (6, 1, 1)
+    h = t["histogram"]
+    assert (h["le_1"], h["le_2"], h["le_5"], h["le_50"], h["inf"]) == (1, 1, 1, 2, 1)
+    assert (t["p50_ms_le"], t["p90_ms_le"], t["p99_ms_le"]) == (5.0, None, None)
+
+
+def test_periodic_dump(tmp_path):
+    stats = mcp_server.ServerStats()
+    stats.record("invoice_list", 0.01, 0.01)
+    out = tmp_path / "stats.json"
+    stop = stats.dump_every(out, 0.01)
+    try:
+        for _ in range(500):
+            if out.exists():
+                break
+            asyncio.run(asyncio.sleep(0.01))
+    finally:
+        stop.set()
+    dumped = json.loads(out.read_text(encoding="utf-8"))
+    assert dumped["tools"]["invoice_list"]["calls"] == 1 and "cache" in dumped
+    assert [p.name for p in tmp_path.iterdir()] == ["stats.json"]
+
+
+def test_snapshot_stats_without_cache(basedir):
+    snapshot.reset_stats()
+    beancount_store.list_customers()
+    beancount_store.list_customers()
+    s = snapshot.stats()
+    assert not s["enabled"] and s["snapshot"]["loads"] == 2 and s["snapshot"]["hits"] == 0
+    assert s["snapshot"]["reloads"] == 0 and s["snapshot"]["cached"] == 0
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from arledge import beancount_store, beancount_write, cli, models, sidecar
+
+
+@pytest.fixture
+def runner(basedir):
+    r = CliRunner()
+    beancount_write.create_customers([models.Customer(name=f"C{i}") for i in range(5)])
+    line = {"description": "S", "unit_price": "10.00"}
+    beancount_write.create_invoices([models.Invoice(customer_id=1, lines=[line]) for _ in range(5)])
+    return r
+
+
+def page(runner, *args):
+    r = runner.invoke(cli.cli, list(args))
+    assert r.exit_code == 0, r.output
+    return json.loads(r.stdout)
+
+
+def test_pages_cover_listing_in_order(runner):
+    ids, cursor = [], None
+    while True:
+        args = ["invoice", "list", "--limit", "2"] + (["--cursor", cursor] if cursor else [])
+        p = page(runner, *args)
+        ids += [i["id"] for i in p["items"]]
+        cursor = p["next_cursor"]
+        if cursor is None:
+            break
+    assert ids == [5, 4, 3, 2, 1]
+    full = page(runner, "customer", "list")
+    p1 = page(runner, "customer", "list", "--limit", "3")
+    p2 = page(runner, "customer", "list", "--cursor", p1["next_cursor"])
+    assert p1["items"] + p2["items"] == full
+    assert p2["next_cursor"] is None
+
+
+def test_fields_projection_skips_sidecars(runner, monkeypatch):
+    def boom(path):
+        raise AssertionError("sidecar read")
+
+    monkeypatch.setattr(sidecar, "read", boom)
+    items = page(runner, "invoice", "list", "--fields", "id,customer_id")
+    assert items[0] == {"id": 5, "customer_id": 1}
+
+
+def test_fields_with_totals_reads_lines(runner):
+    p = page(runner, "invoice", "list", "--limit", "1", "--fields", "id,total")
+    assert p["items"] == [{"id": 5, "total": "10.00"}]
+
+
+def test_stale_and_bad_cursor(runner):
+    p = page(runner, "customer", "list", "--limit", "2")
+    beancount_write.create_customer(models.Customer(name="Late"))
+    r = runner.invoke(cli.cli, ["customer", "list", "--cursor", p["next_cursor"]])
+    assert r.exit_code == 2
+    assert "Stale cursor" in r.output
+    r = runner.invoke(cli.cli, ["customer", "list", "--cursor", "garbage"])
+    assert r.exit_code == 2
+    assert "Invalid cursor" in r.output
+    r = runner.invoke(cli.cli, ["creditor", "list", "--fields", "nope"])
+    assert r.exit_code == 2
+    assert "Unknown field(s): nope" in r.output
+
+
+def test_page_stops_hydrating_at_boundary(runner, monkeypatch):
+    calls = []
+    orig = beancount_store._map_invoice_transaction
+    monkeypatch.setattr(
+        beancount_store, "_map_invoice_transaction", lambda e, with_lines=True, view=False: calls.append(1) or orig(e, with_lines, view)
+    )
+    items, more = beancount_store.page_invoices(limit=2)
+    assert [i.id for i in items] == [5, 4] and more
+    assert len(calls) == 2
+
+
+def test_page_loads_the_ledger_once(runner, monkeypatch):
+    from arledge import loading
+
+    loads = []
+    real = loading.load
+    monkeypatch.setattr(loading, "load", lambda *a, **k: loads.append(1) or real(*a, **k))
+    for kind in ("invoice", "customer", "creditor"):
+        loads.clear()
+        page(runner, kind, "list", "--limit", "2")
+        assert len(loads) == 1, kind
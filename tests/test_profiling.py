@@ -0,0 +1,92 @@
+import json
+import pstats
+import tracemalloc
+
+import pytest
+from click.testing import CliRunner
+
+from arledge import beancount_store, beancount_write, cli, models, profiling
+
+LINE = {"description": "Work", "quantity": "2", "unit_price": "100", "vat_rate": "25"}
+
+
+@pytest.fixture
+def base(basedir):
+    beancount_write.create_customer(models.Customer(name="ACME"))
+    beancount_write.create_invoice(models.Invoice(customer_id=1, lines=[LINE]))
+    return basedir
+
+
+def timings(stderr):
+    return json.loads(stderr.strip().splitlines()[-1])
+
+
+def spans(nodes, prefix=""):
+    """Flatten a timing tree into {"parent/child": node}."""
+    out = {}
+    for n in nodes:
+        path = f"{prefix}/{n['name']}" if prefix else n["name"]
+        out[path] = n
+        out.update(spans(n.get("children", []), path))
+    return out
+
+
+def test_timings_tree_for_a_read(base):
+    original = beancount_store.list_customers
+    r = CliRunner().invoke(cli.cli, ["--timings", "customer", "list"])
+    assert r.exit_code == 0, r.stderr
+    assert json.loads(r.stdout)[0]["name"] == "ACME"
+    report = timings(r.stderr)
+    assert report["command"] == "customer list" and report["seconds"] > 0
+    tree = spans(report["spans"])
+    load = "command customer list/beancount_store.list_customers/beancount_store.iter_customers/beancount_store._latest_custom_entries/snapshot.load/loading.load"
+    assert tree[load]["calls"] == 1 and f"{load}/scanner.parse_recursive" in tree
+    top = tree["command customer list"]
+    assert top["self_seconds"] <= top["seconds"] == pytest.approx(sum(c["seconds"] for c in top["children"]) + top["self_seconds"], abs=1e-5)
+    # the wrappers are gone once the command finished
+    assert beancount_store.list_customers is original
+    assert not profiling.is_active()
+
+
+def test_write_phases_and_env_switch(base, monkeypatch):
+    monkeypatch.setenv("ARLEDGE_PROFILE", "1")
+    model = json.dumps({"customer_id": 1, "lines": [LINE]})
+    r = CliRunner().invoke(cli.cli, ["invoice", "create", "--model", model])
+    assert r.exit_code == 0, r.stderr
+    tree = spans(timings(r.stderr)["spans"])
+    create = "command invoice create/beancount_write.create_invoice"
+    for phase in ("_validate_snippet", "_atomic_append/beancount_write._write_and_fsync", "write_index"):
+        assert any(p.startswith(create) and p.endswith(phase) for p in tree), phase
+    assert tree["command invoice create/pydantic.Invoice"]["calls"] == 1
+    assert "model_validate_json" not in models.Invoice.__dict__ and "__init__" not in models.Invoice.__dict__
+
+    monkeypatch.setenv("ARLEDGE_PROFILE", "bogus")
+    r = CliRunner().invoke(cli.cli, ["customer", "list"])
+    assert r.exit_code == 2 and "bogus" in r.stderr
+
+
+@pytest.mark.parametrize("mode", ["cprofile", "tracemalloc"])
+def test_profile_dumps(base, tmp_path, monkeypatch, mode):
+    monkeypatch.setenv("ARLEDGE_PROFILE_DIR", str(tmp_path / "dumps"))
+    r = CliRunner().invoke(cli.cli, ["--profile", mode, "invoice", "view", "1"])
+    assert r.exit_code == 0, r.stderr
+    profile = timings(r.stderr)["profile"]
+    assert profile["mode"] == mode and profile["path"].endswith("-invoice-view." + ("prof" if mode == "cprofile" else "tracemalloc"))
+    if mode == "cprofile":
+        assert pstats.Stats(profile["path"]).total_calls > 0
+    else:
+        assert profile["peak_bytes"] >= profile["current_bytes"] > 0
+        assert tracemalloc.Snapshot.load(profile["path"]).traces
+        assert not tracemalloc.is_tracing()
+
+
+def test_start_is_not_reentrant():
+    assert profiling.start()
+    try:
+        assert not profiling.start("cprofile")
+    finally:
+        report = profiling.finish()
+    assert report["command"] is None and report["spans"] == []
+    assert profiling.finish() is None
+    with pytest.raises(ValueError):
+        profiling.start("nope")
@@ -0,0 +1,133 @@
+import os
+
+import pytest
+from beancount import loader
+from beancount.core import data
+from beancount.parser import parser
+from click.testing import CliRunner
+from hypothesis import given, settings, strategies as st
+
+from arledge import beancount_write, cli, loading, models, scanner
+
+FILENAME = "/ledger/includes/test.beancount"
+
+keys = st.sampled_from(["customer_id", "invoice_id", "email", "due_at", "x-y", "a_1", "vatRate"])
+strings = st.text(st.characters(codec="utf-8", exclude_characters='"\\\n\r'), max_size=12)
+numbers = st.builds(
+    lambda sign, whole, frac: sign + whole + (f".{frac}" if frac else ""),
+    st.sampled_from(["", "-"]),
+    st.from_regex(r"[0-9]{1,7}", fullmatch=True),
+    st.from_regex(r"[0-9]{0,4}", fullmatch=True),
+)
+values = st.one_of(strings.map(lambda s: f'"{s}"'), numbers)
+accounts = st.sampled_from(["Assets:Receivable:1", "Income:Services", "Liabilities:VAT:Out-25", "Equity:X0"])
+currencies = st.sampled_from(["SEK", "EUR", "USD2"])
+gaps = st.lists(st.sampled_from(["\n", "  \n", "; note\n", ";\n"]), max_size=2).map("".join)
+dates = st.dates().map(lambda d: d.isoformat())
+
+
+@st.composite
+def entry(draw):
+    meta = draw(st.dictionaries(keys, values, max_size=3))
+    lines = "".join(f"  {k}: {v}\n" for k, v in meta.items())
+    if draw(st.booleans()):
+        return f'{draw(dates)} custom "{draw(strings)}" "{draw(strings)}"\n{lines}'
+    postings = draw(st.lists(st.tuples(accounts, numbers, currencies), max_size=3))
+    lines += "".join(f"  {a}  {n} {c}\n" for a, n, c in postings)
+    return f'{draw(dates)} {draw(st.sampled_from("*!"))} "{draw(strings)}"\n{lines}'
+
+
+ledgers = st.lists(st.tuples(gaps, entry()), max_size=6).map(lambda parts: "".join(g + e for g, e in parts))
+
+# Text beancount accepts or rejects that the scanner must leave to it.
+OUTSIDE = [
+    '2026-01-01 * "Payee" "Narration"\n',
+    '2026-01-01 * "Tagged" #tag\n',
+    '2026-01-01 * "Elided"\n  Assets:Cash  1 SEK\n  Income:X\n',
+    '2026-01-01 * "Esc\\"aped"\n',
+    '2026-01-01 * "multi\nline"\n',
+    "2026-02-30 * \"Bad date\"\n",
+    '2026-01-01 custom "c" "v"\n  k: 1\n',
+    '2026-01-01 custom "c" "v"\n  key: 1\n  key: 2\n',
+    "2026-01-01 open Assets:Cash\n",
+    'option "title" "T"\n',
+    '2026-01-01 * "Crlf"\r\n',
+    '2026-01-01 * "Comment"\n  ; indented\n',
+    '2026-01-01 * "Late meta"\n  Assets:Cash  1 SEK\n  key: 1\n',
+    '2026-01-01 custom "c" TRUE\n',
+    '2026-01-01 * "Cost"\n  Assets:Cash  1 SEK {2 EUR}\n',
+    '2026-01-01 * "Expr"\n  Assets:Cash  (1 + 2) SEK\n',
+]
+
+
+def assert_same_as_parser(text):
+    scanned = scanner.scan_text(text, FILENAME)
+    entries, errors, opts = parser.parse_string(text, FILENAME)
+    if scanned is None:
+        return False
+    assert errors == []
+    assert sorted(scanned[0], key=data.entry_sortkey) == entries
+    assert str(scanned[1]) == str(opts["dcontext"])
+    return True
+
+
+@given(ledgers)
+@settings(max_examples=300, deadline=None)
+def test_scanner_matches_parser(text):
+    assert assert_same_as_parser(text), text
+
+
+@given(ledgers, st.sampled_from(OUTSIDE), st.integers(0, 6))
+@settings(max_examples=200, deadline=None)
+def test_scanner_never_disagrees_with_parser(text, extra, at):
+    chunks = text.split("\n\n")
+    at = min(at, len(chunks))
+    assert_same_as_parser("\n\n".join(chunks[:at] + [extra] + chunks[at:]))
+
+
+@pytest.mark.parametrize("extra", OUTSIDE)
+def test_scanner_leaves_other_syntax_to_beancount(extra):
+    assert scanner.scan_text('2026-01-01 custom "customer" "A"\n  customer_id: 1\n\n' + extra, FILENAME) is None
+
+
+def test_scanner_edge_cases():
+    for text in ("", "\n\n; only comments", '2026-01-01 * "No final newline"\n  Assets:Cash  -0.00 SEK'):
+        assert assert_same_as_parser(text)
+
+
+@pytest.fixture
+def ledger(tmp_path, monkeypatch):
+    monkeypatch.setenv("ARLEDGE_BASEDIR", str(tmp_path))
+    assert CliRunner().invoke(cli.cli, ["init"]).exit_code == 0
+    beancount_write.create_customers([models.Customer(name=f"Kund {i}", email=f"k{i}@example.se") for i in range(3)])
+    line = {"description": "Konsult", "quantity": "3", "unit_price": "99.95", "vat_rate": "25"}
+    beancount_write.create_invoices([models.Invoice(customer_id=1 + i, lines=[line]) for i in range(3)])
+    (tmp_path / "includes" / "invoices" / "hand.beancount").write_text(
+        '2024-01-02 * "Hand-written" #legacy\n  invoice_id: 50\n  Assets:Receivable:2\n  Income:Services  -100 EUR\n',
+        encoding="utf-8",
+    )
+    (tmp_path / "includes" / "invoices" / "empty.beancount").write_text("", encoding="utf-8")
+    with open(tmp_path / "ledger.beancount", "a", encoding="utf-8") as f:
+        f.write('include "includes/customers.beancount"\ninclude "missing/*.beancount"\n')
+    return tmp_path / "ledger.beancount"
+
+
+def test_parse_recursive_matches_loader(ledger, monkeypatch):
+    calls = []
+    parse_file = parser.parse_file
+    monkeypatch.setattr(parser, "parse_file", lambda f, *a, **kw: calls.append(os.path.basename(f)) or parse_file(f, *a, **kw))
+    entries, errors, opts = scanner.parse_recursive(ledger)
+    # only the top-level file (options, includes) and the hand-written one need beancount
+    assert sorted(calls) == ["hand.beancount", "ledger.beancount"]
+    monkeypatch.setattr(parser, "parse_file", parse_file)
+    ref_entries, ref_errors, ref_opts = loader._parse_recursive([(os.path.abspath(ledger), True)], None, None)
+    assert entries == ref_entries
+    assert [e.message for e in errors] == [e.message for e in ref_errors] and len(errors) == 2
+    assert opts["include"] == ref_opts["include"]
+    assert str(opts["dcontext"]) == str(ref_opts["dcontext"])
+
+
+def test_arledge_profile_uses_scanner(ledger, monkeypatch):
+    reference = loader._parse_recursive([(os.path.abspath(ledger), True)], None, None)[0]
+    monkeypatch.setattr(loader, "_parse_recursive", None)
+    assert loading.load(ledger, "arledge")[0] == sorted(reference, key=data.entry_sortkey)
@@ -0,0 +1,82 @@
+import io
+import json
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from hypothesis import given, strategies as st
+
+from arledge import config, models, serialize
+
+
+def legacy(v):
+    """The pre-serialize pipeline: model_dump() + recursive walk + json.dumps."""
+
+    def walk(x):
+        if isinstance(x, Decimal):
+            return format(x, "f")
+        if isinstance(x, datetime):
+            return config.dt_to_iso_utc(x)
+        if isinstance(x, dict):
+            return {k: walk(y) for k, y in x.items()}
+        if isinstance(x, (list, tuple)):
+            return [walk(y) for y in x]
+        return x
+
+    if isinstance(v, list):
+        v = [m.model_dump() if hasattr(m, "model_dump") else m for m in v]
+    elif hasattr(v, "model_dump"):
+        v = v.model_dump()
+    return json.dumps(walk(v), ensure_ascii=False)
+
+
+@given(st.decimals(allow_nan=True, allow_infinity=True))
+def test_decimal_to_str_matches_format(d):
+    assert config.decimal_to_str(d) == format(d, "f")
+
+
+texts = st.text(max_size=12)
+amounts = st.decimals(min_value=-10**6, max_value=10**6, allow_nan=False, allow_infinity=False, places=3)
+
+
+@given(
+    desc=texts,
+    name=st.one_of(st.none(), texts),
+    lines=st.lists(st.tuples(texts, amounts, amounts, amounts), max_size=4),
+    created=st.datetimes(timezones=st.one_of(st.none(), st.timezones())),
+)
+def test_dumps_is_byte_identical(desc, name, lines, created):
+    inv = models.Invoice(
+        id=7,
+        customer_id=1,
+        description=name,
+        created_at=created,
+        lines=[{"description": d, "quantity": q, "unit_price": p, "vat_rate": v} for d, q, p, v in lines],
+    )
+    cust = models.Customer(id=1, name=desc, email=name)
+    acct = models.PaymentAccount(creditor_id=1, type="bank", metadata={"a": [Decimal("1E+2"), None, {"b": created}]})
+    for v in (inv, cust, acct, [inv, cust]):
+        assert serialize.dumps(v) == legacy(v)
+    assert config.dump_model(inv) == json.loads(legacy(inv))
+
+
+def test_echo_writes_bytes_and_text(monkeypatch):
+    raw = io.BytesIO()
+    stream = io.TextIOWrapper(raw, encoding="utf-8")
+    stream.write("before\n")
+    serialize.echo(models.Customer(id=1, name="Åsa"), stream)
+    assert raw.getvalue().decode("utf-8") == 'before\n{"model_version": "0.1.0", "id": 1, "name": "Åsa", "email": null, "address": null}\n'
+    text = io.StringIO()
+    serialize.echo([1, Decimal("2.50")], text)
+    assert text.getvalue() == '[1, "2.50"]\n'
+
+
+def test_orjson_backend(monkeypatch):
+    orjson = pytest.importorskip("orjson")
+    inv = models.Invoice(id=1, customer_id=1, created_at=datetime(2026, 1, 1, tzinfo=timezone(timedelta(hours=2))), lines=[{"description": "é", "unit_price": "1.5"}])
+    monkeypatch.setenv("ARLEDGE_JSON_BACKEND", "orjson")
+    out = serialize.dumps(inv)
+    assert out == json.dumps(json.loads(legacy(inv)), ensure_ascii=False, separators=(",", ":"))
+    monkeypatch.setenv("ARLEDGE_JSON_BACKEND", "bogus")
+    with pytest.raises(ValueError):
+        serialize.dumps(inv)
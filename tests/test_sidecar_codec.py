@@ -0,0 +1,91 @@
+import json
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from arledge import cli, sidecar
+
+
+SAMPLE = {
+    "id": 1,
+    "customer_id": 1,
+    "lines": [{"description": "Consulting", "quantity": "1", "unit_price": "1000.00", "vat_rate": "25"}],
+}
+
+
+@pytest.mark.parametrize("codec", sidecar.CODECS)
+def test_encode_decode_roundtrip(codec):
+    raw = sidecar.encode(SAMPLE, codec)
+    assert sidecar.detect_codec(raw) == codec
+    assert sidecar.decode(raw) == SAMPLE
+
+
+@pytest.mark.parametrize("codec", sidecar.CODECS)
+def test_checksum_is_independent_of_the_codec(tmp_path, codec):
+    digest = sidecar.checksum_encoded(sidecar.encode(SAMPLE, "compact"))
+    assert digest == sidecar.checksum(SAMPLE)
+    sidecar.write(tmp_path / "inv.json", SAMPLE, codec)
+    assert sidecar.read_verified(tmp_path / "inv.json") == (SAMPLE, digest)
+
+
+def test_compact_is_smaller_than_pretty():
+    assert len(sidecar.encode(SAMPLE, "compact")) < len(sidecar.encode(SAMPLE, "json"))
+
+
+def test_unknown_codec_rejected(monkeypatch):
+    with pytest.raises(ValueError):
+        sidecar.encode(SAMPLE, "zip")
+    monkeypatch.setenv("ARLEDGE_SIDECAR_CODEC", "nope")
+    with pytest.raises(ValueError):
+        sidecar.default_codec()
+
+
+def _create_invoice(runner):
+    r = runner.invoke(cli.cli, ["init"])
+    assert r.exit_code == 0
+    r = runner.invoke(cli.cli, ["customer", "create", "--model", json.dumps({"name": "C1"})])
+    assert r.exit_code == 0
+    inv = {"customer_id": 1, "lines": [{"description": "S", "unit_price": "10.00", "vat_rate": "25"}]}
+    r = runner.invoke(cli.cli, ["invoice", "create", "--model", json.dumps(inv)])
+    assert r.exit_code == 0
+    return json.loads(r.output)
+
+
+def test_invoice_written_with_configured_codec_reads_transparently(monkeypatch):
+    monkeypatch.setenv("ARLEDGE_SIDECAR_CODEC", "gzip")
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        created = _create_invoice(runner)
+        raw = (Path("includes") / "invoices" / "data" / "inv-0001.json").read_bytes()
+        assert sidecar.detect_codec(raw) == "gzip"
+        r = runner.invoke(cli.cli, ["invoice", "view", str(created["id"])])
+        assert r.exit_code == 0
+        viewed = json.loads(r.output)
+        assert viewed["total"] == created["total"]
+        assert len(viewed["lines"]) == 1
+
+
+def test_convert_sidecars_command():
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        created = _create_invoice(runner)
+        path = Path("includes") / "invoices" / "data" / "inv-0001.json"
+        # simulate a legacy pretty-printed sidecar
+        path.write_text(json.dumps(sidecar.read(path), indent=2), encoding="utf-8")
+        r = runner.invoke(cli.cli, ["invoice", "convert-sidecars", "--codec", "lzma"])
+        assert r.exit_code == 0, r.stderr
+        summary = json.loads(r.output)
+        assert summary["converted"] == 1
+        assert summary["bytes_after"] < summary["bytes_before"]
+        assert sidecar.detect_codec(path.read_bytes()) == "lzma"
+        r = runner.invoke(cli.cli, ["invoice", "view", str(created["id"])])
+        assert r.exit_code == 0
+        assert json.loads(r.output)["total"] == created["total"]
+        # second run is a no-op; month filters exclude everything
+        r = runner.invoke(cli.cli, ["invoice", "convert-sidecars", "--codec", "lzma"])
+        assert json.loads(r.output)["unchanged"] == 1
+        r = runner.invoke(cli.cli, ["invoice", "convert-sidecars", "--codec", "gzip", "--before", "1999-01"])
+        assert json.loads(r.output)["converted"] == 0
+        r = runner.invoke(cli.cli, ["invoice", "convert-sidecars", "--codec", "gzip", "--month", "bad"])
+        assert r.exit_code != 0
@@ -0,0 +1,137 @@
+import os
+
+import pytest
+
+from arledge import beancount_store, beancount_write, loading, models, snapshot
+
+
+@pytest.fixture
+def ledger(basedir):
+    beancount_write.create_customers([models.Customer(name=f"C{i}") for i in range(3)])
+    line = {"description": "Konsult", "quantity": "1", "unit_price": "100", "vat_rate": "25"}
+    beancount_write.create_invoices([models.Invoice(customer_id=1, lines=[line]) for _ in range(2)])
+    snapshot.enable()
+    return basedir / "ledger.beancount"
+
+
+class Loads:
+    """Counts full loads done for snapshot.load."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, ledger_file):
+        self.count += 1
+        return loading.load(ledger_file, "arledge")
+
+
+def summary(entries):
+    return [(type(e).__name__, e.date, e.meta["filename"], e.meta["lineno"], dict(e.meta)) for e in entries]
+
+
+def fresh(ledger):
+    return summary(loading.load(ledger, "arledge")[0])
+
+
+def append(path, text):
+    # what another arledge process does (beancount_write._atomic_append)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+
+
+CUSTOMER = '\n2026-12-01 custom "customer" "External"\n  customer_id: 9\n  email: "x@example.com"\n'
+
+
+def test_external_appends_are_followed(ledger):
+    loads = Loads()
+    snap = snapshot.load(ledger, loads, "t", incremental=True)
+    customers = ledger.parent / "includes" / "customers.beancount"
+    append(customers, CUSTOMER)
+    # a hand-written invoice the scanner does not handle goes through beancount
+    month = max((ledger.parent / "includes" / "invoices").glob("*.beancount"))
+    append(month, '\n2026-12-02 * "Hand" #tag\n  invoice_id: 70\n  Assets:Receivable:1  5 SEK\n  Income:X\n')
+    followed = snapshot.load(ledger, loads, "t", incremental=True)
+    assert loads.count == 1
+    assert followed is not snap and followed.version > snap.version and followed.digest() != snap.digest()
+    assert summary(followed.entries) == fresh(ledger)
+    assert snapshot.load(ledger, loads, "t", incremental=True) is followed
+    # an earlier date sorts into the middle like a fresh load
+    append(customers, '\n2020-01-01 custom "customer" "Early"\n  customer_id: 10\n')
+    assert summary(snapshot.load(ledger, loads, "t", incremental=True).entries) == fresh(ledger)
+    assert loads.count == 1
+
+
+def test_indexes_are_extended(ledger):
+    beancount_store.list_customers()
+    snap = beancount_store._snapshot()
+    index = beancount_store._invoice_transactions()
+    append(ledger.parent / "includes" / "customers.beancount", CUSTOMER)
+    month = max((ledger.parent / "includes" / "invoices").glob("*.beancount"))
+    append(month, '\n2099-01-01 * "Later"\n  invoice_id: 80\n  Assets:Receivable:1  5 SEK\n  Income:X  -5 SEK\n')
+    assert [c.name for c in beancount_store.list_customers()][-1] == "External"
+    followed = beancount_store._snapshot()
+    assert followed is not snap
+    assert set(beancount_store._invoice_transactions()) == set(index) | {80}
+    assert set(index) == {1, 2}
+    assert ("custom", "customer") in followed._memo
+
+
+def edit_middle(path):
+    data = path.read_bytes()
+    i = data.index(b"C1")
+    path.write_bytes(data[:i] + b"X1" + data[i + 2 :])
+
+
+def replace_file(path):
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(path.read_bytes())
+    os.replace(tmp, path)
+
+
+def shrink(path):
+    path.write_bytes(path.read_bytes()[:-20])
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        edit_middle,
+        replace_file,
+        shrink,
+        lambda p: append(p, '\n2026-01-01 custom "customer" "Bad\n'),
+        lambda p: append(p, "  customer_id: 99\n"),
+        lambda p: append(p.parent.parent / "ledger.beancount", '\noption "title" "T"\n'),
+        lambda p: (p.parent / "invoices" / "2030-01.beancount").write_text(CUSTOMER, encoding="utf-8"),
+    ],
+    ids=["edit", "replace", "shrink", "unparsable", "continues-entry", "top-level", "new-file"],
+)
+def test_other_changes_reload(ledger, change):
+    loads = Loads()
+    snapshot.load(ledger, loads, "t", incremental=True)
+    change(ledger.parent / "includes" / "customers.beancount")
+    append(ledger.parent / "includes" / "customers.beancount", CUSTOMER)
+    snap = snapshot.load(ledger, loads, "t", incremental=True)
+    assert loads.count == 2
+    assert summary(snap.entries) == fresh(ledger)
+
+
+def test_own_writes_keep_tails_current(ledger):
+    loads = Loads()
+    snapshot.load(ledger, loads, "t", incremental=True)
+    # this process appends (note_append) and creates an empty month file (note_dir)
+    month = ledger.parent / "includes" / "invoices" / "2031-01.beancount"
+    month.touch()
+    snapshot.note_dir(month.parent)
+    beancount_write.create_customers([models.Customer(name="Own")])
+    append(month, CUSTOMER)
+    snap = snapshot.load(ledger, loads, "t", incremental=True)
+    assert loads.count == 1
+    assert summary(snap.entries) == fresh(ledger)
+
+
+def test_not_followed_without_incremental(ledger):
+    loads = Loads()
+    snapshot.load(ledger, loads, "t")
+    append(ledger.parent / "includes" / "customers.beancount", CUSTOMER)
+    snapshot.load(ledger, loads, "t")
+    assert loads.count == 2
@@ -0,0 +1,89 @@
+import pytest
+
+from arledge import beancount_store, beancount_write, models, sidecar
+
+
+@pytest.fixture
+def basedir(basedir):
+    beancount_write.create_customer(models.Customer(name="ACME"))
+    return basedir
+
+
+@pytest.fixture
+def trusted_calls(monkeypatch):
+    calls = []
+    orig = beancount_store._trusted_invoice
+
+    def spy(inv_data, sc, view=False):
+        res = orig(inv_data, sc, view)
+        calls.append(res is not None)
+        return res
+
+    monkeypatch.setattr(beancount_store, "_trusted_invoice", spy)
+    return calls
+
+
+LINES = [
+    {"description": "Konsult", "quantity": "3", "unit_price": "1250.00", "vat_rate": "25"},
+    {"description": "Resa", "quantity": "1.5", "unit_price": "99.99", "vat_rate": "12"},
+]
+
+
+def make_invoice():
+    return beancount_write.create_invoice(models.Invoice(customer_id=1, lines=LINES))
+
+
+def dumped(inv):
+    d = inv.model_dump()
+    d.pop("created_at")
+    return d
+
+
+def test_trusted_read_matches_validation(basedir, trusted_calls):
+    inv = make_invoice()
+    ledger = (basedir / "includes" / "invoices").glob("*.beancount")
+    assert any("invoice_checksum" in p.read_text(encoding="utf-8") for p in ledger)
+    got = beancount_store.get_invoice(inv.id)
+    assert trusted_calls == [True]
+    validated = models.Invoice.model_validate(
+        {"id": inv.id, "customer_id": 1, "status": "draft", "due_at": None, "description": got.description,
+         "creditor_id": None, "currency": "SEK", "lines": LINES}
+    )
+    assert dumped(got) == dumped(validated)
+    assert got.model_fields_set == validated.model_fields_set
+    assert got.lines == validated.lines
+
+
+def test_checksum_survives_codec_conversion(basedir, trusted_calls):
+    inv = make_invoice()
+    path = beancount_store.get_invoice_sidecar_path(inv.id)
+    for codec in ("json", "gzip", "compact"):
+        sidecar.convert(path, codec)
+        assert beancount_store.get_invoice(inv.id).total == inv.total
+    assert trusted_calls == [True, True, True]
+
+
+def test_tampered_sidecar_is_revalidated(basedir, trusted_calls):
+    inv = make_invoice()
+    path = beancount_store.get_invoice_sidecar_path(inv.id)
+    data = sidecar.read(path)
+    data["lines"][0]["net"] = "1.00"
+    data["lines"][0]["line_total"] = "1.00"
+    sidecar.write(path, data)
+    got = beancount_store.get_invoice(inv.id)
+    assert trusted_calls == []
+    assert got.lines[0].net == inv.lines[0].net
+    assert got.total == inv.total
+
+
+def test_updated_and_legacy_sidecars_fall_back(basedir, trusted_calls):
+    inv = make_invoice()
+    inv.lines = inv.lines[:1]
+    beancount_write.update_invoice(models.Invoice.model_validate(inv.model_dump()))
+    assert len(beancount_store.get_invoice(inv.id).lines) == 1
+    # legacy transaction without invoice_checksum
+    month = next((basedir / "includes" / "invoices").glob("*.beancount"))
+    text = "\n".join(ln for ln in month.read_text(encoding="utf-8").splitlines() if "invoice_checksum" not in ln)
+    month.write_text(text + "\n", encoding="utf-8")
+    assert len(beancount_store.get_invoice(inv.id).lines) == 1
+    assert trusted_calls == []
@@ -0,0 +1,88 @@
+import dataclasses
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from arledge import beancount_store, beancount_write, cli, models, sidecar, validation
+
+LINE = {"description": "Work", "quantity": "2", "unit_price": "100", "vat_rate": "25"}
+
+
+@pytest.fixture
+def base(basedir, monkeypatch):
+    monkeypatch.setenv("BEANCOUNT_DISABLE_LOAD_CACHE", "1")
+    monkeypatch.setattr(validation, "_RACY_WINDOW_NS", 0)
+    beancount_write.create_customers([models.Customer(name="ACME"), models.Customer(name="Other")])
+    beancount_write.create_invoices([models.Invoice(customer_id=1, lines=[LINE]) for _ in range(3)])
+    return basedir
+
+
+def rewrite(inv_id, **changes):
+    path = beancount_store.get_invoice_sidecar_path(inv_id)
+    sidecar.write(path, {**sidecar.read(path), **changes})
+
+
+def mismatches(report):
+    return [(f["invoice_id"], f["field"], f["ledger"], f["sidecar_value"]) for f in report.mismatches]
+
+
+def test_updated_amounts_are_reported(base):
+    assert validation.run(base).ok
+    data = beancount_store.get_invoice(2).model_dump()
+    beancount_write.update_invoice(models.Invoice.model_validate({**data, "lines": [{**LINE, "quantity": "3"}]}))
+    report = validation.run(base)
+    assert mismatches(report) == [
+        ("2", "total", "250.00 SEK", "375.00 SEK"),
+        ("2", "subtotal", "200.00 SEK", "300.00 SEK"),
+        ("2", "total_vat", "50.00 SEK", "75.00 SEK"),
+    ]
+    assert report.mismatches[0]["file"].endswith(".beancount") and report.mismatches[0]["line"] > 0
+    assert not report.ok
+    # a status change keeps the amounts
+    beancount_write.update_invoice(models.Invoice.model_validate({**data, "status": "sent"}))
+    assert validation.run(base).ok
+
+
+def test_currency_customer_and_stored_totals(base):
+    invoices = beancount_store.get_invoices([1, 2, 3])
+    rewrite(1, currency="EUR")
+    rewrite(2, customer_id=2)
+    rewrite(3, total="1.00")
+    report = validation.run(base)
+    assert [m[:2] for m in mismatches(report)] == [
+        ("1", "currency"),
+        ("1", "total"),
+        ("1", "subtotal"),
+        ("1", "total_vat"),
+        ("2", "customer_id"),
+        ("2", "receivable_account"),
+    ]
+    assert mismatches(report)[5] == ("2", "receivable_account", "Assets:Receivable:1", "Assets:Receivable:2")
+    (bad,) = report.bad_sidecars
+    assert bad["file"] == str(beancount_store.get_invoice_sidecar_path(3))
+    assert bad["message"] == f"stored total 1.00 does not match its lines ({invoices[3].total})"
+
+
+def without_timings(report):
+    return {**dataclasses.asdict(report), "phases": None}
+
+
+def test_parallel_check_matches_in_process(base, monkeypatch):
+    rewrite(1, currency="EUR")
+    rewrite(3, total="1.00")
+    sequential = validation.run(base, full=True, jobs=1)
+    monkeypatch.setattr(validation, "_PARALLEL_MIN", 1)
+    parallel = validation.run(base, full=True, jobs=2)
+    assert parallel.sidecars_checked == 3
+    assert without_timings(parallel) == without_timings(sequential)
+    state = json.loads(validation.state_path(base).read_text(encoding="utf-8"))
+    assert {e["invoice"]["total"] for e in state["sidecars"].values() if e["invoice"]} == {"250.00"}
+
+
+def test_cli_reports_mismatches(base):
+    rewrite(1, currency="EUR")
+    r = CliRunner().invoke(cli.cli, ["validate", "--jobs", "1"])
+    assert r.exit_code == 2
+    assert "Invoice transactions disagreeing with their sidecars:" in r.stderr
+    assert "invoice 1 currency: ledger SEK, sidecar EUR" in r.stderr
@@ -0,0 +1,128 @@
+import json
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from arledge import beancount_write, cli, loading, models, validation
+
+LINE = {"description": "Work", "quantity": "2", "unit_price": "100", "vat_rate": "25"}
+
+
+@pytest.fixture
+def base(basedir, monkeypatch):
+    monkeypatch.setenv("BEANCOUNT_DISABLE_LOAD_CACHE", "1")
+    monkeypatch.setattr(validation, "_RACY_WINDOW_NS", 0)
+    beancount_write.create_customer(models.Customer(name="ACME"))
+    beancount_write.create_invoices([models.Invoice(customer_id=1, lines=[LINE]) for _ in range(2)])
+    return basedir
+
+
+def counts(report):
+    return report.files, report.files_checked, report.sidecars, report.sidecars_checked
+
+
+def test_rerun_checks_only_changed_files(base):
+    first = validation.run(base)
+    assert first.ok and first.full_load is None
+    assert counts(first) == (5, 5, 2, 2)
+    assert counts(validation.run(base)) == (5, 0, 2, 0)
+    beancount_write.create_customer(models.Customer(name="Other"))
+    assert counts(validation.run(base)) == (5, 1, 2, 0)
+    # same content under a new mtime and inode: hashed, not re-checked
+    side = next((base / "includes" / "invoices" / "data").iterdir())
+    tmp = side.with_suffix(".tmp")
+    tmp.write_bytes(side.read_bytes())
+    os.replace(tmp, side)
+    assert counts(validation.run(base)) == (5, 0, 2, 0)
+    assert counts(validation.run(base, full=True)) == (5, 5, 2, 2)
+
+
+def test_racy_files_are_compared_by_content(base, monkeypatch):
+    monkeypatch.setattr(validation, "_RACY_WINDOW_NS", 10**18)
+    validation.run(base)
+    state = json.loads(validation.state_path(base).read_text(encoding="utf-8"))
+    assert all(e["stamp"] is None for e in state["files"].values())
+    assert counts(validation.run(base)) == (5, 0, 2, 0)
+
+
+def test_sidecar_findings(base):
+    data = base / "includes" / "invoices" / "data"
+    first, second = sorted(data.iterdir())
+    validation.run(base)
+    first.unlink()
+    second.write_text('{"id": "x"}', encoding="utf-8")
+    (data / "stray.json").write_text("{}", encoding="utf-8")
+    report = validation.run(base)
+    assert not report.ok
+    assert [f["sidecar"] for f in report.missing] == [str(first)]
+    assert report.missing[0]["file"].endswith(".beancount") and report.missing[0]["line"] > 0
+    assert [f["file"] for f in report.bad_sidecars] == [str(second)]
+    assert report.orphans == [str(data / "stray.json")]
+
+
+ACCOUNTS = """2020-01-01 open Assets:Bank SEK
+2020-01-01 open Assets:Bank EUR
+2020-01-01 open Income:Old
+2021-01-01 close Income:Old
+2021-01-01 close Income:Never
+2020-01-01 commodity SEK
+"""
+
+POSTINGS = """2019-06-01 * "Before open"
+  Assets:Bank  5 SEK
+  Income:Services  -5 SEK
+
+2022-01-01 * "After close"
+  Assets:Bank  7 USD
+  Income:Old  -7 USD
+
+2022-02-01 * "Unbalanced"
+  Assets:Bank  7 SEK
+  Income:Services  -6 SEK
+
+2020-01-01 commodity SEK
+"""
+
+
+def test_account_checks_match_beancount(base):
+    (base / "includes" / "invoices" / "accounts.beancount").write_text(ACCOUNTS, encoding="utf-8")
+    (base / "includes" / "invoices" / "postings.beancount").write_text(POSTINGS, encoding="utf-8")
+    report = validation.run(base)
+    assert report.full_load is None
+    _, errors, _ = loading.load(base / "ledger.beancount", "full")
+    # beancount reports per entry, the summaries per account and file
+    expected = {
+        (os.path.basename(e.source["filename"]), e.message)
+        for e in errors
+        if "does not balance" not in e.message
+    }
+    got = {(os.path.basename(f["file"]), f["message"]) for f in report.errors + report.warnings}
+    assert got == expected
+    assert [f["message"] for f in report.unbalanced] == [
+        "Unbalanced transaction 2022-02-01 Unbalanced: currency=SEK total=1"
+    ]
+    assert not report.ok
+
+
+def test_booking_directives_use_the_full_loader(base):
+    (base / "includes" / "invoices" / "hand.beancount").write_text(
+        "2020-01-01 open Assets:Bank\n2021-01-01 balance Assets:Bank  1 SEK\n", encoding="utf-8"
+    )
+    report = validation.run(base)
+    assert report.full_load == "balance directive"
+    assert any("Balance failed" in f["message"] for f in report.errors)
+
+
+def test_cli_full_flag_and_errors(base):
+    runner = CliRunner()
+    r = runner.invoke(cli.cli, ["validate"])
+    assert r.exit_code == 0 and "Ledger OK" in r.stderr
+    assert validation.state_path(base).exists()
+    r = runner.invoke(cli.cli, ["validate", "--full"])
+    assert r.exit_code == 0 and "Ledger OK" in r.stderr
+    with open(base / "includes" / "customers.beancount", "a", encoding="utf-8") as f:
+        f.write('\n2026-01-01 custom "customer" "Broken\n')
+    r = runner.invoke(cli.cli, ["validate"])
+    assert r.exit_code == 2
+    assert "Beancount parse/load errors:" in r.stderr and "customers.beancount:" in r.stderr
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from arledge import beancount_write, cli, models, validation
+
+LINE = {"description": "Work", "quantity": "2", "unit_price": "100", "vat_rate": "25"}
+
+
+@pytest.fixture
+def base(basedir, monkeypatch):
+    monkeypatch.setenv("BEANCOUNT_DISABLE_LOAD_CACHE", "1")
+    monkeypatch.setattr(validation, "_RACY_WINDOW_NS", 0)
+    beancount_write.create_customer(models.Customer(name="ACME"))
+    beancount_write.create_invoices([models.Invoice(customer_id=1, lines=[LINE]) for _ in range(2)])
+    return basedir
+
+
+def validate_json(*args):
+    r = CliRunner().invoke(cli.cli, ["validate", "--format", "json", *args])
+    return r.exit_code, json.loads(r.stdout)
+
+
+def test_json_report_phases(base):
+    code, report = validate_json()
+    assert code == 0 and report["ok"] is True and report["full_load"] is None
+    assert [p["phase"] for p in report["phases"]] == ["state", "load", "balance", "sidecars", "orphans"]
+    assert all(p["seconds"] >= 0 for p in report["phases"])
+    load, balance, sidecars, orphans = report["phases"][1:]
+    assert (load["files"], load["files_checked"], load["entries"]) == (5, 5, 3)
+    assert balance["transactions"] == 2
+    assert (sidecars["sidecars"], sidecars["sidecars_checked"]) == (2, 2)
+    assert orphans["files"] == 2
+    assert {f["kind"] for f in report["findings"]} == {"unknown_account"}
+    assert report["files"] == {"total": 5, "checked": 5} and report["sidecars"] == {"total": 2, "checked": 2}
+    # nothing changed: the same counts, nothing re-checked
+    _, again = validate_json()
+    assert again["phases"][1]["entries"] == 3 and again["files"] == {"total": 5, "checked": 0}
+
+
+def test_json_report_findings(base):
+    data = base / "includes" / "invoices" / "data"
+    first = sorted(data.iterdir())[0]
+    first.unlink()
+    (data / "stray.json").write_text("{}", encoding="utf-8")
+    month = next((base / "includes" / "invoices").glob("*.beancount"))
+    with open(month, "a", encoding="utf-8") as f:
+        f.write('\n2026-01-01 * "Off"\n  Assets:Cash  5 SEK\n  Income:X  -4 SEK\n\n2026-01-01 * "Broken\n')
+    code, report = validate_json()
+    assert code == 2 and report["ok"] is False
+    found = {(f["kind"], f["severity"]) for f in report["findings"]}
+    assert {("parse", "error"), ("unbalanced", "error"), ("missing_sidecar", "error"), ("orphan_sidecar", "warning")} <= found
+    by_kind = {f["kind"]: f for f in report["findings"]}
+    assert by_kind["parse"]["file"] == str(month) and by_kind["parse"]["line"] > 0
+    assert by_kind["unbalanced"]["file"] == str(month)
+    assert by_kind["unbalanced"]["message"] == "Unbalanced transaction 2026-01-01 Off: currency=SEK total=1"
+    assert by_kind["missing_sidecar"]["sidecar"] == str(first)
+    assert by_kind["orphan_sidecar"]["file"] == str(data / "stray.json")
+    # the full loader reports the same kinds, with beancount's error classes
+    code, full = validate_json("--full")
+    assert code == 2 and full["full_load"] == "--full"
+    assert {"parse", "unbalanced", "missing_sidecar", "orphan_sidecar"} <= {f["kind"] for f in full["findings"]}
@@ -0,0 +1,73 @@
+import pytest
+
+from arledge import beancount_store, beancount_write, models, serialize, views
+
+
+@pytest.fixture
+def basedir(basedir):
+    beancount_write.create_customers(
+        [models.Customer(name="Åsa", email="a@example.com"), models.Customer(name="Bo", address="Gatan 1")]
+    )
+    beancount_write.create_creditor(models.Creditor(name="Me AB", email="me@example.com"))
+    line = {"description": "Konsult", "quantity": "1.5", "unit_price": "99.99", "vat_rate": "12"}
+    beancount_write.create_invoices([models.Invoice(customer_id=1, lines=[line] * 3) for _ in range(2)])
+    includes = basedir / "includes"
+    with open(includes / "customers.beancount", "a", encoding="utf-8") as f:
+        # a numeric email is coerced by nothing and rejected by the model
+        f.write('2024-01-01 custom "customer" "Bad"\n  customer_id: 90\n  email: 12\n')
+    with open(includes / "invoices" / "legacy.beancount", "w", encoding="utf-8") as f:
+        # no checksum and no sidecar; a due date needing coercion
+        f.write('2024-01-02 * "Old invoice"\n  invoice_id: 50\n  customer_id: 2\n  due_at: "2024-02-01"\n'
+                "  Assets:Receivable:2  0 SEK\n  Income:Services  -0 SEK\n")
+    return basedir
+
+
+def dumped(items, drop_created=False):
+    res = serialize.to_builtins(list(items))
+    if drop_created:
+        for d in res:
+            d.pop("created_at")
+    return res
+
+
+def test_slots_follow_model_fields():
+    for view_cls in (views.CustomerView, views.CreditorView, views.InvoiceView, views.InvoiceLineView):
+        assert view_cls.__slots__ == tuple(getattr(models, view_cls.model_name).model_fields)
+
+
+def test_views_serialize_like_models(basedir):
+    assert dumped(beancount_store.iter_customers(view=True)) == dumped(beancount_store.iter_customers())
+    assert [c["id"] for c in dumped(beancount_store.iter_customers(view=True))] == [1, 2]
+    assert dumped(beancount_store.iter_creditors(view=True)) == dumped(beancount_store.iter_creditors())
+    for with_lines in (True, False):
+        got = dumped(beancount_store.iter_invoices(with_lines, view=True), drop_created=True)
+        assert got == dumped(beancount_store.iter_invoices(with_lines), drop_created=True)
+        assert [i["id"] for i in got] == [50, 2, 1]
+    assert dumped(beancount_store.iter_invoices(view=True), drop_created=True)[0]["due_at"] == "2024-02-01T00:00:00Z"
+
+
+def test_views_are_slotted(basedir):
+    inv = beancount_store.page_invoices(limit=1, after=50, view=True)[0][0]
+    assert not hasattr(inv, "__dict__")
+    assert not hasattr(inv.lines[0], "__dict__")
+
+
+def test_to_model_validates(basedir):
+    view = beancount_store.page_invoices(limit=1, after=50, view=True)[0][0]
+    inv = view.to_model()
+    assert isinstance(inv, models.Invoice) and isinstance(inv.lines[0], models.InvoiceLine)
+    assert serialize.to_builtins(inv) == serialize.to_builtins(view)
+    assert views.InvoiceView.from_model(inv) == view
+    cust = next(beancount_store.iter_customers(view=True)).to_model()
+    assert cust == beancount_store.get_customer(1)
+
+
+def test_get_by_id_maps_only_the_match(basedir, monkeypatch):
+    calls = []
+    orig = beancount_store.map_custom_to_customer
+    monkeypatch.setattr(beancount_store, "map_custom_to_customer", lambda e: calls.append(1) or orig(e))
+    assert beancount_store.get_customer(2).name == "Bo"
+    assert beancount_store.get_customer(90) is None
+    assert beancount_store.get_customers([1, 3]).keys() == {1}
+    assert len(calls) == 3
+    assert beancount_store.get_creditor(1).name == "Me AB"
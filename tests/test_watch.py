@@ -0,0 +1,108 @@
+import asyncio
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from arledge import beancount_store, beancount_write, cli, mcp_server, models, snapshot, watch
+
+LINE = {"description": "Work", "quantity": "2", "unit_price": "100", "vat_rate": "25"}
+
+
+@pytest.fixture
+def basedir(basedir):
+    beancount_write.create_customer(models.Customer(name="Before"))
+    snapshot.enable()
+    return basedir
+
+
+def summary(events):
+    return [(e["kind"], e["op"], e["id"]) for e in events]
+
+
+def test_feed_reports_later_writes(basedir):
+    feed = watch.Feed()
+    assert list(feed.poll()) == []
+    beancount_write.create_customer(models.Customer(name="ACME"))
+    beancount_write.update_customer(models.Customer(id=1, name="Before AB"))
+    cred = beancount_write.create_creditor(models.Creditor(name="Me AB"))
+    beancount_write.create_payment_account(models.PaymentAccount(creditor_id=cred.id, type="bank", identifier="SE1"))
+    beancount_write.create_invoices([models.Invoice(customer_id=2, lines=[LINE]) for _ in range(2)])
+    events = list(feed.poll())
+    assert summary(events) == [
+        ("creditor", "created", 1),
+        ("customer", "created", 2),
+        ("customer", "updated", 1),
+        ("invoice", "created", 1),
+        ("invoice", "created", 2),
+        ("payment_account", "created", 1),
+    ]
+    assert events[2]["data"]["name"] == "Before AB"
+    assert events[3]["data"]["lines"][0]["description"] == "Work"
+    # the sidecars written with new invoices are not reported again
+    assert list(feed.poll()) == []
+
+    # every token resumes right after its event
+    for i, event in enumerate(events):
+        assert summary(watch.Feed(event["token"]).poll()) == summary(events[i + 1 :])
+
+
+def test_invoice_sidecar_updates(basedir):
+    beancount_write.create_invoice(models.Invoice(customer_id=1, lines=[LINE]))
+    feed = watch.Feed()
+    inv = beancount_store.get_invoice(1)
+    inv.lines = [models.InvoiceLine(**{**LINE, "description": "Changed"})]
+    beancount_write.update_invoice(inv)
+    (event,) = feed.poll()
+    assert summary([event]) == [("invoice", "updated", 1)]
+    assert event["data"]["lines"][0]["description"] == "Changed"
+    assert list(feed.poll()) == []
+    assert list(watch.Feed(event["token"]).poll()) == []
+
+
+def test_replaced_file_and_unparsable_append(basedir):
+    feed = watch.Feed()
+    customers = basedir / "includes" / "customers.beancount"
+    with open(customers, "a", encoding="utf-8") as f:
+        f.write('\n2026-01-01 custom "customer" "Broken\n')
+    (event,) = feed.poll()
+    assert event["kind"] == "error" and event["file"] == "includes/customers.beancount"
+    text = customers.read_text(encoding="utf-8")
+    customers.unlink()
+    customers.write_text(text.split("\n2026-01-01")[0], encoding="utf-8")
+    assert summary(feed.poll()) == [("customer", "created", 1)]
+
+
+def test_invalid_token(basedir):
+    with pytest.raises(ValueError, match="invalid position token"):
+        watch.Feed("bm90IGpzb24")
+    r = CliRunner().invoke(cli.cli, ["watch", "--once", "--since-offset", "x"])
+    assert r.exit_code == 2 and r.stderr == "Invalid position token\n"
+
+
+def test_watch_cli_once(basedir):
+    snapshot.enable(False)
+    runner = CliRunner()
+    r = runner.invoke(cli.cli, ["watch", "--once"])
+    (position,) = [json.loads(line) for line in r.output.splitlines()]
+    assert position["kind"] == "position"
+    beancount_write.create_customer(models.Customer(name="ACME"))
+    r = runner.invoke(cli.cli, ["watch", "--once", "--since-offset", position["token"]])
+    lines = [json.loads(line) for line in r.output.splitlines()]
+    assert [(x["kind"], x.get("id")) for x in lines] == [("customer", 2), ("position", None)]
+    assert not snapshot.is_enabled()
+
+
+def test_mcp_changes_resource(basedir):
+    server = mcp_server.create_mcp_server("Test")
+
+    def read(uri):
+        (content,) = asyncio.run(server.read_resource(uri))
+        return json.loads(content.content)
+
+    start = read("arledge://changes")
+    assert start["events"] == []
+    beancount_write.create_customer(models.Customer(name="ACME"))
+    changes = read(f"arledge://changes/{start['token']}")
+    assert summary(changes["events"]) == [("customer", "created", 2)]
+    assert read(f"arledge://changes/{changes['token']}")["events"] == []
@@ -0,0 +1,131 @@
+import re
+
+import pytest
+
+from arledge import beancount_store, beancount_write, models, snapshot
+
+LINE = {"description": "Work", "quantity": "2", "unit_price": "100", "vat_rate": "25"}
+
+
+@pytest.fixture
+def base(basedir):
+    beancount_write.create_customer(models.Customer(name="ACME"))
+    beancount_write.create_invoice(models.Invoice(customer_id=1, lines=[LINE]))
+    return basedir
+
+
+def test_duplicate_and_unknown_ids_are_rejected(base):
+    customers = base / "includes" / "customers.beancount"
+    before = customers.read_text(encoding="utf-8")
+    with pytest.raises(ValueError, match="duplicate customer customer_id 1"):
+        beancount_write.create_customer(models.Customer(id=1, name="Again"))
+    with pytest.raises(ValueError, match="unknown customer customer_id 7"):
+        beancount_write.update_customer(models.Customer(id=7, name="Nobody"))
+    with pytest.raises(ValueError, match="unknown creditor creditor_id 1"):
+        beancount_write.update_creditor(models.Creditor(id=1, name="Nobody"))
+    cred = beancount_write.create_creditor(models.Creditor(name="Me"))
+    with pytest.raises(ValueError, match="duplicate creditor creditor_id 1"):
+        beancount_write.create_creditor(models.Creditor(id=cred.id, name="Me again"))
+    assert customers.read_text(encoding="utf-8") == before
+    assert [c.id for c in beancount_store.list_creditors()] == [1]
+
+
+def test_creates_and_updates_share_one_composer(base):
+    def last_entries(name, n):
+        text = (base / "includes" / f"{name}.beancount").read_text(encoding="utf-8")
+        return [e.strip() for e in re.split(r"\n(?=\d{4}-)", text.strip())][-n:]
+
+    cred = models.Creditor(name="Me AB", email="me@example.com", phone="+46 1", tax_id="SE1")
+    beancount_write.create_creditor(cred)
+    beancount_write.update_creditor(cred)
+    created, updated = last_entries("creditors", 2)
+    assert created == updated and '  phone: "+46 1"' in created.splitlines()
+    assert beancount_store.get_creditor(1).model_dump(exclude={"created_at"}) == cred.model_dump(exclude={"created_at"})
+    beancount_write.update_customer(models.Customer(id=1, name="ACME"))
+    beancount_write.create_customer(models.Customer(name="ACME"))
+    updated, created = last_entries("customers", 2)
+    assert updated == created.replace("customer_id: 2", "customer_id: 1")
+
+
+def test_invoice_references_are_checked_before_writing(base):
+    sidecars = base / "includes" / "invoices" / "data"
+    side = sidecars / "inv-0001.json"
+    original = side.read_bytes()
+    with pytest.raises(ValueError, match="unknown customer customer_id 9"):
+        beancount_write.create_invoice(models.Invoice(customer_id=9, lines=[LINE]))
+    with pytest.raises(ValueError, match="duplicate invoice invoice_id 1"):
+        beancount_write.create_invoice(models.Invoice(id=1, customer_id=1, lines=[{**LINE, "quantity": "5"}]))
+    # the existing sidecar is left alone and nothing else was written
+    assert side.read_bytes() == original
+    assert sorted(p.name for p in sidecars.iterdir()) == ["inv-0001.json"]
+    assert [inv.id for inv in beancount_store.list_invoices()] == [1]
+
+
+def test_batches_check_ids_within_the_batch(base):
+    res = beancount_write.create_invoices(
+        [
+            models.Invoice(id=5, customer_id=1, lines=[LINE]),
+            models.Invoice(id=5, customer_id=1, lines=[LINE]),
+            models.Invoice(customer_id=2, lines=[LINE]),
+        ]
+    )
+    assert res[0].id == 5
+    assert [str(r) for r in res[1:]] == [
+        "Invoice snippet validation failed: ['duplicate invoice invoice_id 5']",
+        "Invoice snippet validation failed: ['unknown customer customer_id 2']",
+    ]
+    res = beancount_write.create_customers([models.Customer(name="B"), models.Customer(id=2, name="C")])
+    assert res[0].id == 2 and isinstance(res[1], ValueError)
+    assert sorted(beancount_store.invoice_sidecar_index().values()) == [1, 5]
+
+
+def test_failed_month_append_drops_its_invoices(base, monkeypatch):
+    snapshot.enable()
+    assert beancount_store.list_invoices()
+    append = beancount_write._atomic_append
+
+    def failing(target, text):
+        if target.name == "2025-01.beancount":
+            raise OSError("disk full")
+        append(target, text)
+
+    monkeypatch.setattr(beancount_write, "_atomic_append", failing)
+    res = beancount_write.create_invoices(
+        [models.Invoice(customer_id=1, lines=[LINE], created_at=f"2025-0{m}-10T00:00:00") for m in (1, 2, 1)]
+    )
+    assert [str(r) if isinstance(r, Exception) else r.id for r in res] == ["disk full", 3, "disk full"]
+    data = base / "includes" / "invoices" / "data"
+    assert sorted(p.name for p in data.iterdir()) == ["inv-0001.json", "inv-0003.json"]
+    assert sorted(inv.id for inv in beancount_store.list_invoices()) == [1, 3]
+    assert sorted(beancount_store.invoice_sidecar_index().values()) == [1, 3]
+    assert 2 not in beancount_store.write_index()["invoice"]
+
+
+def test_opened_accounts_are_enforced_once_declared(base):
+    accounts = base / "includes" / "invoices" / "accounts.beancount"
+    accounts.write_text(
+        "2000-01-01 open Assets:Receivable:1\n2000-01-01 open Income:Services\n2000-01-01 open Liabilities:VAT\n"
+        "2000-01-01 close Liabilities:VAT\n",
+        encoding="utf-8",
+    )
+    with pytest.raises(ValueError, match=r"inactive account Liabilities:VAT on \d{4}-\d\d-\d\d"):
+        beancount_write.create_invoice(models.Invoice(customer_id=1, lines=[LINE]))
+    beancount_write.create_invoice(models.Invoice(customer_id=1, lines=[{**LINE, "vat_rate": "0"}]))
+    beancount_write.create_customer(models.Customer(name="Other"))
+    with pytest.raises(ValueError, match="unknown account Assets:Receivable:2"):
+        beancount_write.create_invoice(models.Invoice(customer_id=2, lines=[{**LINE, "vat_rate": "0"}]))
+
+
+def test_resident_index_follows_writes(base):
+    snapshot.enable()
+    try:
+        index = beancount_store.write_index()
+        assert index["customer"] == {1} and index["invoice"] == {1}
+        beancount_write.create_customer(models.Customer(name="Other"))
+        beancount_write.create_invoice(models.Invoice(customer_id=2, lines=[LINE]))
+        index = beancount_store.write_index()
+        assert index["customer"] == {1, 2} and index["invoice"] == {1, 2}
+        with pytest.raises(ValueError, match="duplicate customer customer_id 2"):
+            beancount_write.create_customer(models.Customer(id=2, name="Again"))
+    finally:
+        snapshot.enable(False)